@@ -4,13 +4,48 @@ RE-Cycle Pro - 房地产周期分析Web应用
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-import openai
-import json
+import os
+
+from recycle import core
+from recycle.core import (
+    ASSET_LABELS,
+    CYCLE_INPUTS,
+    CYCLE_MODES,
+    CYCLE_NAMES,
+    DEFAULT_MACRO,
+    DEFAULT_PARAMS,
+    REPORT_INPUTS,
+    SIGNAL_EMOJI,
+    SIGNAL_INPUTS,
+    report_body,
+    stamp_report,
+    validate_inputs,
+)
+from recycle.grid import GRID_AXES, GRID_METRICS, evaluate_grid, grid_cache_info
+from recycle.montecarlo import FIELD_BOUNDS, SAMPLED_FIELDS, run_monte_carlo
+from recycle.backtest import load_macro_series, run_backtest
+from recycle.datasources import SOURCES_ENV, DiskCache, build_providers, fetch_macro_data
+from recycle.store import IndicatorStore
+from recycle.regions import analyze_regions, regions_from_store, signal_matrix, signal_summary, sort_regions
+from recycle.memo import canonical_digest, memo_stats, memoize
+from recycle.pipeline import PipelineState, StageGraph
+from recycle.superposition import CYCLES, REGIMES, composite_frame, month_labels, signal_outlook, signal_path, superpose
+from recycle.profiling import profiled, profiler, stage
+from recycle.result_store import ResultStore, estimate_size
+from recycle.llm_cache import LLMCache, strategy_cache_key
+from recycle import fake_llm
+from recycle.cards import card_grid, info_card, inject_styles, metric_card, signal_card
+from recycle.llm_client import shared_client
+from recycle.rules import RULES
+from recycle.timeline import horizon_figure, regions_gantt, scenario_gantt
+from recycle.prompts import DEFAULT_PROMPT_MODE, LLM_MODEL, LLM_TEMPERATURE, PROMPT_MODES, build_messages, cache_variant, max_tokens_for
+from recycle.tokens import TokenBudgetError, TokenLedger, savings_report, usage_by_mode
 
 # 页面配置
 st.set_page_config(
@@ -19,339 +54,139 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 自定义CSS样式 - 深色金融级专业UI
-st.markdown("""
-<style>
-    /* 全局深色主题 */
-    .stApp {
-        background-color: #000000;
-        color: #ffffff;
-    }
-    
-    /* 侧边栏样式 */
-    section[data-testid="stSidebar"] {
-        background-color: #000000;
-        border-right: 1px solid #334155;
-    }
-    
-    /* 标题样式 */
-    .main-title {
-        font-size: 28px;
-        font-weight: 700;
-        color: #f1f5f9;
-        text-align: center;
-        padding: 20px 0;
-        border-bottom: 2px solid #3b82f6;
-        margin-bottom: 20px;
-    }
-    
-    /* 卡片样式 */
-    .metric-card {
-        background-color: #1a1a1a;
-        border-radius: 12px;
-        padding: 20px;
-        border: 1px solid #334155;
-        text-align: center;
-        transition: all 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        border-color: #3b82f6;
-        transform: translateY(-2px);
-    }
-    
-    .metric-label {
-        font-size: 14px;
-        color: #94a3b8;
-        margin-bottom: 8px;
-    }
-    
-    .metric-value {
-        font-size: 32px;
-        font-weight: 700;
-        color: #f1f5f9;
-    }
-    
-    .metric-subtitle {
-        font-size: 12px;
-        color: #64748b;
-        margin-top: 8px;
-    }
-    
-    /* 信号灯卡片 */
-    .signal-card {
-        background-color: #1a1a1a;
-        border-radius: 12px;
-        padding: 16px;
-        border: 1px solid #334155;
-        text-align: center;
-        height: 100%;
-    }
-    
-    .signal-emoji {
-        font-size: 36px;
-        margin-bottom: 8px;
-    }
-    
-    .signal-name {
-        font-size: 12px;
-        color: #94a3b8;
-        margin-bottom: 4px;
-    }
-    
-    .signal-action {
-        font-size: 14px;
-        font-weight: 600;
-        color: #f1f5f9;
-        margin-bottom: 8px;
-    }
-    
-    .signal-confidence {
-        font-size: 11px;
-        color: #64748b;
-    }
-    
-    /* 按钮样式 */
-    .stButton > button {
-        background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 12px 24px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #2563eb 0%, #1d4ed8 100%);
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(59, 130, 246, 0.4);
-    }
-    
-    /* 进度条样式 */
-    .confidence-bar {
-        background-color: #334155;
-        border-radius: 4px;
-        height: 6px;
-        overflow: hidden;
-        margin-top: 4px;
-    }
-    
-    .confidence-fill {
-        height: 100%;
-        border-radius: 4px;
-        transition: width 0.5s ease;
-    }
-    
-    /* 指标表格样式 */
-    .dataframe {
-        background-color: #1e293b;
-        border-radius: 12px;
-        overflow: hidden;
-    }
-    
-    /* 输入框样式 */
-    .stNumberInput > div > div {
-        background-color: #1a1a1a;
-        border-color: #333333;
-        color: #ffffff;
-    }
-    
-    /* 滑块样式 */
-    .stSlider > div {
-        color: #3b82f6;
-    }
-    
-    /* 警告框样式 */
-    .stAlert {
-        background-color: #1e293b;
-        border-color: #ef4444;
-        color: #f1f5f9;
-    }
-    
-    /* 展开器样式 */
-    .streamlit-expanderHeader {
-        background-color: #1e293b;
-        border-radius: 8px;
-        color: #f1f5f9;
-    }
-    
-    /* 下载按钮样式 */
-    .download-btn {
-        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 8px 16px;
-        font-weight: 500;
-    }
-</style>
-""", unsafe_allow_html=True)
+# 自定义CSS样式 - 深色金融级专业UI（recycle/frontend/styles.css，每个会话只传输一次）
+inject_styles()
 
 
+@profiled('session_init')
 def initialize_session_state():
-    """初始化会话状态，用于数据持久化"""
-    default_params = {
-        'inventory': 3.5,
-        'juglar': 10.0,
-        'population': 30.0,
-        'm1m2': -8.5,
-        'investment': -10.6,
-        'bond_yield': 1.91,
-        'mortgage_rate': 3.85,
-        'ltv': 0.7,
-        'rent_yield': 2.2,
-        'data_source': 'manual'
-    }
+    """初始化会话状态，返回本会话上次保存的参数"""
+    default_params = {**DEFAULT_PARAMS, **DEFAULT_MACRO, 'data_source': 'manual', 'cycle_mode': 'inventory'}
     
-    if 'last_params' not in st.session_state:
-        st.session_state.last_params = default_params.copy()
+    # 本地时序库中已有的最新全国数据优先于内置默认值
+    for field, value in get_indicator_store().latest_values().items():
+        if field in default_params:
+            default_params[field] = value
     
-    if 'analysis_result' not in st.session_state:
-        st.session_state.analysis_result = None
+    # 回收空闲会话；上次参数、分析快照等结果存放在共享结果存储中，会话只记录键
+    get_result_store().sweep(protect=current_session_id())
+    last_params = session_result('last_params')
+    if last_params is None:
+        last_params = hold_result('last_params', default_params)
     
     if 'api_key' not in st.session_state:
         st.session_state.api_key = ''
+    
+    return last_params
 
 
-def calculate_cycles(params, macro_data):
-    """计算周期位置和三底时间戳"""
-    inventory_months = params['inventory'] * 12
-    current_date = datetime.now()
-    current_month = current_date.month + (current_date.year - 2026) * 12
-    
-    # 库存周期定位
-    cycle_position = (current_month % inventory_months) / inventory_months
-    
-    # 确定周期相位
-    if 0.75 <= cycle_position <= 1.0:
-        phase = "被动去库存（复苏早期）"
-        policy_bottom = "当前或已触及"
-        credit_bottom = "预计2-3个季度后"
-        market_bottom = "预计3-4个季度后"
-    elif 0.5 <= cycle_position < 0.75:
-        phase = "主动补库存（复苏中期）"
-        policy_bottom = "已触及"
-        credit_bottom = "当前或已触及"
-        market_bottom = "预计1-2个季度后"
-    elif 0.25 <= cycle_position < 0.5:
-        phase = "被动补库存（过热期）"
-        policy_bottom = "已触及"
-        credit_bottom = "已触及"
-        market_bottom = "预计4-6个季度后"
-    else:
-        phase = "主动去库存（衰退期）"
-        policy_bottom = "预计1-2个季度后"
-        credit_bottom = "预计2-4个季度后"
-        market_bottom = "当前或已触及"
-    
-    # 计算三底时间戳（基于输入参数动态计算）
-    base_year = 2026
-    
-    # 政策底：基于M1M2剪刀差判断
-    m1m2 = macro_data['m1m2']
-    if m1m2 >= -5:
-        policy_q = "2026Q1"
-    elif m1m2 >= -10:
-        policy_q = "2026Q2"
-    elif m1m2 >= -15:
-        policy_q = "2026Q3"
-    else:
-        policy_q = "2026Q4"
-    
-    # 信用底：基于投资增速判断
-    investment = macro_data['investment']
-    if investment >= -5:
-        credit_q = "2026Q3"
-    elif investment >= -10:
-        credit_q = "2026Q4"
-    elif investment >= -15:
-        credit_q = "2027Q1"
-    else:
-        credit_q = "2027Q2"
-    
-    # 市场底：基于库存周期和利率判断
-    inventory = params['inventory']
-    ltv = macro_data['ltv']
-    mortgage_rate = macro_data['mortgage_rate']
-    
-    # 综合判断市场底时间
-    if inventory <= 3.0 and ltv >= 0.75 and mortgage_rate <= 3.5:
-        market_q = "2026Q2"
-    elif inventory <= 3.5 and ltv >= 0.65:
-        market_q = "2026Q4"
-    elif inventory <= 4.0:
-        market_q = "2027Q2"
-    else:
-        market_q = "2027Q4"
-    
-    return {
-        "policy_bottom": policy_q,
-        "credit_bottom": credit_q,
-        "market_bottom": market_q,
-        "current_phase": phase,
-        "cycle_position": cycle_position,
-        "inventory_months": inventory_months
+@st.cache_resource
+def get_result_store():
+    """会话共享的结果存储（进程内共享，体积上限与空闲回收时间见 RECYCLE_RESULT_STORE_MB / RECYCLE_SESSION_IDLE_MINUTES）"""
+    return ResultStore()
+
+
+def current_session_id():
+    """当前浏览器会话的标识"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        return ctx.session_id
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = os.urandom(8).hex()
+    return st.session_state.session_id
+
+
+def session_result(slot, default=None):
+    """本会话 slot 槽位引用的共享结果（调用方只读）"""
+    return get_result_store().lookup(current_session_id(), slot, default)
+
+
+def session_result_key(slot):
+    return get_result_store().slot_key(current_session_id(), slot)
+
+
+def session_result_item(slot):
+    """本会话 slot 槽位的 (键, 共享结果)，一次读取；槽位为空时为 (None, None)"""
+    return get_result_store().lookup_item(current_session_id(), slot)
+
+
+def hold_result(slot, value, key=None):
+    """将结果存入共享结果存储并由本会话的 slot 槽位引用，内容相同时复用已有对象；返回共享的对象"""
+    return get_result_store().bind(current_session_id(), slot, key or canonical_digest(slot, value), value)
+
+
+@st.cache_resource
+def get_indicator_store():
+    """本地指标时序库（进程内共享）"""
+    return IndicatorStore()
+
+
+@st.cache_resource
+def get_llm_cache():
+    """AI策略解读持久化缓存（进程内共享，跨重启保留）"""
+    return LLMCache()
+
+
+@st.cache_resource
+def get_token_ledger():
+    """Token 用量台账与预算（进程内共享，跨重启保留）"""
+    return TokenLedger()
+
+
+@st.cache_resource
+def get_data_sources():
+    """构建自动抓取数据源与磁盘缓存（进程内共享）"""
+    return build_providers(), DiskCache()
+
+
+@profiled('data_fetch')
+def load_auto_macro_data(force=False):
+    """并发抓取宏观指标，剔除超出输入范围的值，返回 (指标值, 抓取明细, 错误信息)"""
+    providers, cache = get_data_sources()
+    observations, errors = fetch_macro_data(providers, cache=cache, force=force)
+    
+    # 新数据追加进本地时序库，逐步积累历史（内置样例数据不是真实观测，不入库）
+    fresh = {
+        field: (obs.as_of, obs.value)
+        for field, obs in observations.items()
+        if obs.as_of and not obs.from_cache and not obs.sample
     }
+    if fresh:
+        get_indicator_store().append_observations(fresh)
+    
+    values = {}
+    for field, obs in observations.items():
+        lo, hi = FIELD_BOUNDS[field]
+        if lo <= obs.value <= hi:
+            values[field] = obs.value
+        else:
+            errors.append(f"{obs.source}/{field}: 数值 {obs.value} 超出输入范围（{lo} ~ {hi}）")
+    return values, observations, errors
 
 
-def calculate_asset_signals(cycle_data, macro_data, params):
-    """基于周期位置和宏观数据计算6类资产信号"""
-    rent_yield = macro_data['rent_yield']
-    cycle_pos = cycle_data['cycle_position']
-    signals = {}
-    
-    # 计算复苏系数（0-1，越接近1表示越接近复苏）
-    recovery_factor = cycle_pos if cycle_pos > 0.5 else 1 - cycle_pos
-    
-    # 一二线核心区住宅
-    if rent_yield > 2.5 and cycle_pos >= 0.5:
-        signals['tier1_res'] = {'signal': 'green', 'action': '积极配置', 'confidence': 0.85}
-    elif rent_yield < 2.0 or cycle_pos < 0.25:
-        signals['tier1_res'] = {'signal': 'red', 'action': '观望等待', 'confidence': 0.75}
-    else:
-        signals['tier1_res'] = {'signal': 'yellow', 'action': '左侧布局', 'confidence': 0.70}
-    
-    # 一二线商业地产
-    if rent_yield > 3.0 and cycle_pos >= 0.6:
-        signals['tier1_com'] = {'signal': 'green', 'action': '关注核心', 'confidence': 0.80}
-    elif rent_yield < 2.2 or cycle_pos < 0.3:
-        signals['tier1_com'] = {'signal': 'red', 'action': '规避为主', 'confidence': 0.85}
-    else:
-        signals['tier1_com'] = {'signal': 'yellow', 'action': '谨慎关注', 'confidence': 0.65}
-    
-    # 二线住宅
-    if rent_yield > 2.8 and cycle_pos >= 0.55:
-        signals['tier2_res'] = {'signal': 'green', 'action': '择机买入', 'confidence': 0.75}
-    elif rent_yield < 2.2 or cycle_pos < 0.35:
-        signals['tier2_res'] = {'signal': 'red', 'action': '保持观望', 'confidence': 0.80}
-    else:
-        signals['tier2_res'] = {'signal': 'yellow', 'action': '精选城市', 'confidence': 0.65}
-    
-    # 二线商业
-    if rent_yield > 3.5 and cycle_pos >= 0.65:
-        signals['tier2_com'] = {'signal': 'green', 'action': '关注优质', 'confidence': 0.70}
-    elif rent_yield < 2.5 or cycle_pos < 0.4:
-        signals['tier2_com'] = {'signal': 'red', 'action': '规避风险', 'confidence': 0.85}
-    else:
-        signals['tier2_com'] = {'signal': 'yellow', 'action': '暂不考虑', 'confidence': 0.70}
-    
-    # 三四线住宅（人口流出压力）
-    if macro_data['population'] < 28:
-        signals['tier34_res'] = {'signal': 'red', 'action': '坚决回避', 'confidence': 0.90}
-    elif cycle_pos >= 0.7:
-        signals['tier34_res'] = {'signal': 'yellow', 'action': '核心城市', 'confidence': 0.60}
-    else:
-        signals['tier34_res'] = {'signal': 'red', 'action': '全面规避', 'confidence': 0.85}
-    
-    # 三四线商业（流动性陷阱）
-    signals['tier34_com'] = {'signal': 'red', 'action': '零元购/规避', 'confidence': 0.95}
-    
-    return signals
+def current_month_key():
+    """当前月份，作为依赖 datetime.now() 的计算阶段的附加缓存键"""
+    return datetime.now().strftime('%Y-%m')
+
+
+# 分析内核的记忆化版本（进程内所有会话共享；结果对象不可变，直接共享无需拷贝）
+calculate_cycles = memoize(maxsize=512, extra_key=current_month_key)(core.calculate_cycles)
+calculate_asset_signals = memoize(maxsize=512)(core.calculate_asset_signals)
 
 
-def create_gantt_chart(cycle_data, signals):
-    """创建Plotly甘特图"""
+# 时序图渲染方式：single 为单轨迹 + 缓存布局模板的轻量图表定义，traces 为逐资产轨迹的原实现
+GANTT_MODE = os.environ.get('RECYCLE_GANTT_MODE', 'single')
+
+
+@memoize(maxsize=128, extra_key=current_month_key)
+def create_gantt_spec(cycle_data, signals):
+    """创建单轨迹甘特图定义（图表字典，调用方只读）"""
+    return scenario_gantt(cycle_data, signals, ASSET_LABELS)
+
+
+@memoize(maxsize=128, extra_key=current_month_key)
+def gantt_chart_data(cycle_data, signals):
+    """甘特图数据：(季度轴, 三底标记, 各资产条形)，均为元组，可在会话间共享"""
     # 生成时间轴数据
     quarters = []
     current_date = datetime.now()
@@ -379,41 +214,23 @@ def create_gantt_chart(cycle_data, signals):
         'red': '#ef4444'     # 下跌/出清期
     }
     
-    # 创建甘特图数据
-    fig = go.Figure()
-    
-    # 添加三底时间点的垂直虚线
-    policy_q = cycle_data['policy_bottom']
-    credit_q = cycle_data['credit_bottom']
-    market_q = cycle_data['market_bottom']
-    
     # 获取各季度在图表中的索引
     quarter_indices = {q: i for i, q in enumerate(quarters)}
     
-    if policy_q in quarter_indices:
-        fig.add_vline(x=quarter_indices[policy_q], line_dash="dash", line_color="#3b82f6", line_width=2)
-        fig.add_annotation(x=quarter_indices[policy_q], y=5.5, text="政策底", showarrow=False, font=dict(color="#3b82f6", size=12))
-    
-    if credit_q in quarter_indices:
-        fig.add_vline(x=quarter_indices[credit_q], line_dash="dash", line_color="#f97316", line_width=2)
-        fig.add_annotation(x=quarter_indices[credit_q], y=5.2, text="信用底", showarrow=False, font=dict(color="#f97316", size=12))
-    
-    if market_q in quarter_indices:
-        fig.add_vline(x=quarter_indices[market_q], line_dash="dash", line_color="#22c55e", line_width=2)
-        fig.add_annotation(x=quarter_indices[market_q], y=4.9, text="市场底", showarrow=False, font=dict(color="#22c55e", size=12))
-    
-    # 为每个资产创建条形
-    y_positions = {
-        '一二线核心区住宅': 5,
-        '一二线商业地产': 4,
-        '二线住宅': 3,
-        '二线商业': 2,
-        '三四线住宅': 1,
-        '三四线商业': 0
-    }
+    # 三底时间点：(季度索引, 标注, 颜色, 标注高度)
+    markers = tuple(
+        (quarter_indices[cycle_data[field]], text, color, y)
+        for field, text, color, y in (
+            ('policy_bottom', '政策底', '#3b82f6', 5.5),
+            ('credit_bottom', '信用底', '#f97316', 5.2),
+            ('market_bottom', '市场底', '#22c55e', 4.9),
+        )
+        if cycle_data[field] in quarter_indices
+    )
     
     asset_keys = ['tier1_res', 'tier1_com', 'tier2_res', 'tier2_com', 'tier34_res', 'tier34_com']
     
+    bars = []
     for asset_name, asset_key in zip(assets, asset_keys):
         signal = signals.get(asset_key, {'signal': 'red'})
         color = color_map[signal['signal']]
@@ -432,16 +249,35 @@ def create_gantt_chart(cycle_data, signals):
             start_idx = 0
             end_idx = min(quarter_indices.get(cycle_data.get('market_bottom', '2027Q2'), 6), len(quarters))
         
+        bars.append((asset_name, start_idx, end_idx, color, signal['action'], signal['confidence']))
+    
+    return tuple(quarters), markers, tuple(bars)
+
+
+def create_gantt_chart(data):
+    """由 gantt_chart_data 的结果创建Plotly甘特图（Figure 可变，每次调用新建，不做缓存）"""
+    quarters, markers, bars = data
+    
+    # 创建甘特图数据
+    fig = go.Figure()
+    
+    # 添加三底时间点的垂直虚线
+    for x, text, color, y in markers:
+        fig.add_vline(x=x, line_dash="dash", line_color=color, line_width=2)
+        fig.add_annotation(x=x, y=y, text=text, showarrow=False, font=dict(color=color, size=12))
+    
+    # 为每个资产创建条形
+    for asset_name, start_idx, end_idx, color, action, confidence in bars:
         fig.add_trace(go.Bar(
             y=[asset_name],
             x=[end_idx - start_idx],
             base=[start_idx],
             orientation='h',
             marker_color=color,
-            text=signal['action'],
+            text=action,
             textposition='inside',
             textfont=dict(color='white', size=10),
-            hovertemplate=f"{asset_name}<br>状态: {signal['action']}<br>置信度: {signal['confidence']*100:.0f}%<extra></extra>",
+            hovertemplate=f"{asset_name}<br>状态: {action}<br>置信度: {confidence*100:.0f}%<extra></extra>",
             showlegend=False
         ))
     
@@ -453,12 +289,11 @@ def create_gantt_chart(cycle_data, signals):
             x=0.5
         ),
         xaxis=dict(
-            title='时间',
+            title=dict(text='时间', font=dict(color='#94a3b8')),
             tickmode='array',
             tickvals=list(range(len(quarters))),
-            ticktext=quarters,
+            ticktext=list(quarters),
             tickfont=dict(color='#94a3b8'),
-            titlefont=dict(color='#94a3b8'),
             gridcolor='#334155',
             zerolinecolor='#334155'
         ),
@@ -510,157 +345,841 @@ def create_gantt_chart(cycle_data, signals):
     return fig
 
 
-def create_metrics_table(cycle_data, macro_data, signals):
-    """创建关键监测指标表格"""
+# 关键监测指标：(规则表指标键, 显示名称, 当前值格式)
+METRIC_ROWS = (
+    ('cycle_position', '库存周期位置', lambda v: f"{v*100:.1f}%"),
+    ('m1m2', 'M1M2剪刀差', lambda v: f"{v:.1f}%"),
+    ('investment', '房地产投资增速', lambda v: f"{v:.1f}%"),
+    ('bond_yield', '10年期国债收益率', lambda v: f"{v:.2f}%"),
+    ('mortgage_rate', '贷款利率', lambda v: f"{v:.2f}%"),
+    ('ltv', 'LTV贷款价值比', lambda v: f"{v:.2f}"),
+)
+
+
+@memoize(maxsize=256)
+def create_metrics_table(cycle_data, macro_data):
+    """创建关键监测指标表格（阈值与状态文字取自规则表）"""
+    values = {**macro_data, 'cycle_position': cycle_data['cycle_position']}
     metrics_data = [
         {
-            '指标': '库存周期位置',
-            '当前值': f"{cycle_data['cycle_position']*100:.1f}%",
-            '底部阈值': '>75%',
-            '状态': '🟢 健康' if cycle_data['cycle_position'] > 0.75 else ('🟡 偏弱' if cycle_data['cycle_position'] > 0.5 else '🔴 去化中')
-        },
-        {
-            '指标': 'M1M2剪刀差',
-            '当前值': f"{macro_data['m1m2']:.1f}%",
-            '底部阈值': '>-5%',
-            '状态': '🟢 宽货币' if macro_data['m1m2'] > -5 else ('🟡 边际改善' if macro_data['m1m2'] > -10 else '🔴 紧货币')
-        },
-        {
-            '指标': '房地产投资增速',
-            '当前值': f"{macro_data['investment']:.1f}%",
-            '底部阈值': '>-5%',
-            '状态': '🟢 企稳' if macro_data['investment'] > -5 else ('🟡 降幅收窄' if macro_data['investment'] > -12 else '🔴 持续下滑')
-        },
-        {
-            '指标': '10年期国债收益率',
-'当前值': f"{macro_data['bond_yield']:.2f}%",
-            '底部阈值': '<2.5%',
-            '状态': '🟢 宽松环境' if macro_data['bond_yield'] < 2.5 else ('🟡 中性' if macro_data['bond_yield'] < 3.5 else '🔴 利率压力')
-        },
-        {
-            '指标': '贷款利率',
-            '当前值': f"{macro_data['mortgage_rate']:.2f}%",
-            '底部阈值': '<4%',
-            '状态': '🟢 友好' if macro_data['mortgage_rate'] < 4 else ('🟡 适中' if macro_data['mortgage_rate'] < 5 else '🔴 偏高')
-        },
-        {
-            '指标': 'LTV贷款价值比',
-            '当前值': f"{macro_data['ltv']:.2f}",
-            '底部阈值': '>0.7',
-            '状态': '🟢 杠杆空间' if macro_data['ltv'] > 0.7 else ('🟡 适度' if macro_data['ltv'] > 0.5 else '🔴 限制')
+            '指标': name,
+            '当前值': fmt(values[metric]),
+            '底部阈值': RULES.metric_meta[metric]['threshold'],
+            '状态': RULES.metric_status(metric, values[metric]),
         }
+        for metric, name, fmt in METRIC_ROWS
     ]
     
     df = pd.DataFrame(metrics_data)
     return df
 
 
-def generate_strategy_llm(cycle_data, signals, macro_data, api_key):
-    """调用OpenAI API生成深度策略解读"""
-    if not api_key:
-        return None, "请先在侧边栏输入OpenAI API Key"
+@profiled('plotly.heatmap')
+def create_sensitivity_heatmap(grid, metric, current_point):
+    """创建二维情景敏感性热力图"""
+    metric_name, categories = GRID_METRICS[metric]
+    
+    # 信号沿用甘特图配色，三底季度由早到晚渐变
+    if metric in ('policy_bottom', 'credit_bottom', 'market_bottom'):
+        colors = ['#3b82f6', '#8b5cf6', '#f59e0b', '#ef4444']
+        labels = list(categories)
+    else:
+        colors = ['#10b981', '#f59e0b', '#ef4444']
+        labels = ['🟢 配置', '🟡 观望', '🔴 规避']
     
-    try:
-        client = openai.OpenAI(api_key=api_key)
-        
-        # 构建信号摘要
-        signal_summary = []
-        for key, value in signals.items():
-            signal_summary.append(f"- {key}: {value['action']} (置信度{value['confidence']*100:.0f}%)")
+    # 离散色阶：每个类别占一段等宽区间
+    n = len(colors)
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale.append([i / n, color])
+        colorscale.append([(i + 1) / n, color])
+    
+    x_label = GRID_AXES[grid['x_field']][0]
+    y_label = GRID_AXES[grid['y_field']][0]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=grid['x'],
+        y=grid['y'],
+        z=grid['codes'][metric],
+        zmin=-0.5,
+        zmax=n - 0.5,
+        colorscale=colorscale,
+        colorbar=dict(
+            tickvals=list(range(n)),
+            ticktext=labels,
+            tickfont=dict(color='#94a3b8')
+        ),
+        hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<extra></extra>"
+    ))
+    
+    # 标记当前参数所在位置
+    fig.add_trace(go.Scatter(
+        x=[current_point[0]],
+        y=[current_point[1]],
+        mode='markers',
+        marker=dict(color='#ffffff', size=12, symbol='x'),
+        name='当前参数',
+        hovertemplate="当前参数<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=dict(
+            text=f'🔥 {metric_name} 敏感性热力图',
+            font=dict(color='#f1f5f9', size=18),
+            x=0.5
+        ),
+        xaxis=dict(
+            title=dict(text=x_label, font=dict(color='#94a3b8')),
+            tickfont=dict(color='#94a3b8'),
+            gridcolor='#334155'
+        ),
+        yaxis=dict(
+            title=dict(text=y_label, font=dict(color='#94a3b8')),
+            tickfont=dict(color='#94a3b8'),
+            gridcolor='#334155'
+        ),
+        paper_bgcolor='#0f172a',
+        plot_bgcolor='#1e293b',
+        font=dict(color='#e2e8f0'),
+        height=520,
+        margin=dict(l=20, r=20, t=60, b=40),
+        showlegend=False
+    )
+    
+    return fig
+
+
+@profiled('view.sensitivity')
+def render_sensitivity_view(params, macro_data):
+    """情景敏感性热力图视图：随侧边栏参数实时刷新，无需点击生成按钮"""
+    st.subheader("🔥 情景敏感性分析")
+    
+    axis_fields = list(GRID_AXES.keys())
+    metric_fields = list(GRID_METRICS.keys())
+    
+    x_col, y_col, metric_col = st.columns(3)
+    with x_col:
+        x_field = st.selectbox(
+            "横轴",
+            axis_fields,
+            index=axis_fields.index('rent_yield'),
+            format_func=lambda f: GRID_AXES[f][0],
+            key='heatmap_x'
+        )
+    with y_col:
+        y_options = [f for f in axis_fields if f != x_field]
+        y_field = st.selectbox(
+            "纵轴",
+            y_options,
+            index=y_options.index('inventory') if 'inventory' in y_options else 0,
+            format_func=lambda f: GRID_AXES[f][0],
+            key='heatmap_y'
+        )
+    with metric_col:
+        metric = st.selectbox(
+            "观察指标",
+            metric_fields,
+            index=metric_fields.index('tier1_res'),
+            format_func=lambda m: GRID_METRICS[m][0],
+            key='heatmap_metric'
+        )
+    
+    base = {**params, **macro_data}
+    grid = evaluate_grid(x_field, y_field, base)
+    
+    fig = create_sensitivity_heatmap(grid, metric, (base[x_field], base[y_field]))
+    st.plotly_chart(fig, use_container_width=True)
+    
+    cache = grid_cache_info()
+    st.caption(
+        f"网格 {len(grid['y'])} × {len(grid['x'])} = {len(grid['x']) * len(grid['y']):,} 个情景 · "
+        f"缓存命中 {cache.hits} / 未命中 {cache.misses}"
+    )
+
+
+# 蒙特卡洛抽样字段：(显示名称, 默认离散度)
+MC_FIELDS = {
+    'm1m2': ('M1M2剪刀差（%）', 2.0),
+    'investment': ('房地产投资增速（%）', 3.0),
+    'bond_yield': ('10年期国债收益率（%）', 0.2),
+    'mortgage_rate': ('贷款利率（%）', 0.3),
+    'ltv': ('LTV贷款价值比', 0.05),
+    'rent_yield': ('租售比（%）', 0.3),
+}
+
+MC_DISTRIBUTIONS = ["正态", "均匀", "三角", "固定"]
+
+
+def build_mc_distribution(kind, center, spread):
+    """将界面上的分布选择转换为抽样引擎的分布定义"""
+    if kind == "正态":
+        return ('normal', center, spread)
+    if kind == "均匀":
+        return ('uniform', center - spread, center + spread)
+    if kind == "三角":
+        return ('triangular', center - spread, center, center + spread)
+    return ('fixed', center)
+
+
+@profiled('plotly.probability')
+def create_probability_chart(mc_result):
+    """创建各资产红黄绿信号经验概率堆叠条形图"""
+    fig = go.Figure()
+    asset_keys = [key for key in GRID_METRICS if key.startswith('tier')]
+    names = [GRID_METRICS[key][0] for key in asset_keys]
+    
+    for color, label, hex_color in [
+        ('green', '🟢 配置', '#10b981'),
+        ('yellow', '🟡 观望', '#f59e0b'),
+        ('red', '🔴 规避', '#ef4444')
+    ]:
+        probs = [mc_result['signals'][key][color] for key in asset_keys]
+        fig.add_trace(go.Bar(
+            y=names,
+            x=probs,
+            orientation='h',
+            name=label,
+            marker_color=hex_color,
+            text=[f"{p*100:.1f}%" if p >= 0.05 else '' for p in probs],
+            textposition='inside',
+            textfont=dict(color='white', size=10),
+            hovertemplate="%{y}<br>" + label + ": %{x:.1%}<extra></extra>"
+        ))
+    
+    fig.update_layout(
+        title=dict(
+            text=f"🎲 资产信号经验概率（{mc_result['n_draws']:,} 次抽样）",
+            font=dict(color='#f1f5f9', size=18),
+            x=0.5
+        ),
+        barmode='stack',
+        xaxis=dict(
+            tickformat='.0%',
+            range=[0, 1],
+            tickfont=dict(color='#94a3b8'),
+            gridcolor='#334155'
+        ),
+        yaxis=dict(
+            autorange='reversed',
+            tickfont=dict(color='#94a3b8')
+        ),
+        paper_bgcolor='#0f172a',
+        plot_bgcolor='#1e293b',
+        font=dict(color='#e2e8f0'),
+        height=400,
+        margin=dict(l=20, r=20, t=60, b=40),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=-0.2,
+            xanchor='center',
+            x=0.5,
+            font=dict(color='#94a3b8')
+        )
+    )
+    
+    return fig
+
+
+@profiled('view.monte_carlo')
+def render_monte_carlo_view(params, macro_data):
+    """蒙特卡洛模拟视图：按设定分布抽样宏观输入，统计信号与三底的经验分布"""
+    st.subheader("🎲 蒙特卡洛不确定性分析")
+    
+    with st.form('mc_form'):
+        st.caption("各宏观输入以侧边栏当前值为中心抽样；离散度对正态分布为标准差，对均匀/三角分布为半宽")
+        distributions = {}
+        for field in SAMPLED_FIELDS:
+            label, default_spread = MC_FIELDS[field]
+            name_col, kind_col, spread_col = st.columns([2, 1, 1])
+            with name_col:
+                st.markdown(f"**{label}**<br>中心值 {macro_data[field]}", unsafe_allow_html=True)
+            with kind_col:
+                kind = st.selectbox("分布", MC_DISTRIBUTIONS, key=f'mc_kind_{field}')
+            with spread_col:
+                spread = st.number_input("离散度", min_value=0.0, value=default_spread, key=f'mc_spread_{field}')
+            distributions[field] = build_mc_distribution(kind, macro_data[field], spread)
         
-        prompt = f"""
-基于以下房地产周期数据，生成专业投资策略解读：
-
-【周期定位】
-- 当前周期相位：{cycle_data['current_phase']}
-- 周期位置：{cycle_data['cycle_position']*100:.1f}%
-- 政策底时间：{cycle_data['policy_bottom']}
-- 信用底时间：{cycle_data['credit_bottom']}
-- 市场底时间：{cycle_data['market_bottom']}
-
-【宏观指标】
-- M1M2剪刀差：{macro_data['m1m2']}%
-- 房地产投资增速：{macro_data['investment']}%
-- 10年期国债收益率：{macro_data['bond_yield']}%
-- 贷款利率：{macro_data['mortgage_rate']}%
-- LTV贷款价值比：{macro_data['ltv']}
-- 租售比：{macro_data['rent_yield']}%
-
-【资产配置信号】
-{chr(10).join(signal_summary)}
-
-请提供以下内容（使用Markdown格式）：
-
-## 1. 当前阶段操作策略（100字内）
-[策略建议]
-
-## 2. 2026-2027年关键风险点提示
-- 风险点1
-- 风险点2
-- 风险点3
-
-## 3. 不同资金量配置建议
-- **500万以下**：配置建议
-- **500万-5000万**：配置建议  
-- **5000万以上**：配置建议
-
-请保持专业、客观的投资分析风格。
-"""
+        draw_col, seed_col = st.columns(2)
+        with draw_col:
+            n_draws = st.select_slider(
+                "抽样次数",
+                options=[10_000, 100_000, 1_000_000, 10_000_000],
+                value=100_000,
+                format_func=lambda n: f"{n:,}"
+            )
+        with seed_col:
+            seed = st.number_input("随机种子", min_value=0, value=42, step=1)
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "你是一位资深的房地产投资分析师，专注于宏观经济周期与房地产市场的研究。你的分析风格专业、客观、简洁，能够为投资者提供清晰、可操作的策略建议。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
+        submitted = st.form_submit_button("🎲 开始模拟", use_container_width=True)
+    
+    # 抽样结果由分布设置、输入、次数与种子唯一确定，相同设置的会话共用一份结果
+    mc_key = canonical_digest('mc', distributions, {**params, **macro_data}, n_draws, int(seed))
+    if submitted and mc_key in get_result_store():
+        hold_result('mc', get_result_store().get(mc_key), key=mc_key)
+        st.caption("⚡ 相同设置的模拟结果已算过，直接复用")
+    elif submitted:
+        progress_bar = st.progress(0.0, text="正在抽样...")
         
-        return response.choices[0].message.content, None
+        def on_progress(done, total):
+            progress_bar.progress(done / total, text=f"已完成 {done:,} / {total:,} 次抽样")
         
-    except Exception as e:
-        return None, f"API调用失败: {str(e)}"
+        try:
+            hold_result('mc', run_monte_carlo(
+                distributions,
+                {**params, **macro_data},
+                n_draws=n_draws,
+                seed=int(seed),
+                progress=on_progress
+            ), key=mc_key)
+        except ValueError as e:
+            st.error(f"⚠️ 分布设置有误: {e}")
+        progress_bar.empty()
+    
+    mc_result = session_result('mc')
+    if mc_result is None:
+        st.info("👆 设置各输入的分布后点击「开始模拟」")
+        return
+    
+    st.plotly_chart(create_probability_chart(mc_result), use_container_width=True)
+    
+    st.subheader("📅 三底季度分布")
+    bottom_cols = st.columns(3)
+    for col, (name, label) in zip(bottom_cols, [
+        ('policy_bottom', '🏛️ 政策底'),
+        ('credit_bottom', '💳 信用底'),
+        ('market_bottom', '🏠 市场底')
+    ]):
+        with col:
+            dist = mc_result['bottoms'][name]
+            df = pd.DataFrame({'季度': list(dist.keys()), '概率': [f"{p*100:.1f}%" for p in dist.values()]})
+            st.markdown(f"**{label}**")
+            st.dataframe(df, hide_index=True, use_container_width=True)
 
 
-def validate_inputs(params, macro_data):
-    """验证输入数据的有效性"""
-    errors = []
+@profiled('view.backtest')
+def render_backtest_view(params):
+    """历史回测视图：上传月度宏观序列，整表回放并统计信号命中率"""
+    st.subheader("⏪ 历史回测")
+    st.caption(
+        "上传月度序列（CSV/Parquet）：需包含 date 与六项宏观指标列，可选 region（城市）、"
+        "inventory / population（缺省取侧边栏参数）、price_index 或 <资产>_price（用于计算命中率）"
+    )
     
-    if macro_data['m1m2'] < -20 or macro_data['m1m2'] > 10:
-        errors.append("M1M2剪刀差超出合理范围（-20% ~ +10%）")
+    store = get_indicator_store()
+    source = st.radio("数据来源", ["上传文件", "本地时序库"], horizontal=True, key='backtest_source')
+    
+    uploaded = None
+    if source == "上传文件":
+        uploaded = st.file_uploader("月度宏观序列", type=['csv', 'parquet'], key='backtest_file')
+    
+    horizon_col, band_col = st.columns(2)
+    with horizon_col:
+        horizon = st.slider("检验期（月）", min_value=3, max_value=36, value=12, step=3)
+    with band_col:
+        band = st.number_input("横盘区间（±%）", min_value=0.0, max_value=20.0, value=2.0, step=0.5) / 100
+    
+    if source == "本地时序库":
+        indicators = store.indicators()
+        if not indicators:
+            st.info("📭 本地时序库暂无数据，可通过自动抓取或导入历史序列积累数据")
+            return
+        frame = store.load_panel(indicators)
+    elif uploaded is None:
+        st.info("👆 请上传月度宏观序列文件")
+        return
     
-    if macro_data['investment'] < -20 or macro_data['investment'] > 20:
-        errors.append("房地产投资增速超出合理范围（-20% ~ +20%）")
+    try:
+        if uploaded is not None:
+            frame = load_macro_series(uploaded)
+        history, stats, dropped = run_backtest(frame, defaults=params, horizon=horizon, band=band)
+    except (KeyError, ValueError) as e:
+        st.error(f"⚠️ 回测数据异常: {e}")
+        return
+    
+    regions = history['region'].nunique() if 'region' in history.columns else 1
+    st.success(f"✅ 已回放 {len(history):,} 个月度样本（{regions} 个地区）")
+    if dropped:
+        st.warning(f"⚠️ {dropped:,} 行缺少必需字段（或取值无效），未参与回放")
+    
+    st.subheader("🎯 信号命中率")
+    stats_display = stats.assign(
+        asset=stats['asset'].map(lambda key: GRID_METRICS[key][0]),
+        hit_rate=stats['hit_rate'].map(lambda v: '-' if pd.isna(v) else f"{v*100:.1f}%"),
+        mean_forward_return=stats['mean_forward_return'].map(lambda v: '-' if pd.isna(v) else f"{v*100:+.2f}%")
+    ).rename(columns={
+        'asset': '资产类别',
+        'signal': '信号',
+        'months': '样本月数',
+        'hit_rate': '命中率',
+        'mean_forward_return': '平均未来涨跌幅'
+    })
+    st.dataframe(stats_display, hide_index=True, use_container_width=True)
+    
+    st.subheader("📜 信号历史")
+    st.dataframe(history, hide_index=True, use_container_width=True)
+    
+    st.download_button(
+        label="📥 下载信号历史（CSV）",
+        data=history.to_csv(index=False).encode('utf-8-sig'),
+        file_name=f"RE_Cycle_Backtest_{datetime.now().strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+
+@profiled('view.regions')
+def render_regions_view(params):
+    """多城市分析视图：批量计算各地区信号，以可排序、分页的矩阵展示"""
+    st.subheader("🗺️ 多城市批量分析")
+    st.caption(
+        "上传地区数据（CSV/Parquet）：每行一个地区，需包含 region 与六项宏观指标列，"
+        "inventory / population 缺省取侧边栏参数"
+    )
     
-    if macro_data['bond_yield'] < 0.5 or macro_data['bond_yield'] > 5.0:
-        errors.append("10年期国债收益率超出合理范围（0.5% ~ 5.0%）")
+    source = st.radio("数据来源", ["上传文件", "本地时序库"], horizontal=True, key='regions_source')
     
-    if macro_data['mortgage_rate'] < 2.0 or macro_data['mortgage_rate'] > 8.0:
-        errors.append("贷款利率超出合理范围（2.0% ~ 8.0%）")
+    if source == "本地时序库":
+        table = regions_from_store(get_indicator_store())
+        if table.empty:
+            st.info("📭 本地时序库暂无地区数据")
+            return
+    else:
+        uploaded = st.file_uploader("地区数据", type=['csv', 'parquet'], key='regions_file')
+        if uploaded is None:
+            st.info("👆 请上传地区数据文件")
+            return
+        if uploaded.name.endswith('.parquet'):
+            table = pd.read_parquet(uploaded)
+        else:
+            table = pd.read_csv(uploaded)
     
-    if macro_data['ltv'] < 0.3 or macro_data['ltv'] > 0.9:
-        errors.append("LTV贷款价值比超出合理范围（0.3 ~ 0.9）")
+    try:
+        result, dropped = analyze_regions(table, defaults=params)
+    except KeyError as e:
+        st.error(f"⚠️ 地区数据异常: {e}")
+        return
+    
+    asset_names = {key: GRID_METRICS[key][0] for key in GRID_METRICS if key.startswith('tier')}
+    
+    st.success(f"✅ 已完成 {len(result):,} 个地区的周期与信号计算")
+    if len(dropped):
+        sample = "、".join(map(str, dropped[:10])) + (" 等" if len(dropped) > 10 else "")
+        st.warning(f"⚠️ {len(dropped):,} 个地区缺少必需字段（或取值无效），未参与计算：{sample}")
+    if result.empty:
+        return
+    
+    # 各资产信号分布
+    summary = signal_summary(result).rename(
+        index={'green': '🟢 配置', 'yellow': '🟡 观望', 'red': '🔴 规避'},
+        columns=asset_names
+    )
+    st.dataframe(summary, use_container_width=True)
+    
+    # 排序与分页控制
+    sort_options = ['region', 'cycle_position'] + list(asset_names)
+    sort_labels = {'region': '地区', 'cycle_position': '周期位置', **asset_names}
+    sort_col, order_col, size_col, page_col = st.columns([2, 1, 1, 1])
+    with sort_col:
+        sort_by = st.selectbox("排序依据", sort_options, format_func=lambda k: sort_labels[k], key='regions_sort')
+    with order_col:
+        descending = st.toggle("倒序", value=False, key='regions_desc')
+    with size_col:
+        page_size = st.selectbox("每页行数", [25, 50, 100, 200], index=1, key='regions_page_size')
+    
+    total_pages = max(1, -(-len(result) // page_size))
+    with page_col:
+        page = st.number_input(f"页码（共 {total_pages} 页）", min_value=1, max_value=total_pages, value=1, step=1, key='regions_page')
+    
+    ordered = sort_regions(result, by=sort_by, ascending=not descending)
+    page_rows = ordered.iloc[(page - 1) * page_size:page * page_size]
+    
+    # 只为当前页生成展示文本
+    st.dataframe(signal_matrix(page_rows, asset_names), hide_index=True, use_container_width=True)
+    
+    # 当前页各地区的配置时序图（单轨迹渲染，数百行时图表定义仍然很小）
+    gantt_asset = st.selectbox("时序图资产类别", list(asset_names), format_func=asset_names.get, key='regions_gantt_asset')
+    st.plotly_chart(
+        regions_gantt(page_rows, gantt_asset, title=f"📊 {asset_names[gantt_asset]} · 各地区配置时序"),
+        use_container_width=True
+    )
+    
+    st.download_button(
+        label="📥 下载全部地区结果（CSV）",
+        data=result.to_csv(index=False).encode('utf-8-sig'),
+        file_name=f"RE_Cycle_Regions_{datetime.now().strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+
+# OpenAI 兼容接口地址（可指向代理或 recycle.mock_llm_server），缺省为官方接口
+LLM_BASE_URL = os.environ.get('RECYCLE_LLM_BASE_URL') or None
+
+PROMPT_MODE_LABELS = {'full': '完整模板', 'compact': '精简JSON'}
+
+
+@profiled('llm.call')
+def generate_strategy_llm(cycle_data, signals, macro_data, api_key, model=LLM_MODEL,
+                          temperature=LLM_TEMPERATURE, prompt_mode=DEFAULT_PROMPT_MODE,
+                          cache=None, ledger=None, messages=None):
+    """调用OpenAI API生成深度策略解读（传入 cache 时相同情景直接返回缓存结果，传入 ledger 时计量并执行 token 预算）"""
+    cache_key = strategy_cache_key(cycle_data, signals, macro_data, model, temperature, cache_variant(prompt_mode))
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, None
+    
+    if not api_key and not fake_llm.is_enabled():
+        return None, "请先在侧边栏输入OpenAI API Key"
     
-    return errors
+    try:
+        client = shared_client(api_key, base_url=LLM_BASE_URL)
+        
+        result = client.complete_sync(
+            messages or build_messages(cycle_data, signals, macro_data, prompt_mode),
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens_for(prompt_mode),
+            ledger=ledger,
+            mode=prompt_mode
+        )
+        
+        content = result.text
+        if cache is not None and content:
+            cache.put(cache_key, content, model=model)
+        
+        return content, None
+        
+    except TokenBudgetError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"API调用失败: {str(e)}"
+
+
+def stream_strategy_llm(cycle_data, signals, macro_data, api_key, model=LLM_MODEL,
+                        temperature=LLM_TEMPERATURE, prompt_mode=DEFAULT_PROMPT_MODE, ledger=None, messages=None):
+    """流式调用OpenAI API，逐段产出策略解读文本"""
+    client = shared_client(api_key, base_url=LLM_BASE_URL)
+    yield from client.stream_sync(
+        messages or build_messages(cycle_data, signals, macro_data, prompt_mode),
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens_for(prompt_mode),
+        ledger=ledger,
+        mode=prompt_mode
+    )
+
+
+# 周期分析报告的增量计算图：每个阶段登记读取的输入字段与上游阶段，重跑时只计算失效的阶段
+ANALYSIS_GRAPH = StageGraph()
+
+# 各阶段的显示名称（同时决定统计表中的顺序）
+STAGE_LABELS = {
+    'cycles': '周期定位',
+    'signals': '资产信号',
+    'gantt': '时序图',
+    'metrics': '监测指标',
+    'report': '报告',
+    'horizon': '叠加展望',
+    'llm_prompt': 'AI提示词',
+}
+
+
+def split_fields(inputs):
+    """将阶段拿到的扁平字段拆回 (params, macro_data)，只保留实际登记的字段"""
+    params = {field: inputs[field] for field in DEFAULT_PARAMS if field in inputs}
+    macro_data = {field: inputs[field] for field in DEFAULT_MACRO if field in inputs}
+    return params, macro_data
+
+
+@ANALYSIS_GRAPH.stage('cycles', fields=(*CYCLE_INPUTS, 'cycle_mode'), extra_key=current_month_key, cutoff=True)
+@profiled('stage.cycles')
+def cycles_stage(inputs):
+    return calculate_cycles(*split_fields(inputs), mode=inputs['cycle_mode'])
+
+
+@ANALYSIS_GRAPH.stage('signals', fields=SIGNAL_INPUTS, deps=('cycles',), cutoff=True)
+@profiled('stage.signals')
+def signals_stage(inputs, cycles):
+    params, macro_data = split_fields(inputs)
+    return calculate_asset_signals(cycles, macro_data, params)
+
+
+@ANALYSIS_GRAPH.stage('gantt', deps=('cycles', 'signals'), extra_key=current_month_key)
+@profiled('stage.gantt')
+def gantt_stage(inputs, cycles, signals):
+    # traces 模式只缓存图表数据：Figure 可变，渲染时逐次新建
+    if GANTT_MODE == 'traces':
+        return gantt_chart_data(cycles, signals)
+    return create_gantt_spec(cycles, signals)
+
+
+@ANALYSIS_GRAPH.stage('metrics', fields=[m for m, _, _ in METRIC_ROWS if m != 'cycle_position'], deps=('cycles',))
+@profiled('stage.metrics')
+def metrics_stage(inputs, cycles):
+    return create_metrics_table(cycles, inputs)
+
+
+@ANALYSIS_GRAPH.stage('report', fields=REPORT_INPUTS, deps=('cycles', 'signals'))
+@profiled('stage.report')
+def report_stage(inputs, cycles, signals):
+    # 只缓存正文：生成时间在每次渲染下载按钮时填入，输入不变时也不会沿用首次计算的时间
+    return report_body(cycles, signals, inputs)
+
+
+@ANALYSIS_GRAPH.stage(
+    'horizon',
+    fields=tuple(sorted({*CYCLES, *SIGNAL_INPUTS, 'cycle_mode', 'horizon_years'})),
+    extra_key=current_month_key
+)
+@profiled('stage.horizon')
+def horizon_stage(inputs):
+    """多周期叠加展望：整段展望期一次算出各周期波形、综合得分与逐月资产信号"""
+    params, macro_data = split_fields(inputs)
+    result = superpose(params, horizon=int(inputs['horizon_years']) * 12)
+    path = signal_path(result, {**params, **macro_data}, mode=inputs['cycle_mode'])
+    figure = horizon_figure(
+        month_labels(result['month_index']),
+        {CYCLE_NAMES[field]: result['wave'][i] for i, field in enumerate(CYCLES)},
+        result['composite'],
+        result['composite_regime'],
+        REGIMES,
+        {ASSET_LABELS[key]: path[key]['signal_code'] for key in ASSET_LABELS},
+    )
+    return {
+        'figure': figure,
+        'frame': composite_frame(result),
+        'outlook': signal_outlook(path, result['month_index']),
+    }
+
+
+@ANALYSIS_GRAPH.stage('llm_prompt', fields=(*DEFAULT_MACRO, 'prompt_mode'), deps=('cycles', 'signals'))
+@profiled('stage.llm_prompt')
+def llm_prompt_stage(inputs, cycles, signals):
+    """AI解读的提示词与缓存键"""
+    _, macro_data = split_fields(inputs)
+    mode = inputs['prompt_mode']
+    return {
+        'cache_key': strategy_cache_key(cycles, signals, macro_data, LLM_MODEL, LLM_TEMPERATURE, cache_variant(mode)),
+        'messages': build_messages(cycles, signals, macro_data, mode),
+    }
+
+
+def render_horizon_section(pipeline_state, analysis_inputs):
+    """多周期叠加展望：展望期可调，整段展望按输入增量计算，并给出各类资产的信号变化展望"""
+    st.subheader("🌊 多周期叠加展望")
+    horizon_years = st.slider(
+        "展望期（年）", min_value=1, max_value=50, value=10, key='horizon_years',
+        help="库存、朱格拉、人口三周期逐月定位后按权重叠加；下方色带为各类资产的逐月信号"
+    )
+    horizon = ANALYSIS_GRAPH.run(
+        pipeline_state, {**analysis_inputs, 'horizon_years': horizon_years}, targets=('horizon',)
+    )['horizon']
+    
+    with stage('render.horizon'):
+        now = horizon['frame'].iloc[0]
+        st.caption(
+            f"当前综合得分 {now['composite']:+.2f}（{now['regime']}）· 同步度 {now['coherence']:.0%} · "
+            + " · ".join(f"{CYCLE_NAMES[field]} {now[f'{field}_position']:.0%}（{now[f'{field}_regime']}）" for field in CYCLES)
+            + f" · 信号按{CYCLE_MODES[analysis_inputs['cycle_mode']]}定位"
+        )
+        st.plotly_chart(horizon['figure'], use_container_width=True)
+        
+        outlook = horizon['outlook']
+        st.dataframe(
+            pd.DataFrame({
+                '资产类别': [ASSET_LABELS[key] for key in outlook.index],
+                '当前信号': outlook['signal'].map(SIGNAL_EMOJI).to_numpy(),
+                '下次变化': outlook['next_month'].replace('', '展望期内不变').to_numpy(),
+                '变为': outlook['next_signal'].map(SIGNAL_EMOJI).fillna('').to_numpy(),
+                '绿灯占比': (outlook['green'] * 100).round(0).astype(int).astype(str).add('%').to_numpy(),
+                '红灯占比': (outlook['red'] * 100).round(0).astype(int).astype(str).add('%').to_numpy(),
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+        st.download_button(
+            "📥 下载逐月叠加数据（CSV）",
+            horizon['frame'].to_csv(index=False).encode('utf-8-sig'),
+            file_name=f"recycle_horizon_{horizon_years}y.csv",
+            mime="text/csv"
+        )
+
+
+def get_pipeline_state():
+    """当前会话的增量计算状态"""
+    if 'pipeline_state' not in st.session_state:
+        st.session_state.pipeline_state = PipelineState(get_result_store(), current_session_id())
+    return st.session_state.pipeline_state
+
+
+def render_pipeline_stats():
+    """侧边栏展示本轮重跑中各阶段是执行还是复用，以及会话内的累计次数"""
+    state = get_pipeline_state()
+    with st.sidebar.expander("♻️ 增量计算", expanded=False):
+        if not state.last_run:
+            st.caption("本轮未运行周期分析")
+        else:
+            ran = sum(run.status == 'ran' for run in state.last_run)
+            st.caption(f"本轮执行 {ran} 个阶段，复用 {len(state.last_run) - ran} 个")
+        runs = {run.name: run for run in state.last_run}
+        totals = state.stats()
+        rows = []
+        for name, label in STAGE_LABELS.items():
+            if name not in runs and name not in totals:
+                continue
+            run = runs.get(name)
+            total = totals.get(name, {'ran': 0, 'reused': 0})
+            rows.append({
+                '阶段': label,
+                '本轮': '—' if run is None else ('⚙️ 执行' if run.status == 'ran' else '♻️ 复用'),
+                '原因': run.reason if run else '',
+                '耗时': f"{run.elapsed*1000:.1f}ms" if run and run.status == 'ran' else '',
+                '累计执行': total['ran'],
+                '累计复用': total['reused']
+            })
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+
+def render_profile_stats():
+    """调试面板：各阶段耗时的次数与分位数（进程内所有会话累计，仅在 RECYCLE_PROFILE 开启时显示）"""
+    if not profiler.enabled:
+        return
+    with st.sidebar.expander("⏱️ 阶段耗时", expanded=False):
+        snapshot = profiler.snapshot()
+        if not snapshot:
+            st.caption("暂无计时记录（整轮耗时在本轮结束后计入）")
+            return
+        def ms(seconds):
+            return f"{seconds*1000:.1f}"
+        
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    '阶段': name,
+                    '次数': s['count'],
+                    '均值ms': ms(s['mean']),
+                    'p50': ms(s['p50']),
+                    'p90': ms(s['p90']),
+                    'p99': ms(s['p99']),
+                    '最大': ms(s['max']),
+                    '累计ms': ms(s['total'])
+                }
+                for name, s in snapshot.items()
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+        prom_col, json_col = st.columns(2)
+        prom_col.download_button("Prometheus", profiler.to_prometheus(), file_name="recycle_profile.prom",
+                                 mime="text/plain", use_container_width=True)
+        json_col.download_button("JSON", profiler.to_json(), file_name="recycle_profile.json",
+                                 mime="application/json", use_container_width=True)
+        if st.button("清空计时", key='profile_reset', use_container_width=True):
+            profiler.reset()
+            st.rerun()
+
+
+def render_memory_stats():
+    """侧边栏展示共享结果存储的总体积、本会话占用（分摊后）与各会话的引用情况"""
+    store = get_result_store()
+    with st.sidebar.expander("🗄️ 会话内存", expanded=False):
+        stats = store.stats()
+        own = store.session_stats(current_session_id()).get(current_session_id(), {'slots': 0, 'bytes': 0, 'share': 0})
+        state_bytes = sum(estimate_size(value) for value in st.session_state.to_dict().values())
+        st.caption(
+            f"共享存储 {stats['bytes'] / 2**20:.2f} / {stats['max_bytes'] / 2**20:.0f} MB · "
+            f"{stats['entries']} 条结果 · {stats['sessions']} 个会话 · "
+            f"共享节省 {stats['shared_saved'] / 2**20:.2f} MB"
+        )
+        st.caption(
+            f"本会话：会话状态 {state_bytes / 1024:.1f} KB，引用 {own['slots']} 条结果 "
+            f"{own['bytes'] / 1024:.1f} KB（分摊 {own['share'] / 1024:.1f} KB）"
+        )
+        if stats['evictions'] or stats['sessions_evicted']:
+            st.caption(f"已淘汰 {stats['evictions']} 条结果，回收 {stats['sessions_evicted']} 个会话")
+        sessions = sorted(store.session_stats().items(), key=lambda item: -item[1]['share'])[:10]
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    '会话': name[:8] + (' (本会话)' if name == current_session_id() else ''),
+                    '结果': s['slots'],
+                    '引用KB': round(s['bytes'] / 1024, 1),
+                    '分摊KB': round(s['share'] / 1024, 1),
+                    '空闲': f"{s['idle'] / 60:.0f}分钟"
+                }
+                for name, s in sessions
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+def render_memo_stats():
+    """侧边栏展示计算缓存命中统计（进程内所有会话共享）"""
+    with st.sidebar.expander("🧮 计算缓存统计", expanded=False):
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    '阶段': name,
+                    '命中': s['hits'],
+                    '未命中': s['misses'],
+                    '命中率': f"{s['hit_rate']*100:.0f}%",
+                    '条目': f"{s['size']}/{s['maxsize']}"
+                }
+                for name, s in memo_stats().items()
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+def render_token_stats():
+    """侧边栏展示今日 token 用量、预算与各提示词模式的平均用量"""
+    ledger = get_token_ledger()
+    with st.sidebar.expander("🔢 Token 用量", expanded=False):
+        used = ledger.used_today()
+        if ledger.daily_budget:
+            st.progress(min(used / ledger.daily_budget, 1.0), text=f"今日 {used:,} / {ledger.daily_budget:,} tokens")
+        else:
+            st.caption(f"今日已用 {used:,} tokens（未设每日预算）")
+        
+        usage = ledger.frame()
+        if usage.empty:
+            st.caption("暂无调用记录")
+            return
+        summary = usage_by_mode(usage)
+        st.dataframe(
+            pd.DataFrame({
+                '模式': [PROMPT_MODE_LABELS.get(mode, mode) for mode in summary.index],
+                '调用': summary['calls'].to_numpy(),
+                '提示词': summary['prompt_tokens'].round(0).to_numpy(),
+                '回复': summary['completion_tokens'].round(0).to_numpy(),
+                '平均耗时': [f"{v:.1f}s" for v in summary['latency_mean']]
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+        savings = savings_report(usage)
+        if savings:
+            st.caption(
+                f"精简模式节省：tokens {savings['total_tokens'][2]*100:.0f}%，"
+                f"平均耗时 {savings['latency_mean'][2]*100:.0f}%"
+            )
 
 
 def main():
     """主应用函数"""
-    # 初始化会话状态
-    initialize_session_state()
-    
-    # 恢复上次保存的参数
-    last_params = st.session_state.last_params
+    # 初始化会话状态，恢复上次保存的参数
+    last_params = initialize_session_state()
+    pipeline_state = get_pipeline_state()
+    pipeline_state.begin_rerun()
     
     # 侧边栏布局（30%宽度）
-    with st.sidebar:
+    with st.sidebar, stage('sidebar'):
         st.markdown('<div class="main-title">🏠 RE-Cycle Pro<br>房地产周期驾驶舱</div>', unsafe_allow_html=True)
         
         # 数据源选择
@@ -672,9 +1191,39 @@ def main():
             key='data_source'
         )
         
+        # 宏观数据默认值：手动模式取上次参数，自动模式取抓取结果
+        macro_defaults = last_params
+        source_key = 'manual'
+        
         if data_source == "自动抓取":
-            st.info("🔄 自动抓取功能开发中，敬请期待！")
-            data_source = "手动输入"
+            source_key = 'auto'
+            if not get_data_sources()[0]:
+                st.info(f"🔌 未配置数据源：请设置环境变量 {SOURCES_ENV} 指向数据源配置文件，或手动输入")
+            else:
+                refresh = st.button("🔄 强制刷新数据", use_container_width=True)
+                fetched, observations, fetch_errors = load_auto_macro_data(force=refresh)
+                macro_defaults = {**last_params, **fetched}
+                
+                for error in fetch_errors:
+                    st.warning(f"⚠️ {error}")
+                
+                if observations:
+                    as_of = max(obs.as_of for obs in observations.values())
+                    cached = sum(obs.from_cache for obs in observations.values())
+                    sample = "（内置样例数据，非实时）" if any(obs.sample for obs in observations.values()) else ""
+                    st.caption(f"📅 数据截至 {as_of}{sample} · 共 {len(observations)} 项，其中 {cached} 项来自缓存")
+                else:
+                    st.info("🔄 未能抓取到数据，请手动输入")
+        
+        st.markdown("---")
+        
+        # 分析视图选择
+        st.subheader("🧭 分析视图")
+        view_mode = st.radio(
+            "选择分析视图：",
+            ["周期分析报告", "情景敏感性热力图", "蒙特卡洛模拟", "历史回测", "多城市分析"],
+            key='view_mode'
+        )
         
         st.markdown("---")
         
@@ -708,6 +1257,16 @@ def main():
             help="人口结构变化周期，通常为25-35年"
         )
         
+        cycle_modes = list(CYCLE_MODES)
+        cycle_mode = st.radio(
+            "周期定位口径",
+            cycle_modes,
+            index=cycle_modes.index(last_params.get('cycle_mode', 'inventory')),
+            format_func=CYCLE_MODES.get,
+            horizontal=True,
+            help="库存周期：只按库存周期定位；多周期叠加：库存、朱格拉、人口三周期按权重叠加后定位，周期相位与资产信号随之变化"
+        )
+        
         st.markdown("---")
         
         # 宏观数据输入
@@ -717,7 +1276,7 @@ def main():
             "M1M2剪刀差（%）",
             min_value=-20.0,
             max_value=10.0,
-            value=last_params['m1m2'],
+            value=macro_defaults['m1m2'],
             step=0.1,
             help="反映货币供应的宽松程度，M1增速-M2增速"
         )
@@ -726,7 +1285,7 @@ def main():
             "房地产投资增速（%）",
             min_value=-20.0,
             max_value=20.0,
-            value=last_params['investment'],
+            value=macro_defaults['investment'],
             step=0.1,
             help="房地产开发投资同比增速"
         )
@@ -735,7 +1294,7 @@ def main():
             "10年期国债收益率（%）",
             min_value=0.5,
             max_value=5.0,
-            value=last_params['bond_yield'],
+            value=macro_defaults['bond_yield'],
             step=0.01,
             help="无风险利率水平，影响房地产资产定价"
         )
@@ -744,7 +1303,7 @@ def main():
             "贷款利率（%）",
             min_value=2.0,
             max_value=8.0,
-            value=last_params['mortgage_rate'],
+            value=macro_defaults['mortgage_rate'],
             step=0.01,
             help="购房贷款利率，影响购买力"
         )
@@ -753,7 +1312,7 @@ def main():
             "LTV贷款价值比",
             min_value=0.3,
             max_value=0.9,
-            value=last_params['ltv'],
+            value=macro_defaults['ltv'],
             step=0.05,
             help="贷款成数，首付比例的反面"
         )
@@ -762,7 +1321,7 @@ def main():
             "租售比（%）",
             min_value=1.5,
             max_value=4.0,
-            value=last_params['rent_yield'],
+            value=macro_defaults['rent_yield'],
             step=0.1,
             help="年租金/房价，衡量房产投资回报"
         )
@@ -782,16 +1341,14 @@ def main():
         # 生成报告按钮
         st.markdown("<br>", unsafe_allow_html=True)
         generate_btn = st.button("📊 生成周期分析报告", use_container_width=True)
-    
-    # 主区域布局（70%宽度）
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
+
     # 收集参数
     params = {
         'inventory': inventory,
         'juglar': juglar,
         'population': population,
-        'data_source': 'manual'
+        'data_source': source_key,
+        'cycle_mode': cycle_mode
     }
     
     macro_data = {
@@ -804,17 +1361,33 @@ def main():
     }
     
     # 验证输入
-    errors = validate_inputs(params, macro_data)
+    with stage('validation'):
+        errors = validate_inputs(params, macro_data)
     
     if errors:
         for error in errors:
             st.error(f"⚠️ 数据异常: {error}")
     
+    # 上次生成报告的输入快照（只读取一次：分开判断与读取时，其间可能被其他会话触发的回收释放）
+    analysis = None if generate_btn else session_result('analysis')
+    
     # 计算逻辑
-    if generate_btn or st.session_state.analysis_result is not None:
+    if view_mode == "情景敏感性热力图":
+        render_sensitivity_view(params, macro_data)
+    
+    elif view_mode == "蒙特卡洛模拟":
+        render_monte_carlo_view(params, macro_data)
+    
+    elif view_mode == "历史回测":
+        render_backtest_view(params)
+    
+    elif view_mode == "多城市分析":
+        render_regions_view(params)
+    
+    elif generate_btn or analysis is not None:
         if generate_btn:
-            # 保存参数到会话状态
-            st.session_state.last_params = {
+            # 保存参数（共享结果存储，会话只记录键）
+            hold_result('last_params', {
                 'inventory': inventory,
                 'juglar': juglar,
                 'population': population,
@@ -824,68 +1397,52 @@ def main():
                 'mortgage_rate': mortgage_rate,
                 'ltv': ltv,
                 'rent_yield': rent_yield,
-                'data_source': 'manual'
-            }
-            
-            # 显示加载状态
-            with st.spinner("正在计算周期位置..."):
-                cycle_data = calculate_cycles(params, macro_data)
-            
-            with st.spinner("正在分析资产配置..."):
-                signals = calculate_asset_signals(cycle_data, macro_data, params)
+                'data_source': source_key,
+                'cycle_mode': cycle_mode
+            })
             
-            # 保存结果
-            st.session_state.analysis_result = {
-                'cycle_data': cycle_data,
-                'signals': signals,
+            # 保存本次分析的输入快照
+            result = hold_result('analysis', {
                 'params': params,
                 'macro_data': macro_data
-            }
+            })
         else:
-            # 恢复上次结果
-            result = st.session_state.analysis_result
-            cycle_data = result['cycle_data']
-            signals = result['signals']
+            result = analysis
         
-        # 顶部：三底时间线卡片
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">🏛️ 政策底</div>
-                <div class="metric-value">{cycle_data['policy_bottom']}</div>
-                <div class="metric-subtitle">货币政策转向信号</div>
-            </div>
-            """, unsafe_allow_html=True)
+        # 按上次生成报告时的输入增量计算：只有读取了变化字段的阶段会重算，其余沿用上次结果
+        macro_data = result['macro_data']
+        analysis_inputs = {**result['params'], **macro_data}
+        with st.spinner("正在计算周期位置与资产配置..."), stage('pipeline'):
+            results = ANALYSIS_GRAPH.run(
+                pipeline_state, analysis_inputs, targets=('cycles', 'signals', 'gantt', 'metrics', 'report')
+            )
+        cycle_data = results['cycles']
+        signals = results['signals']
         
-        with col2:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">💳 信用底</div>
-                <div class="metric-value">{cycle_data['credit_bottom']}</div>
-                <div class="metric-subtitle">信贷宽松传导到位</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">🏠 市场底</div>
-                <div class="metric-value">{cycle_data['market_bottom']}</div>
-                <div class="metric-subtitle">成交量企稳回升</div>
-            </div>
-            """, unsafe_allow_html=True)
+        # 顶部：三底时间线卡片（一次发送整组卡片数据，浏览器端渲染）
+        card_grid([
+            metric_card("🏛️ 政策底", cycle_data['policy_bottom'], "货币政策转向信号"),
+            metric_card("💳 信用底", cycle_data['credit_bottom'], "信贷宽松传导到位"),
+            metric_card("🏠 市场底", cycle_data['market_bottom'], "成交量企稳回升")
+        ], columns=3, key='bottom_cards')
         
         st.markdown("<br>", unsafe_allow_html=True)
         
         # 当前周期相位
-        st.info(f"📍 **{cycle_data['current_phase']}**")
+        phase_note = "（多周期叠加定位）" if analysis_inputs.get('cycle_mode') == 'composite' else ""
+        st.info(f"📍 **{cycle_data['current_phase']}**{phase_note}")
         
         st.markdown("<br>", unsafe_allow_html=True)
         
         # 中部：Plotly甘特图
-        with st.spinner("正在渲染资产配置时序图..."):
-            gantt_fig = create_gantt_chart(cycle_data, signals)
-            st.plotly_chart(gantt_fig, use_container_width=True)
+        with stage('render.gantt'):
+            gantt = results['gantt']
+            st.plotly_chart(create_gantt_chart(gantt) if GANTT_MODE == 'traces' else gantt, use_container_width=True)
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # 多周期叠加展望：三周期波形、综合得分与逐月资产信号
+        render_horizon_section(pipeline_state, analysis_inputs)
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -896,64 +1453,41 @@ def main():
         with left_col:
             st.subheader("🚦 资产配置信号灯")
             
-            signal_cols = st.columns(2)
             signal_items = [
-                ('tier1_res', '一二线核心区住宅', '一二线住宅'),
-                ('tier1_com', '一二线商业地产', '一二线商业'),
-                ('tier2_res', '二线住宅', '二线住宅'),
-                ('tier2_com', '二线商业', '二线商业'),
-                ('tier34_res', '三四线住宅', '三四线住宅'),
-                ('tier34_com', '三四线商业', '三四线商业')
+                ('tier1_res', '一二线住宅'),
+                ('tier1_com', '一二线商业'),
+                ('tier2_res', '二线住宅'),
+                ('tier2_com', '二线商业'),
+                ('tier34_res', '三四线住宅'),
+                ('tier34_com', '三四线商业')
             ]
             
-            emoji_map = {
-                'green': '🟢',
-                'yellow': '🟡',
-                'red': '🔴'
-            }
-            
-            confidence_colors = {
-                'green': '#10b981',
-                'yellow': '#f59e0b',
-                'red': '#ef4444'
-            }
-            
-            for i, (key, name, short_name) in enumerate(signal_items):
-                col = signal_cols[i % 2]
-                signal = signals.get(key, {'signal': 'red', 'action': '未知', 'confidence': 0.5})
-                
-                with col:
-                    st.markdown(f"""
-                    <div class="signal-card">
-                        <div class="signal-emoji">{emoji_map.get(signal['signal'], '🔴')}</div>
-                        <div class="signal-name">{short_name}</div>
-                        <div class="signal-action">{signal['action']}</div>
-                        <div class="signal-confidence">置信度 {signal['confidence']*100:.0f}%</div>
-                        <div class="confidence-bar">
-                            <div class="confidence-fill" style="width: {signal['confidence']*100}%; background-color: {confidence_colors.get(signal['signal'], '#ef4444')};"></div>
-                        </div>
-                    </div>
-                    <br>
-                    """, unsafe_allow_html=True)
+            default_signal = {'signal': 'red', 'action': '未知', 'confidence': 0.5}
+            card_grid(
+                [signal_card(short_name, signals.get(key, default_signal)) for key, short_name in signal_items],
+                columns=2,
+                key='signal_cards'
+            )
         
         # 右列：关键监测指标表格
         with right_col:
             st.subheader("📋 关键监测指标")
             
-            metrics_df = create_metrics_table(cycle_data, macro_data, signals)
+            metrics_df = results['metrics']
             
             # 显示表格
-            st.dataframe(
-                metrics_df,
-                hide_index=True,
-                use_container_width=True,
-                column_config={
-                    '指标': st.column_config.TextColumn('指标', width='medium'),
-                    '当前值': st.column_config.TextColumn('当前值', width='small'),
-                    '底部阈值': st.column_config.TextColumn('底部阈值', width='small'),
-                    '状态': st.column_config.TextColumn('状态', width='medium')
-                }
-            )
+            with stage('render.metrics'):
+                st.dataframe(
+                    metrics_df,
+                    hide_index=True,
+                    use_container_width=True,
+                    column_config={
+                        '指标': st.column_config.TextColumn('指标', width='medium'),
+                        '当前值': st.column_config.TextColumn('当前值', width='small'),
+                        '底部阈值': st.column_config.TextColumn('底部阈值', width='small'),
+                        '状态': st.column_config.TextColumn('状态', width='medium')
+                    }
+                )
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -968,31 +1502,77 @@ def main():
             </div>
             """, unsafe_allow_html=True)
             
-            if 'llm_result' not in st.session_state:
-                st.session_state.llm_result = None
+            llm_cache = get_llm_cache()
+            ledger = get_token_ledger()
+            prompt_mode = st.radio(
+                "提示词模式",
+                PROMPT_MODES,
+                index=PROMPT_MODES.index(DEFAULT_PROMPT_MODE),
+                format_func=PROMPT_MODE_LABELS.get,
+                horizontal=True,
+                key='llm_prompt_mode',
+                help="精简JSON模式以紧凑结构传入数据，提示词与回复上限更小，延迟和费用更低"
+            )
+            
+            # 检查参数是否变化（稳定摘要，同时作为持久化缓存的键）
+            llm_prompt = ANALYSIS_GRAPH.run(
+                pipeline_state, {**analysis_inputs, 'prompt_mode': prompt_mode}, targets=('llm_prompt',)
+            )['llm_prompt']
+            current_hash = llm_prompt['cache_key']
+            # 解读文本存放在共享结果存储中，相同情景的会话共用一份
+            llm_key = f"llm:{current_hash}"
             
-            if 'llm_params_hash' not in st.session_state:
-                st.session_state.llm_params_hash = None
+            # 其他分析师或重启前已生成过相同情景的解读时直接展示
+            if session_result_key('llm') != llm_key:
+                cached = get_result_store().get(llm_key) or llm_cache.get(current_hash)
+                if cached is not None:
+                    hold_result('llm', cached, key=llm_key)
+                    st.caption("⚡ 相同情景的解读已缓存，无需重新调用API")
             
-            # 检查参数是否变化
-            current_hash = hash(json.dumps({'cycle': cycle_data, 'signals': signals, 'macro': macro_data}, sort_keys=True))
+            stream_mode = st.toggle("⚡ 流式输出", value=True, key='llm_stream', help="边生成边显示，无需等待完整回复")
             
             if st.button("🎯 生成深度解读"):
-                with st.spinner("正在调用AI生成策略解读..."):
-                    llm_result, error = generate_strategy_llm(cycle_data, signals, macro_data, api_key)
-                    
-                    if error:
-                        st.error(f"❌ {error}")
+                if stream_mode and llm_cache.get(current_hash) is None:
+                    if not api_key and not fake_llm.is_enabled():
+                        st.error("❌ 请先在侧边栏输入OpenAI API Key")
                     else:
-                        st.session_state.llm_result = llm_result
-                        st.session_state.llm_params_hash = current_hash
-                        st.rerun()
+                        # 逐段渲染到展开器中，完成后再写入会话与缓存
+                        try:
+                            with stage('llm.stream'):
+                                llm_result = st.write_stream(
+                                    stream_strategy_llm(cycle_data, signals, macro_data, api_key,
+                                                        prompt_mode=prompt_mode, ledger=ledger,
+                                                        messages=llm_prompt['messages'])
+                                )
+                        except TokenBudgetError as e:
+                            st.error(f"❌ {str(e)}")
+                        except Exception as e:
+                            st.error(f"❌ API调用失败: {str(e)}")
+                        else:
+                            if llm_result:
+                                llm_cache.put(current_hash, llm_result, model=LLM_MODEL)
+                                hold_result('llm', llm_result, key=llm_key)
+                                st.rerun()
+                else:
+                    with st.spinner("正在调用AI生成策略解读..."):
+                        llm_result, error = generate_strategy_llm(
+                            cycle_data, signals, macro_data, api_key,
+                            prompt_mode=prompt_mode, cache=llm_cache, ledger=ledger,
+                            messages=llm_prompt['messages']
+                        )
+                        
+                        if error:
+                            st.error(f"❌ {error}")
+                        else:
+                            hold_result('llm', llm_result, key=llm_key)
+                            st.rerun()
             
             # 显示结果（如果参数未变化）
-            if st.session_state.llm_result and st.session_state.llm_params_hash == current_hash:
-                st.markdown(st.session_state.llm_result)
+            held_key, llm_result = session_result_item('llm')
+            if llm_result and held_key == llm_key:
+                st.markdown(llm_result)
             
-            elif st.session_state.llm_result and st.session_state.llm_params_hash != current_hash:
+            elif llm_result:
                 st.info("📊 参数已变化，请点击「生成深度解读」获取最新策略")
         
         st.markdown("<br>", unsafe_allow_html=True)
@@ -1000,48 +1580,9 @@ def main():
         # 导出报告功能
         st.subheader("📄 报告导出")
         
-        report_content = f"""
-# RE-Cycle Pro 房地产周期分析报告
-生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## 一、周期定位
-
-| 周期类型 | 时间 | 说明 |
-|---------|------|------|
-| 政策底 | {cycle_data['policy_bottom']} | 货币政策转向信号 |
-| 信用底 | {cycle_data['credit_bottom']} | 信贷宽松传导到位 |
-| 市场底 | {cycle_data['market_bottom']} | 成交量企稳回升 |
-
-**当前周期相位**：{cycle_data['current_phase']}
-
-## 二、宏观指标
-
-| 指标 | 当前值 | 健康区间 | 状态 |
-|------|--------|---------|------|
-| M1M2剪刀差 | {macro_data['m1m2']}% | >-5% | {'🟢 宽货币' if macro_data['m1m2'] > -5 else ('🟡 边际改善' if macro_data['m1m2'] > -10 else '🔴 紧货币')} |
-| 投资增速 | {macro_data['investment']}% | >-5% | {'🟢 企稳' if macro_data['investment'] > -5 else ('🟡 降幅收窄' if macro_data['investment'] > -12 else '🔴 持续下滑')} |
-| 国债收益率 | {macro_data['bond_yield']}% | <2.5% | {'🟢 宽松' if macro_data['bond_yield'] < 2.5 else ('🟡 中性' if macro_data['bond_yield'] < 3.5 else '🔴 压力')} |
-| 贷款利率 | {macro_data['mortgage_rate']}% | <4% | {'🟢 友好' if macro_data['mortgage_rate'] < 4 else ('🟡 适中' if macro_data['mortgage_rate'] < 5 else '🔴 偏高')} |
-| LTV贷款比 | {macro_data['ltv']} | >0.7 | {'🟢 空间' if macro_data['ltv'] > 0.7 else ('🟡 适度' if macro_data['ltv'] > 0.5 else '🔴 限制')} |
-
-## 三、资产配置信号
-
-| 资产类别 | 信号 | 操作建议 | 置信度 |
-|---------|------|---------|--------|
-| 一二线核心区住宅 | {emoji_map.get(signals['tier1_res']['signal'], '🔴')} | {signals['tier1_res']['action']} | {signals['tier1_res']['confidence']*100:.0f}% |
-| 一二线商业地产 | {emoji_map.get(signals['tier1_com']['signal'], '🔴')} | {signals['tier1_com']['action']} | {signals['tier1_com']['confidence']*100:.0f}% |
-| 二线住宅 | {emoji_map.get(signals['tier2_res']['signal'], '🔴')} | {signals['tier2_res']['action']} | {signals['tier2_res']['confidence']*100:.0f}% |
-| 二线商业 | {emoji_map.get(signals['tier2_com']['signal'], '🔴')} | {signals['tier2_com']['action']} | {signals['tier2_com']['confidence']*100:.0f}% |
-| 三四线住宅 | {emoji_map.get(signals['tier34_res']['signal'], '🔴')} | {signals['tier34_res']['action']} | {signals['tier34_res']['confidence']*100:.0f}% |
-| 三四线商业 | {emoji_map.get(signals['tier34_com']['signal'], '🔴')} | {signals['tier34_com']['action']} | {signals['tier34_com']['confidence']*100:.0f}% |
-
----
-*报告由 RE-Cycle Pro 自动生成*
-"""
-        
         st.download_button(
             label="📥 下载PDF报告",
-            data=report_content,
+            data=stamp_report(results['report']),
             file_name=f"RE_Cycle_Report_{datetime.now().strftime('%Y%m%d')}.md",
             mime="text/markdown",
             use_container_width=True
@@ -1072,38 +1613,20 @@ def main():
         # 显示默认的周期说明
         st.subheader("📚 周期理论说明")
         
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-label">📦 库存周期</div>
-                <div style="color: #e2e8f0; font-size: 13px; line-height: 1.6;">
-                    2-5年，去化库存的周期，反映市场供需关系变化
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-label">⚙️ 朱格拉周期</div>
-                <div style="color: #e2e8f0; font-size: 13px; line-height: 1.6;">
-                    7-12年，设备投资周期，影响经济整体活跃度
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div class="metric-card">
-                <div class="metric-label">👥 人口周期</div>
-                <div style="color: #e2e8f0; font-size: 13px; line-height: 1.6;">
-                    25-35年，人口结构周期，长期决定房地产需求
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+        card_grid([
+            info_card("📦 库存周期", "2-5年，去化库存的周期，反映市场供需关系变化"),
+            info_card("⚙️ 朱格拉周期", "7-12年，设备投资周期，影响经济整体活跃度"),
+            info_card("👥 人口周期", "25-35年，人口结构周期，长期决定房地产需求")
+        ], columns=3, key='theory_cards')
+    
+    render_memo_stats()
+    render_memory_stats()
+    render_token_stats()
+    render_pipeline_stats()
+    render_profile_stats()
 
 
 if __name__ == "__main__":
-    main()
+    # 整轮重跑计时（RECYCLE_PROFILE 未开启时为空操作）
+    with profiler.run():
+        main()
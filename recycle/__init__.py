@@ -0,0 +1,34 @@
+"""
+RE-Cycle Pro 分析内核
+与 Streamlit 界面解耦的计算模块，可被脚本、批处理任务直接导入。
+
+顶层只加载纯标准库的 recycle.core；依赖 NumPy / pandas / OpenAI 的子模块（batch、grid、
+regions、llm_client 等）在首次访问 recycle.<子模块> 时才导入。
+"""
+
+import importlib
+
+from .core import (
+    ASSET_LABELS,
+    DEFAULT_MACRO,
+    DEFAULT_PARAMS,
+    analyze,
+    build_markdown_report,
+    calculate_asset_signals,
+    calculate_cycles,
+    split_inputs,
+    validate_inputs,
+)
+from .results import AssetSignal, AssetSignals, CycleResult, Phase, SignalColor
+
+
+def __getattr__(name):
+    # 延迟导入子模块：recycle.batch 等在首次访问时才加载其重量级依赖
+    try:
+        module = importlib.import_module(f'.{name}', __name__)
+    except ModuleNotFoundError as e:
+        if e.name != f'{__name__}.{name}':
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = module
+    return module
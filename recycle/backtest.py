@@ -0,0 +1,134 @@
+"""
+历史回测引擎
+读取月度宏观序列（CSV/Parquet，含六项宏观指标与周期参数，可按城市分组），以每行的月份作为
+as-of 日期整表向量化回放周期与信号模型，输出信号历史表，并与其后实际价格走势对比计算命中率。
+必需字段缺失（如多个指标日期不一致时外连接产生的空值）的行不回放；未来涨跌幅按自然月对齐。
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .batch import ASSET_KEYS, REQUIRED_COLUMNS, SIGNAL_COLORS, evaluate_scenarios, valid_rows
+
+
+# 分组列（可选），缺省视为单一地区
+REGION_COLUMN = 'region'
+
+# 价格列：优先使用 <资产>_price，否则所有资产共用 price_index
+PRICE_COLUMN = 'price_index'
+
+DEFAULT_HORIZON = 12
+DEFAULT_BAND = 0.02
+
+
+def load_macro_series(source):
+    """读取月度宏观序列，支持 CSV 与 Parquet（文件路径或上传的文件对象）"""
+    name = getattr(source, 'name', str(source))
+    if Path(name).suffix.lower() in ('.parquet', '.pq'):
+        frame = pd.read_parquet(source)
+    else:
+        frame = pd.read_csv(source)
+    if 'date' not in frame.columns:
+        raise ValueError("宏观序列缺少 date 列")
+    frame['date'] = pd.to_datetime(frame['date']).dt.to_period('M').dt.to_timestamp()
+    return frame
+
+
+def month_index(dates):
+    """以 2026 年为基准的月份序号（与 calculate_cycles 中的口径一致）"""
+    dates = pd.DatetimeIndex(dates)
+    return (dates.month + (dates.year - 2026) * 12).to_numpy()
+
+
+def replay(frame, defaults=None):
+    """
+    将整张月度序列回放到周期/信号模型
+
+    缺少的周期参数列取 defaults 中的值；必需字段缺失或无效的行不回放（见 batch.valid_rows）。
+    返回的信号历史表保留输入的行索引，包含 date、region（如有）及 evaluate_scenarios 的全部输出列。
+    """
+    defaults = defaults or {}
+    for field in REQUIRED_COLUMNS:
+        if field not in frame.columns and field not in defaults:
+            raise KeyError(f"宏观序列缺少字段且无默认值: {field}")
+    # 缺失值在规则表中会落入 "<" 一侧的分支（例如租售比为空时判为红灯），必须先剔除
+    frame = frame[valid_rows(frame)]
+    scenarios = {
+        field: frame[field].to_numpy(dtype=np.float64) if field in frame.columns else float(defaults[field])
+        for field in REQUIRED_COLUMNS
+    }
+
+    result = evaluate_scenarios(scenarios, month_index=month_index(frame['date']))
+    result.index = frame.index
+
+    keys = [c for c in ('date', REGION_COLUMN) if c in frame.columns]
+    return pd.concat([frame[keys], result], axis=1)
+
+
+def forward_returns(frame, horizon=DEFAULT_HORIZON):
+    """
+    按地区计算各资产未来 horizon 个自然月的价格涨跌幅
+
+    按 (地区, 月份) 查找 horizon 个月后的价格，序列缺月或同月有多行时不会错位；
+    无价格数据的资产、或 horizon 个月后没有价格的月份为 NaN。
+    """
+    months = pd.PeriodIndex(frame['date'], freq='M')
+    regions = frame[REGION_COLUMN].fillna('') if REGION_COLUMN in frame.columns else np.full(len(frame), '')
+    current = pd.MultiIndex.from_arrays([regions, months])
+    target = pd.MultiIndex.from_arrays([regions, months + horizon])
+
+    returns = {}
+    for key in ASSET_KEYS:
+        column = f'{key}_price' if f'{key}_price' in frame.columns else PRICE_COLUMN
+        if column not in frame.columns:
+            returns[key] = np.full(len(frame), np.nan)
+            continue
+        price = frame[column].to_numpy(dtype=np.float64)
+        # 每个 (地区, 月份) 取最后一个有效价格
+        lookup = pd.Series(price, index=current).dropna()
+        lookup = lookup[~lookup.index.duplicated(keep='last')]
+        returns[key] = lookup.reindex(target).to_numpy() / price - 1
+    return pd.DataFrame(returns, index=frame.index)
+
+
+def hit_rate_stats(history, returns, band=DEFAULT_BAND):
+    """
+    计算信号命中率
+
+    绿灯：未来涨幅 > band 为命中；红灯：未来跌幅 < -band 为命中；黄灯：涨跌幅在 ±band 内为命中。
+    没有未来价格的月份不计入。返回 资产 × 信号 的统计表。
+    """
+    rows = []
+    for key in ASSET_KEYS:
+        ret = returns[key].to_numpy(dtype=np.float64)
+        code = history[f'{key}_signal'].cat.codes.to_numpy()
+        valid = ~np.isnan(ret)
+        green, yellow, red = (SIGNAL_COLORS.index(c) for c in ('green', 'yellow', 'red'))
+        hits = np.select(
+            [code == green, code == red, code == yellow],
+            [ret > band, ret < -band, np.abs(ret) <= band],
+            default=False
+        )
+        for i, color in enumerate(SIGNAL_COLORS):
+            mask = valid & (code == i)
+            n = int(mask.sum())
+            rows.append({
+                'asset': key,
+                'signal': color,
+                'months': n,
+                'hit_rate': float(hits[mask].mean()) if n else np.nan,
+                'mean_forward_return': float(ret[mask].mean()) if n else np.nan,
+            })
+    return pd.DataFrame(rows)
+
+
+def run_backtest(frame, defaults=None, horizon=DEFAULT_HORIZON, band=DEFAULT_BAND):
+    """回放整张序列并统计命中率，返回 (信号历史表, 命中率统计表, 因必需字段缺失而剔除的行数)"""
+    history = replay(frame, defaults)
+    # 未来价格按整张序列查找：被剔除的行仍可提供价格
+    returns = forward_returns(frame, horizon).loc[history.index]
+    for key in ASSET_KEYS:
+        history[f'{key}_forward_return'] = returns[key]
+    return history, hit_rate_stats(history, returns, band), len(frame) - len(history)
@@ -0,0 +1,337 @@
+"""
+批量情景引擎
+将 calculate_cycles / calculate_asset_signals 的规则表判定改写为 NumPy 向量运算（searchsorted 查表），
+一次性评估整张参数网格（库存周期 × M1M2 × 投资增速 × LTV × 贷款利率 × 租售比 ...），
+结果与逐条调用标量函数完全一致。
+结果以列式存储（ResultBatch：编码数组，每条情景 26 字节）保存，按需展开为 DataFrame 或逐条的类型化结果。
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .core import CYCLE_NAMES
+from .results import ASSET_KEYS, SIGNAL_RESULTS, AssetSignal, AssetSignals, CycleResult, Phase, SignalColor
+from .rules import RULES
+
+
+# 信号颜色编码（与 SignalColor 一致）
+SIGNAL_COLORS = tuple(color.label for color in SignalColor)
+
+# 周期相位与三底季度表（顺序即规则表中的结果编码）
+PHASES = tuple(RULES.cycles['phase'].outcomes)
+POLICY_QUARTERS = tuple(RULES.cycles['policy_bottom'].outcomes)
+CREDIT_QUARTERS = tuple(RULES.cycles['credit_bottom'].outcomes)
+MARKET_QUARTERS = tuple(RULES.cycles['market_bottom'].outcomes)
+
+# 每类资产各分支的结果：(信号, 操作建议, 置信度)，顺序即规则表中的结果编码
+SIGNAL_BRANCHES = {
+    key: tuple((o['signal'], o['action'], o['confidence']) for o in RULES.signals[key].outcomes)
+    for key in ASSET_KEYS
+}
+
+# 批量评估所需的输入列
+REQUIRED_COLUMNS = ('inventory', 'population', 'm1m2', 'investment', 'mortgage_rate', 'ltv', 'rent_yield')
+
+
+def _branch_tables(key):
+    """返回某类资产各分支的 (颜色编码, 操作建议, 置信度) 查找表"""
+    branches = SIGNAL_BRANCHES[key]
+    colors = np.array([SIGNAL_COLORS.index(b[0]) for b in branches], dtype=np.int8)
+    actions = [b[1] for b in branches]
+    confidences = np.array([b[2] for b in branches], dtype=np.float64)
+    return colors, actions, confidences
+
+
+_BRANCH_TABLES = {key: _branch_tables(key) for key in ASSET_KEYS}
+
+# 所有资产的操作建议合并为一张类别表，便于生成 Categorical 列
+ACTIONS = tuple(dict.fromkeys(b[1] for key in ASSET_KEYS for b in SIGNAL_BRANCHES[key]))
+
+
+def _as_columns(scenarios, columns):
+    """将 DataFrame 或列字典转换为同形状的 float64 数组，标量自动广播"""
+    missing = [c for c in columns if c not in scenarios]
+    if missing:
+        raise KeyError(f"情景数据缺少字段: {', '.join(missing)}")
+    arrays = [np.asarray(scenarios[c], dtype=np.float64) for c in columns]
+    return dict(zip(columns, np.broadcast_arrays(*arrays)))
+
+
+def current_month_index(now=None):
+    """以 2026 年为基准的月份序号，与 calculate_cycles 中的口径一致"""
+    now = now or datetime.now()
+    return now.month + (now.year - 2026) * 12
+
+
+def calculate_cycles_batch(scenarios, now=None, month_index=None):
+    """批量计算周期位置、相位和三底季度，返回编码数组字典（month_index 优先于 now）"""
+    cols = _as_columns(scenarios, ('inventory', 'm1m2', 'investment', 'mortgage_rate', 'ltv'))
+    inventory = cols['inventory']
+    inventory_months = inventory * 12
+    if month_index is None:
+        month_index = current_month_index(now)
+    cycle_position = np.mod(month_index, inventory_months) / inventory_months
+
+    # 相位与三底季度：按规则表断点二分定位后查决策网格
+    values = {**cols, 'cycle_position': cycle_position}
+    rules = RULES.cycles
+    phase = rules['phase'].codes(values)
+    policy = rules['policy_bottom'].codes(values)
+    credit = rules['credit_bottom'].codes(values)
+    market = rules['market_bottom'].codes(values)
+
+    return {
+        'cycle_position': cycle_position,
+        'inventory_months': inventory_months,
+        'phase_code': phase,
+        'policy_code': policy,
+        'credit_code': credit,
+        'market_code': market,
+    }
+
+
+def calculate_asset_signals_batch(cycle_position, scenarios):
+    """批量计算6类资产信号，返回每类资产的分支编码、颜色编码与置信度"""
+    cols = _as_columns(scenarios, ('rent_yield', 'population'))
+    rent_yield, population, pos = np.broadcast_arrays(
+        cols['rent_yield'], cols['population'], np.asarray(cycle_position, dtype=np.float64)
+    )
+
+    values = {'rent_yield': rent_yield, 'population': population, 'cycle_position': pos}
+    branches = {key: np.broadcast_to(RULES.signals[key].codes(values), pos.shape) for key in ASSET_KEYS}
+
+    result = {}
+    for key in ASSET_KEYS:
+        colors, _, confidences = _BRANCH_TABLES[key]
+        branch = branches[key]
+        result[key] = {
+            'branch': branch,
+            'signal_code': colors[branch],
+            'confidence': confidences[branch],
+        }
+    return result
+
+
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=list(categories))
+
+
+def _category_codes(values, categories, field):
+    """字符串或 Categorical 列转为 int8 编码，出现类别表以外的值时报错"""
+    codes = pd.Categorical(values, categories=list(categories)).codes
+    if (codes < 0).any():
+        raise ValueError(f"{field} 含有规则表以外的取值")
+    return codes.astype(np.int8)
+
+
+# 分支编码的反查表：颜色编码 × 操作建议编码 → 分支编码（-1 为不存在的组合）
+_ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+_BRANCH_LOOKUP = {}
+for _key in ASSET_KEYS:
+    _lookup = np.full(len(SIGNAL_COLORS) * len(ACTIONS), -1, dtype=np.int8)
+    for _branch, (_signal, _action, _) in reversed(list(enumerate(SIGNAL_BRANCHES[_key]))):
+        _lookup[SIGNAL_COLORS.index(_signal) * len(ACTIONS) + _ACTION_INDEX[_action]] = _branch
+    _BRANCH_LOOKUP[_key] = _lookup
+
+# 每类资产各分支的操作建议编码（ACTIONS 中的下标）
+_ACTION_CODES = {
+    key: np.array([_ACTION_INDEX[action] for action in _BRANCH_TABLES[key][1]], dtype=np.int8)
+    for key in ASSET_KEYS
+}
+
+
+class ResultBatch:
+    """
+    批量结果的列式存储（structure of arrays）
+
+    周期位置与库存周期月数为 float64 数组，相位与三底季度为 int8 编码（PHASES 等类别表中的下标），
+    六类资产的规则分支编码为 (6, n) 的 int8 矩阵（按资产连续存放）；信号颜色、操作建议与置信度按分支编码查表得到，
+    不逐条保存。逐条读取时返回 CycleResult 与共享的 AssetSignal 对象。
+    """
+
+    __slots__ = ('cycle_position', 'inventory_months', 'phase_code', 'policy_code', 'credit_code', 'market_code',
+                 'branch')
+
+    def __init__(self, cycle_position, inventory_months, phase_code, policy_code, credit_code, market_code, branch):
+        self.cycle_position = cycle_position
+        self.inventory_months = inventory_months
+        self.phase_code = phase_code
+        self.policy_code = policy_code
+        self.credit_code = credit_code
+        self.market_code = market_code
+        self.branch = branch
+
+    @classmethod
+    def from_arrays(cls, cycles, signals):
+        """由 calculate_cycles_batch / calculate_asset_signals_batch 的结果构造（展平为一维）"""
+        def flat(values, dtype):
+            return np.ascontiguousarray(np.ravel(values), dtype=dtype)
+
+        shape = np.shape(cycles['cycle_position'])
+        return cls(
+            flat(cycles['cycle_position'], np.float64),
+            flat(np.broadcast_to(cycles['inventory_months'], shape), np.float64),
+            flat(cycles['phase_code'], np.int8),
+            flat(cycles['policy_code'], np.int8),
+            flat(cycles['credit_code'], np.int8),
+            flat(cycles['market_code'], np.int8),
+            np.stack([np.ravel(np.broadcast_to(signals[key]['branch'], shape)) for key in ASSET_KEYS]).astype(np.int8),
+        )
+
+    def __len__(self):
+        return len(self.cycle_position)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def signal_codes(self, key):
+        """某类资产的信号颜色编码数组（SIGNAL_COLORS 中的下标）"""
+        return _BRANCH_TABLES[key][0][self.branch[ASSET_KEYS.index(key)]]
+
+    def confidence(self, key):
+        return _BRANCH_TABLES[key][2][self.branch[ASSET_KEYS.index(key)]]
+
+    def cycle(self, i):
+        return CycleResult(
+            Phase(int(self.phase_code[i])),
+            POLICY_QUARTERS[self.policy_code[i]],
+            CREDIT_QUARTERS[self.credit_code[i]],
+            MARKET_QUARTERS[self.market_code[i]],
+            float(self.cycle_position[i]),
+            float(self.inventory_months[i]),
+        )
+
+    def signals(self, i):
+        return AssetSignals(*(SIGNAL_RESULTS[key][code] for key, code in zip(ASSET_KEYS, self.branch[:, i].tolist())))
+
+    def __getitem__(self, i):
+        """第 i 条情景的 (CycleResult, AssetSignals)"""
+        return self.cycle(i), self.signals(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def from_results(cls, results):
+        """由逐条的 (cycle_data, signals) 构造，接受类型化结果或同结构的字典"""
+        results = list(results)
+        cycles = [CycleResult.from_dict(cycle) for cycle, _ in results]
+        frame = pd.DataFrame({
+            field: [cycle[field] for cycle in cycles] for field in CycleResult.FIELDS
+        })
+        for key in ASSET_KEYS:
+            frame[f'{key}_signal'] = [AssetSignal.from_dict(signals[key]).signal for _, signals in results]
+            frame[f'{key}_action'] = [signals[key]['action'] for _, signals in results]
+        return cls.from_frame(frame)
+
+    def to_frame(self, index=None):
+        """
+        展开为 evaluate_scenarios 格式的 DataFrame
+
+        输出列：cycle_position、inventory_months、current_phase、policy_bottom、credit_bottom、
+        market_bottom，以及每类资产的 <key>_signal / <key>_action / <key>_confidence（类别列为 Categorical）。
+        """
+        out = {
+            'cycle_position': self.cycle_position,
+            'inventory_months': self.inventory_months,
+            'current_phase': _categorical(self.phase_code, PHASES),
+            'policy_bottom': _categorical(self.policy_code, POLICY_QUARTERS),
+            'credit_bottom': _categorical(self.credit_code, CREDIT_QUARTERS),
+            'market_bottom': _categorical(self.market_code, MARKET_QUARTERS),
+        }
+        for j, key in enumerate(ASSET_KEYS):
+            colors, _, confidences = _BRANCH_TABLES[key]
+            branch = self.branch[j]
+            out[f'{key}_signal'] = _categorical(colors[branch], SIGNAL_COLORS)
+            out[f'{key}_action'] = _categorical(_ACTION_CODES[key][branch], ACTIONS)
+            out[f'{key}_confidence'] = confidences[branch]
+        return pd.DataFrame(out, index=index)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        由 evaluate_scenarios 格式的 DataFrame 构造（类别列可为 Categorical 或字符串）
+
+        规则分支由信号颜色与操作建议反查，置信度按分支取规则表中的值。
+        """
+        branch = np.empty((len(ASSET_KEYS), len(frame)), dtype=np.int8)
+        for j, key in enumerate(ASSET_KEYS):
+            colors = _category_codes(frame[f'{key}_signal'], SIGNAL_COLORS, f'{key}_signal').astype(np.intp)
+            actions = _category_codes(frame[f'{key}_action'], ACTIONS, f'{key}_action').astype(np.intp)
+            branch[j] = _BRANCH_LOOKUP[key][colors * len(ACTIONS) + actions]
+            if (branch[j] < 0).any():
+                raise ValueError(f"{key} 的信号与操作建议组合不在规则表中")
+        return cls(
+            frame['cycle_position'].to_numpy(dtype=np.float64),
+            frame['inventory_months'].to_numpy(dtype=np.float64),
+            _category_codes(frame['current_phase'], PHASES, 'current_phase'),
+            _category_codes(frame['policy_bottom'], POLICY_QUARTERS, 'policy_bottom'),
+            _category_codes(frame['credit_bottom'], CREDIT_QUARTERS, 'credit_bottom'),
+            _category_codes(frame['market_bottom'], MARKET_QUARTERS, 'market_bottom'),
+            branch,
+        )
+
+
+def valid_rows(scenarios):
+    """
+    各行输入能否参与评估：已有的必需字段须为有限数值，周期长度须为正数
+
+    scenarios 同 evaluate_scenarios；缺少的必需列不检查（由调用方以默认值补齐），返回展平的布尔数组。
+    """
+    present = [c for c in REQUIRED_COLUMNS if c in scenarios]
+    if not present:
+        return np.ones(len(scenarios) if isinstance(scenarios, pd.DataFrame) else 1, dtype=bool)
+    cols = _as_columns(scenarios, present)
+    mask = np.ones(np.shape(cols[present[0]]), dtype=bool)
+    for field, values in cols.items():
+        valid = np.isfinite(values)
+        if field in CYCLE_NAMES:
+            valid &= values > 0
+        mask &= valid
+    return np.ravel(mask)
+
+
+def evaluate_batch(scenarios, now=None, month_index=None):
+    """
+    批量评估情景表，返回列式存储的 ResultBatch（输入要求同 evaluate_scenarios）
+
+    缺失值与非正的周期长度在规则表中会落入任意一侧的分支，因此含无效行时直接报错，
+    调用方须先用 valid_rows 过滤。
+    """
+    cols = _as_columns(scenarios, REQUIRED_COLUMNS)
+    invalid = int(np.count_nonzero(~valid_rows(cols)))
+    if invalid:
+        raise ValueError(f"情景数据含 {invalid} 行无效输入（缺失、非有限数值或周期长度不为正），请先用 valid_rows 过滤")
+    cycles = calculate_cycles_batch(cols, now=now, month_index=month_index)
+    signals = calculate_asset_signals_batch(cycles['cycle_position'], cols)
+    return ResultBatch.from_arrays(cycles, signals)
+
+
+def evaluate_scenarios(scenarios, now=None, month_index=None):
+    """
+    批量评估情景表，返回与输入逐行对应的 DataFrame
+
+    scenarios 可以是 DataFrame 或 {字段: 数组/标量} 字典，需包含 REQUIRED_COLUMNS，且各行须通过 valid_rows。
+    输出列：cycle_position、inventory_months、current_phase、policy_bottom、credit_bottom、
+    market_bottom，以及每类资产的 <key>_signal / <key>_action / <key>_confidence。
+    """
+    index = scenarios.index if isinstance(scenarios, pd.DataFrame) else None
+    return evaluate_batch(scenarios, now=now, month_index=month_index).to_frame(index)
+
+
+def row_to_results(row):
+    """将 evaluate_scenarios 的一行还原为标量接口的 (CycleResult, AssetSignals)"""
+    cycle_data = CycleResult.from_dict(row)
+    signals = AssetSignals(*(
+        AssetSignal.from_dict({
+            'signal': row[f'{key}_signal'],
+            'action': row[f'{key}_action'],
+            'confidence': float(row[f'{key}_confidence']),
+        })
+        for key in ASSET_KEYS
+    ))
+    return cycle_data, signals
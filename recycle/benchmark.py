@@ -0,0 +1,353 @@
+"""
+性能基准
+覆盖分析内核与界面渲染路径，结果与 JSON 基线比较，任一指标变慢超过阈值时以状态码 1 退出。
+
+    python -m recycle.benchmark --save                 # 运行全部套件并写入基线
+    python -m recycle.benchmark                        # 与基线比较（默认阈值 25%）
+    python -m recycle.benchmark --suite micro scaling --threshold 0.1
+
+套件：
+    micro    单函数耗时：周期定位（含多周期叠加口径）、资产信号、报告拼接、50 年叠加展望与信号路径、
+             监测指标表、甘特图（单轨迹与逐资产轨迹）
+    scaling  批量规模曲线：batch.evaluate_scenarios 从 1 到 --max-size 条情景，标量逐条计算到 10^4 条
+    rerun    无界面重跑：以 Streamlit AppTest 运行 app.py（欢迎页、首次生成报告、报告页重跑）
+
+指标均为秒（越小越好）：micro / scaling 取多轮中的最小单次耗时，rerun 取多次重跑的中位数。
+运行时数据库、缓存与本地时序库指向临时目录，不影响实际使用的数据。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from . import core, superposition
+
+
+SUITES = ('micro', 'scaling', 'rerun')
+
+DEFAULT_BASELINE = Path('benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.25
+
+DEFAULT_MAX_SIZE = 10 ** 6
+SCALAR_MAX_SIZE = 10 ** 4
+
+# 固定评估日期，保证各次运行的计算路径一致
+AS_OF = datetime(2026, 9, 1)
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+
+GENERATE_LABEL = '生成周期分析报告'
+
+
+def best_of(func, repeat=5, min_time=0.02):
+    """单次调用的最小耗时（秒）：每轮至少运行 min_time 秒，取 repeat 轮中最快的一轮"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def _isolate_environment(workdir):
+    """运行时数据库、缓存与本地时序库指向临时目录（须在导入相关模块前调用）"""
+    workdir = Path(workdir)
+    os.environ.update(
+        RECYCLE_STORE_DIR=str(workdir / 'store'),
+        RECYCLE_CACHE_DIR=str(workdir / 'cache'),
+        RECYCLE_LLM_CACHE=str(workdir / 'llm_cache.sqlite3'),
+        RECYCLE_TOKEN_LEDGER=str(workdir / 'token_ledger.sqlite3'),
+    )
+
+
+def _quiet_streamlit():
+    """屏蔽裸模式与 AppTest 运行时的 Streamlit 警告日志"""
+    # 配置项 logger.level 在首次读取配置时会重设日志级别，环境变量与直接设置都需要
+    os.environ['STREAMLIT_LOGGER_LEVEL'] = 'error'
+    import streamlit.logger
+
+    streamlit.logger.set_log_level('error')
+
+
+def _load_app():
+    """以裸模式导入 app.py（不执行 main），取其中的图表与表格函数"""
+    import importlib.util
+
+    _quiet_streamlit()
+    spec = importlib.util.spec_from_file_location('recycle_app', APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_micro(repeat=5, log=print):
+    params, macro_data = dict(core.DEFAULT_PARAMS), dict(core.DEFAULT_MACRO)
+    cycle_data = core.calculate_cycles(params, macro_data, AS_OF)
+    signals = core.calculate_asset_signals(cycle_data, macro_data, params)
+    horizon = superposition.superpose(params, horizon=600, now=AS_OF)
+
+    cases = {
+        'calculate_cycles': lambda: core.calculate_cycles(params, macro_data, AS_OF),
+        'calculate_asset_signals': lambda: core.calculate_asset_signals(cycle_data, macro_data, params),
+        'build_markdown_report': lambda: core.build_markdown_report(cycle_data, signals, macro_data, AS_OF),
+        'calculate_cycles.composite': lambda: core.calculate_cycles(params, macro_data, AS_OF, mode='composite'),
+        'superpose.600m': lambda: superposition.superpose(params, horizon=600, now=AS_OF),
+        'signal_path.600m': lambda: superposition.signal_path(horizon, {**params, **macro_data}),
+    }
+
+    app = _load_app()
+    # 记忆化函数测未命中时的计算本身（uncached），另测一次命中开销
+    cases.update({
+        'create_metrics_table': lambda: app.create_metrics_table.uncached(cycle_data, macro_data),
+        'create_metrics_table.cached': lambda: app.create_metrics_table(cycle_data, macro_data),
+        'create_gantt_spec': lambda: app.create_gantt_spec.uncached(cycle_data, signals),
+        'create_gantt_chart': lambda: app.create_gantt_chart(app.gantt_chart_data.uncached(cycle_data, signals)),
+    })
+
+    results = {}
+    for name, func in cases.items():
+        results[f'micro.{name}'] = seconds = best_of(func, repeat)
+        log(f'  {name:<30} {seconds * 1e6:>12.1f} µs')
+    return results
+
+
+def scenario_frame(n, seed=0):
+    """n 条随机情景（取值覆盖各输入的合理范围）"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'inventory': rng.choice([3.0, 3.5, 4.0, 4.5], n),
+        'population': rng.choice([26.0, 30.0, 34.0], n),
+        'm1m2': rng.uniform(-20, 10, n),
+        'investment': rng.uniform(-20, 20, n),
+        'bond_yield': rng.uniform(0.5, 5.0, n),
+        'mortgage_rate': rng.uniform(2.0, 8.0, n),
+        'ltv': rng.uniform(0.3, 0.9, n),
+        'rent_yield': rng.uniform(1.0, 5.0, n),
+    })
+
+
+def _sizes(max_size):
+    sizes, n = [], 1
+    while n <= max_size:
+        sizes.append(n)
+        n *= 10
+    return sizes
+
+
+def run_scaling(max_size=DEFAULT_MAX_SIZE, repeat=5, log=print):
+    from .batch import current_month_index, evaluate_scenarios
+
+    month_index = current_month_index(AS_OF)
+    frame = scenario_frame(max_size)
+    results = {}
+    for n in _sizes(max_size):
+        chunk = frame.iloc[:n].copy()
+        seconds = best_of(lambda: evaluate_scenarios(chunk, month_index=month_index), repeat if n < 10 ** 5 else 3)
+        results[f'scaling.batch.n={n}'] = seconds
+        log(f'  batch  n={n:<9} {seconds * 1000:>10.2f} ms  {seconds / n * 1e6:>8.3f} µs/条')
+
+    records = frame.iloc[:min(max_size, SCALAR_MAX_SIZE)].to_dict('records')
+    split = [core.split_inputs(record) for record in records]
+    for n in _sizes(len(split)):
+        def scalar(rows=split[:n]):
+            for params, macro_data in rows:
+                cycle_data = core.calculate_cycles(params, macro_data, AS_OF)
+                core.calculate_asset_signals(cycle_data, macro_data, params)
+        seconds = best_of(scalar, repeat if n < 10 ** 3 else 3)
+        results[f'scaling.scalar.n={n}'] = seconds
+        log(f'  scalar n={n:<9} {seconds * 1000:>10.2f} ms  {seconds / n * 1e6:>8.3f} µs/条')
+    return results
+
+
+def run_rerun(reruns=10, log=print):
+    from streamlit.testing.v1 import AppTest
+
+    from .memo import MEMO_REGISTRY
+
+    # 清空进程内计算缓存，首次生成报告按冷启动计时
+    for memo in MEMO_REGISTRY.values():
+        memo.clear()
+    _quiet_streamlit()
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+
+    def timed(action):
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f'app.py 运行出错: {at.exception[0].value}')
+        return elapsed
+
+    results = {'rerun.welcome': timed(at.run)}
+    button = next(b for b in at.button if GENERATE_LABEL in b.label)
+    results['rerun.report_first'] = timed(lambda: button.click().run())
+    results['rerun.report_warm'] = statistics.median(timed(at.run) for _ in range(reruns))
+    for name, seconds in results.items():
+        log(f'  {name[6:]:<30} {seconds * 1000:>10.1f} ms')
+    return results
+
+
+def run_suites(suites=SUITES, max_size=DEFAULT_MAX_SIZE, repeat=5, reruns=10, log=print):
+    """运行指定套件，返回 {指标名: 秒}"""
+    results = {}
+    for suite in suites:
+        log(f'[{suite}]')
+        if suite == 'micro':
+            results.update(run_micro(repeat, log))
+        elif suite == 'scaling':
+            results.update(run_scaling(max_size, repeat, log))
+        elif suite == 'rerun':
+            results.update(run_rerun(reruns, log))
+        else:
+            raise ValueError(f'未知的基准套件: {suite}')
+    return results
+
+
+def environment_info():
+    import numpy as np
+    import pandas as pd
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, metrics, merge_with=None):
+    """写入基线；只运行了部分套件时保留基线中其余指标"""
+    data = {'environment': environment_info(), 'metrics': {**(merge_with or {}), **metrics}}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(metrics, baseline, threshold=DEFAULT_THRESHOLD):
+    """逐项与基线比较，返回 [(指标, 基线, 当前, 变化比例, 状态)]；状态为 regressed / improved / ok / new"""
+    rows = []
+    for name, current in metrics.items():
+        base = baseline.get(name)
+        if not base:
+            rows.append((name, None, current, None, 'new'))
+            continue
+        change = current / base - 1
+        if change > threshold:
+            status = 'regressed'
+        elif change < -threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((name, base, current, change, status))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return '—'
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f} µs'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds:.3f} s'
+
+
+def format_comparison(rows):
+    marks = {'regressed': '✗ 变慢', 'improved': '✓ 变快', 'ok': '  持平', 'new': '  新增'}
+    width = max(len(row[0]) for row in rows)
+    lines = []
+    for name, base, current, change, status in rows:
+        delta = '' if change is None else f'{change * 100:+.1f}%'
+        lines.append(
+            f'{name:<{width}}  {_format_seconds(base):>12}  {_format_seconds(current):>12}  {delta:>8}  {marks[status]}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='RE-Cycle Pro 性能基准')
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='JSON 基线文件')
+    parser.add_argument('--save', action='store_true', help='以本次结果更新基线（不做比较）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='允许的变慢比例，默认 0.25')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE, help='批量规模曲线的最大情景数')
+    parser.add_argument('--repeat', type=int, default=5, help='micro / scaling 每项的测量轮数')
+    parser.add_argument('--reruns', type=int, default=10, help='报告页重跑次数')
+    parser.add_argument('--no-confirm', dest='confirm', action='store_false',
+                        help='不复测：默认对出现变慢的套件再运行一次，取两次中较快的结果，排除偶发抖动')
+    parser.add_argument('-o', '--output', default=None, help='本次结果另存为 JSON')
+    args = parser.parse_args(argv)
+
+    baseline_path = Path(args.baseline).resolve()
+    output_path = Path(args.output).resolve() if args.output else None
+    baseline = load_baseline(baseline_path) if baseline_path.exists() else None
+    with tempfile.TemporaryDirectory(prefix='recycle-bench-') as workdir:
+        _isolate_environment(workdir)
+        metrics = run_suites(args.suite, args.max_size, args.repeat, args.reruns)
+
+        if baseline and not args.save and args.confirm:
+            rows = compare(metrics, baseline['metrics'], args.threshold)
+            suites = [suite for suite in args.suite if any(
+                row[4] == 'regressed' and row[0].startswith(f'{suite}.') for row in rows
+            )]
+            if suites:
+                print(f"\n复测变慢的套件：{', '.join(suites)}")
+                again = run_suites(suites, args.max_size, args.repeat, args.reruns)
+                metrics = {name: min(value, again.get(name, value)) for name, value in metrics.items()}
+
+    if output_path:
+        save_baseline(output_path, metrics)
+
+    if args.save:
+        save_baseline(baseline_path, metrics, merge_with=baseline and baseline['metrics'])
+        print(f'基线已写入 {baseline_path}（{len(metrics)} 项指标）')
+        return 0
+    if baseline is None:
+        print(f'未找到基线 {baseline_path}，请先以 --save 运行')
+        return 0
+
+    if baseline.get('environment', {}).get('platform') != platform.platform():
+        print(f"注意：基线记录于 {baseline['environment'].get('platform')}，与本机环境不同")
+    rows = compare(metrics, baseline['metrics'], args.threshold)
+    print()
+    print(format_comparison(rows))
+    regressed = [row[0] for row in rows if row[4] == 'regressed']
+    if regressed:
+        print(f'\n{len(regressed)} 项指标变慢超过 {args.threshold * 100:.0f}%: {", ".join(regressed)}')
+        return 1
+    print(f'\n全部 {len(rows)} 项指标在阈值 {args.threshold * 100:.0f}% 以内')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+卡片组件
+三底卡片、资产信号灯与说明卡片由一个自定义组件在浏览器端批量渲染：每组卡片每次重跑只发送
+一份紧凑的 JSON 数据，组件的 HTML / JS / CSS 是静态文件（recycle/frontend），由浏览器加载一次并缓存。
+全局样式表同样由组件注入页面 <head>，每个会话只传输一次，重跑时只发送一条空的挂载消息。
+
+设置 RECYCLE_CARDS_MODE=markdown 可回退为逐张卡片的 HTML Markdown 渲染（每次重跑随页面发送样式表）。
+"""
+
+import html
+import os
+from pathlib import Path
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from .core import SIGNAL_EMOJI, SIGNAL_HEX
+
+
+FRONTEND_DIR = Path(__file__).with_name('frontend')
+
+STYLESHEET = FRONTEND_DIR / 'styles.css'
+
+CARDS_MODE = os.environ.get('RECYCLE_CARDS_MODE', 'component')
+
+_component = components.declare_component('cards', path=str(FRONTEND_DIR))
+
+
+def metric_card(label, value, subtitle=''):
+    return {'kind': 'metric', 'label': label, 'value': value, 'subtitle': subtitle}
+
+
+def signal_card(name, signal):
+    return {
+        'kind': 'signal',
+        'name': name,
+        'signal': signal['signal'],
+        'action': signal['action'],
+        'confidence': round(float(signal['confidence']), 4),
+    }
+
+
+def info_card(label, text):
+    return {'kind': 'info', 'label': label, 'text': text}
+
+
+def _card_html(card):
+    """回退模式下单张卡片的 HTML（与组件渲染结果一致）"""
+    esc = {k: html.escape(str(v)) for k, v in card.items()}
+    if card['kind'] == 'signal':
+        color = SIGNAL_HEX.get(card['signal'], SIGNAL_HEX['red'])
+        return f"""
+        <div class="signal-card">
+            <div class="signal-emoji">{SIGNAL_EMOJI.get(card['signal'], '🔴')}</div>
+            <div class="signal-name">{esc['name']}</div>
+            <div class="signal-action">{esc['action']}</div>
+            <div class="signal-confidence">置信度 {card['confidence']*100:.0f}%</div>
+            <div class="confidence-bar">
+                <div class="confidence-fill" style="width: {card['confidence']*100}%; background-color: {color};"></div>
+            </div>
+        </div>
+        <br>
+        """
+    if card['kind'] == 'info':
+        return f"""
+        <div class="metric-card">
+            <div class="metric-label">{esc['label']}</div>
+            <div class="info-text">{esc['text']}</div>
+        </div>
+        """
+    return f"""
+    <div class="metric-card">
+        <div class="metric-label">{esc['label']}</div>
+        <div class="metric-value">{esc['value']}</div>
+        <div class="metric-subtitle">{esc['subtitle']}</div>
+    </div>
+    """
+
+
+def card_grid(cards, columns=3, key=None):
+    """渲染一组卡片（按 columns 列排布）"""
+    if CARDS_MODE == 'markdown':
+        cols = st.columns(columns)
+        for i, card in enumerate(cards):
+            with cols[i % columns]:
+                st.markdown(_card_html(card), unsafe_allow_html=True)
+        return
+    _component(cards=list(cards), columns=columns, key=key, default=None)
+
+
+def inject_styles():
+    """注入全局样式表（组件模式下每个会话只传输一次样式内容）"""
+    if CARDS_MODE == 'markdown':
+        st.markdown(f"<style>\n{STYLESHEET.read_text(encoding='utf-8')}</style>", unsafe_allow_html=True)
+        return
+    _component(cards=[], columns=0, styles=True, key='recycle_styles', default=None)
@@ -0,0 +1,175 @@
+"""
+命令行入口
+不依赖 Streamlit 完成周期定位、资产信号计算与报告导出，只使用标准库，适合定时任务调用。
+
+    python -m recycle params.json                      # 输出 JSON
+    python -m recycle scenarios.csv --format csv -o out.csv
+    python -m recycle --set m1m2=-6 --set inventory=3 --report report.md
+
+输入可以是 JSON（扁平字典、{"params", "macro_data"} 或二者的数组）或 CSV（每行一个情景，
+可带 region / scenario / name 标签列与 date 评估月份列）；缺少的字段取默认值。
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+from .core import (
+    ASSET_LABELS,
+    DEFAULT_MACRO,
+    DEFAULT_PARAMS,
+    analyze,
+    build_markdown_report,
+    split_inputs,
+    validate_inputs,
+)
+from .results import json_default
+
+
+LABEL_KEYS = ('region', 'scenario', 'name')
+
+CYCLE_FIELDS = ('current_phase', 'cycle_position', 'policy_bottom', 'credit_bottom', 'market_bottom')
+
+
+def _parse_date(value):
+    for fmt in ('%Y-%m', '%Y-%m-%d', '%Y/%m/%d', '%Y%m'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"无法识别的日期: {value}")
+
+
+def read_inputs(source, fmt=None):
+    """读取输入，返回记录列表（每条为原始字典）"""
+    if source == '-':
+        text = sys.stdin.read()
+        fmt = fmt or ('json' if text.lstrip()[:1] in '[{' else 'csv')
+    else:
+        with open(source, encoding='utf-8-sig') as f:
+            text = f.read()
+        fmt = fmt or ('csv' if source.lower().endswith('.csv') else 'json')
+
+    if fmt == 'csv':
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    data = json.loads(text)
+    return data if isinstance(data, list) else [data]
+
+
+def _unanalyzed(params, macro_data, errors):
+    return {'params': params, 'macro_data': macro_data, 'errors': errors, 'cycle_data': None, 'signals': None}
+
+
+def run(records, overrides=None, as_of=None):
+    """逐条分析，返回结果列表（附带标签与评估月份）"""
+    results = []
+    for record in records:
+        values = {**record, **(overrides or {})}
+        try:
+            row_as_of = _parse_date(str(values['date'])) if values.get('date') else as_of
+            params, macro_data = split_inputs(values)
+        except ValueError as e:
+            # 日期或数值无法解析：该行不分析，错误由 errors / --strict 统一报告
+            row_as_of = as_of
+            result = _unanalyzed({}, {}, [f"输入无法解析: {e}"])
+        else:
+            try:
+                result = analyze(params, macro_data, as_of=row_as_of)
+            except ValueError:
+                # 周期长度无效，无法定位：只输出校验错误
+                result = _unanalyzed(params, macro_data, validate_inputs(params, macro_data))
+        label = next((str(values[key]) for key in LABEL_KEYS if values.get(key)), None)
+        if label is not None:
+            result['label'] = label
+        result['as_of'] = (row_as_of or datetime.now()).strftime('%Y-%m')
+        results.append(result)
+    return results
+
+
+def to_rows(results):
+    """展开为扁平的表格行"""
+    rows = []
+    for result in results:
+        row = {'label': result.get('label', ''), 'as_of': result['as_of']}
+        # 无法解析的行没有输入值，按默认字段补空列，保持各行列一致
+        row.update({field: result['params'].get(field, '') for field in DEFAULT_PARAMS})
+        row.update({field: result['macro_data'].get(field, '') for field in DEFAULT_MACRO})
+        cycle_data, signals = result['cycle_data'], result['signals']
+        row.update({field: cycle_data[field] if cycle_data else '' for field in CYCLE_FIELDS})
+        for key in ASSET_LABELS:
+            signal = signals[key] if signals else {'signal': '', 'action': '', 'confidence': ''}
+            row[f'{key}_signal'] = signal['signal']
+            row[f'{key}_action'] = signal['action']
+            row[f'{key}_confidence'] = signal['confidence']
+        row['errors'] = '；'.join(result['errors'])
+        rows.append(row)
+    return rows
+
+
+def format_results(results, fmt):
+    if fmt == 'markdown':
+        return '\n'.join(
+            (f"<!-- {result['label']} -->\n" if 'label' in result else '')
+            + build_markdown_report(result['cycle_data'], result['signals'], result['macro_data'])
+            for result in results
+            if result['cycle_data'] is not None
+        )
+    if fmt == 'csv':
+        rows = to_rows(results)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else ['label'])
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+    payload = results[0] if len(results) == 1 else results
+    return json.dumps(payload, ensure_ascii=False, indent=2, default=json_default)
+
+
+def _override(text):
+    field, _, value = text.partition('=')
+    if field not in DEFAULT_PARAMS and field not in DEFAULT_MACRO:
+        raise argparse.ArgumentTypeError(f"未知字段: {field}")
+    try:
+        return field, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"数值无效: {text}") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m recycle', description='RE-Cycle Pro 周期分析（命令行）')
+    parser.add_argument('input', nargs='?', help='参数文件（JSON / CSV，- 表示标准输入），缺省使用默认参数')
+    parser.add_argument('--input-format', choices=('json', 'csv'), default=None, help='缺省按扩展名判断')
+    parser.add_argument('--set', dest='overrides', action='append', type=_override, default=[],
+                        metavar='字段=值', help='覆盖输入字段，可重复')
+    parser.add_argument('--as-of', default=None, help='评估月份 YYYY-MM，缺省为当前月份')
+    parser.add_argument('--format', choices=('json', 'csv', 'markdown'), default='json')
+    parser.add_argument('-o', '--output', default=None, help='结果写入文件，缺省输出到标准输出')
+    parser.add_argument('--report', default=None, help='另存 Markdown 报告')
+    parser.add_argument('--strict', action='store_true', help='输入超出合理范围时以状态码 2 退出')
+    args = parser.parse_args(argv)
+
+    records = read_inputs(args.input, args.input_format) if args.input else [{}]
+    results = run(records, dict(args.overrides), _parse_date(args.as_of) if args.as_of else None)
+
+    text = format_results(results, args.format)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text if text.endswith('\n') else text + '\n')
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(format_results(results, 'markdown'))
+
+    invalid = [(result.get('label', i + 1), error) for i, result in enumerate(results) for error in result['errors']]
+    for label, error in invalid:
+        print(f"⚠️ 数据异常 [{label}]: {error}", file=sys.stderr)
+    return 2 if args.strict and invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+分析内核
+周期定位、资产信号、输入校验与 Markdown 报告的标量实现，只依赖标准库，
+导入耗时在毫秒级，供界面、命令行、HTTP 服务与定时任务共用。
+周期与信号返回不可变的类型化结果（CycleResult / AssetSignals），可按字典方式读取。
+"""
+
+import math
+from datetime import datetime
+
+from .results import ASSET_KEYS, SIGNAL_RESULTS, AssetSignals, CycleResult, Phase
+from .rules import RULES
+
+
+# 周期参数与宏观指标的默认值（与界面初始参数一致）
+DEFAULT_PARAMS = {
+    'inventory': 3.5,
+    'juglar': 10.0,
+    'population': 30.0,
+}
+
+DEFAULT_MACRO = {
+    'm1m2': -8.5,
+    'investment': -10.6,
+    'bond_yield': 1.91,
+    'mortgage_rate': 3.85,
+    'ltv': 0.7,
+    'rent_yield': 2.2,
+}
+
+# 六类资产的展示名称（顺序与界面、报告一致）
+ASSET_LABELS = {
+    'tier1_res': '一二线核心区住宅',
+    'tier1_com': '一二线商业地产',
+    'tier2_res': '二线住宅',
+    'tier2_com': '二线商业',
+    'tier34_res': '三四线住宅',
+    'tier34_com': '三四线商业',
+}
+
+SIGNAL_EMOJI = {'green': '🟢', 'yellow': '🟡', 'red': '🔴'}
+
+# 信号灯在图表、卡片中的色值
+SIGNAL_HEX = {'green': '#10b981', 'yellow': '#f59e0b', 'red': '#ef4444'}
+
+CYCLE_NAMES = {'inventory': '库存周期', 'juglar': '朱格拉周期', 'population': '人口周期'}
+
+# 多周期叠加时各周期的合成权重（周期越长，对房地产的影响越大）
+CYCLE_WEIGHTS = {'inventory': 0.25, 'juglar': 0.35, 'population': 0.4}
+
+# 周期定位口径：inventory 按库存周期定位，composite 按三周期叠加后的等效位置定位
+CYCLE_MODES = {'inventory': '库存周期', 'composite': '多周期叠加'}
+
+# 各计算函数读取的输入字段（周期位置由各周期长度与评估月份算出，其余取自规则表的判定维度），
+# 供增量计算判断哪些阶段需要重算
+CYCLE_INPUTS = tuple(sorted(RULES.fields('cycles') - {'cycle_position'} | set(CYCLE_WEIGHTS)))
+SIGNAL_INPUTS = tuple(sorted(RULES.fields('signals') - {'cycle_position'}))
+REPORT_INPUTS = ('m1m2', 'investment', 'bond_yield', 'mortgage_rate', 'ltv')
+
+
+def cycle_errors(params, fields=None):
+    """周期长度（年）须为有限正数，否则无法定位周期；返回各字段的错误信息（fields 缺省为全部周期）"""
+    errors = []
+    for field in fields or CYCLE_NAMES:
+        value = params[field]
+        if not (math.isfinite(value) and value > 0):
+            errors.append(f"{CYCLE_NAMES[field]}长度须为正数（年）: {value}")
+    return errors
+
+
+def check_cycles(params, fields=None):
+    """周期长度无效时抛出 ValueError（信息可直接展示给用户）"""
+    errors = cycle_errors(params, fields)
+    if errors:
+        raise ValueError('；'.join(errors))
+
+
+def composite_state(params, month, weights=None):
+    """
+    某月（以 2026 年为基准的月份序号）的多周期叠加状态，返回 (综合得分, 等效周期位置, 同步度)
+
+    各周期位置 p = (月份 mod 周期月数) / 周期月数，波形取 -sin(2πp)（位置 0.5~1 为正，与规则表中
+    复苏阶段的判定一致），综合得分为按权重归一的波形之和（-1 ~ 1）。等效位置取综合得分与同权重
+    正交分量 -cos(2πp) 的相角，只有一个周期时即为该周期的位置；同步度为二者合成的幅值（0 ~ 1）。
+    参与叠加的周期长度不是有限正数时抛出 ValueError（见 check_cycles）。
+    """
+    weights = weights or CYCLE_WEIGHTS
+    check_cycles(params, weights)
+    total = sum(weights.values())
+    score = quadrature = 0.0
+    for field, weight in weights.items():
+        period = params[field] * 12
+        angle = 2 * math.pi * (month % period) / period
+        score -= weight * math.sin(angle)
+        quadrature -= weight * math.cos(angle)
+    score /= total
+    quadrature /= total
+    position = (math.atan2(-score, -quadrature) / (2 * math.pi)) % 1.0
+    return score, (0.0 if position >= 1.0 else position), math.hypot(score, quadrature)
+
+
+def calculate_cycles(params, macro_data, as_of=None, mode='inventory'):
+    """
+    计算周期位置和三底时间戳（as_of 为评估日期，默认当前时间，用于历史回放）
+
+    mode 为周期定位口径（见 CYCLE_MODES）：composite 时周期位置取三周期叠加后的等效位置。
+    所用周期的长度不是有限正数时抛出 ValueError（见 check_cycles）。
+    """
+    check_cycles(params, ('inventory',))
+    inventory_months = params['inventory'] * 12
+    current_date = as_of or datetime.now()
+    current_month = current_date.month + (current_date.year - 2026) * 12
+    
+    if mode == 'composite':
+        _, cycle_position, _ = composite_state(params, current_month)
+    elif mode == 'inventory':
+        # 库存周期定位
+        cycle_position = (current_month % inventory_months) / inventory_months
+    else:
+        raise ValueError(f"未知的周期定位口径: {mode}")
+    
+    # 周期相位与三底时间戳按规则表判定（阈值见 rule_table.json）
+    values = {**params, **macro_data, 'cycle_position': cycle_position}
+    rules = RULES.cycles
+    
+    return CycleResult(
+        Phase(rules['phase'].code(values)),
+        rules['policy_bottom'].evaluate(values),
+        rules['credit_bottom'].evaluate(values),
+        rules['market_bottom'].evaluate(values),
+        cycle_position,
+        inventory_months,
+    )
+
+
+def calculate_asset_signals(cycle_data, macro_data, params):
+    """基于周期位置和宏观数据计算6类资产信号"""
+    values = {**params, **macro_data, 'cycle_position': cycle_data['cycle_position']}
+    # 各分支的信号对象不可变、进程内共享，按规则编码直接取用
+    return AssetSignals(*(SIGNAL_RESULTS[key][RULES.signals[key].code(values)] for key in ASSET_KEYS))
+
+
+def value_errors(params, macro_data):
+    """无法计算的输入：周期长度不是有限正数、宏观指标不是有限数值（validate_inputs 的一部分）"""
+    errors = cycle_errors(params)
+    errors.extend(f"{field} 不是有效数值: {value}" for field, value in macro_data.items() if not math.isfinite(value))
+    return errors
+
+
+def validate_inputs(params, macro_data):
+    """验证输入数据的有效性"""
+    errors = value_errors(params, macro_data)
+    
+    if macro_data['m1m2'] < -20 or macro_data['m1m2'] > 10:
+        errors.append("M1M2剪刀差超出合理范围（-20% ~ +10%）")
+    
+    if macro_data['investment'] < -20 or macro_data['investment'] > 20:
+        errors.append("房地产投资增速超出合理范围（-20% ~ +20%）")
+    
+    if macro_data['bond_yield'] < 0.5 or macro_data['bond_yield'] > 5.0:
+        errors.append("10年期国债收益率超出合理范围（0.5% ~ 5.0%）")
+    
+    if macro_data['mortgage_rate'] < 2.0 or macro_data['mortgage_rate'] > 8.0:
+        errors.append("贷款利率超出合理范围（2.0% ~ 8.0%）")
+    
+    if macro_data['ltv'] < 0.3 or macro_data['ltv'] > 0.9:
+        errors.append("LTV贷款价值比超出合理范围（0.3 ~ 0.9）")
+    
+    return errors
+
+
+def _threshold(metric):
+    return RULES.metric_meta[metric]['threshold']
+
+
+def _status(metric, value):
+    return RULES.metric_status(metric, value, labels='report_labels')
+
+
+def build_markdown_report(cycle_data, signals, macro_data, generated_at=None):
+    """生成 Markdown 格式的周期分析报告"""
+    return stamp_report(report_body(cycle_data, signals, macro_data), generated_at)
+
+
+def stamp_report(body, generated_at=None):
+    """为报告正文加上标题与生成时间（缓存正文时，在交付时调用）"""
+    generated_at = generated_at or datetime.now()
+    return f"""
+# RE-Cycle Pro 房地产周期分析报告
+生成时间：{generated_at.strftime('%Y-%m-%d %H:%M:%S')}
+
+{body}"""
+
+
+def report_body(cycle_data, signals, macro_data):
+    """报告正文（不含生成时间，内容只由输入决定，可缓存）"""
+    signal_rows = '\n'.join(
+        f"| {label} | {SIGNAL_EMOJI.get(signals[key]['signal'], '🔴')} | {signals[key]['action']} | "
+        f"{signals[key]['confidence']*100:.0f}% |"
+        for key, label in ASSET_LABELS.items()
+    )
+    return f"""## 一、周期定位
+
+| 周期类型 | 时间 | 说明 |
+|---------|------|------|
+| 政策底 | {cycle_data['policy_bottom']} | 货币政策转向信号 |
+| 信用底 | {cycle_data['credit_bottom']} | 信贷宽松传导到位 |
+| 市场底 | {cycle_data['market_bottom']} | 成交量企稳回升 |
+
+**当前周期相位**：{cycle_data['current_phase']}
+
+## 二、宏观指标
+
+| 指标 | 当前值 | 健康区间 | 状态 |
+|------|--------|---------|------|
+| M1M2剪刀差 | {macro_data['m1m2']}% | {_threshold('m1m2')} | {_status('m1m2', macro_data['m1m2'])} |
+| 投资增速 | {macro_data['investment']}% | {_threshold('investment')} | {_status('investment', macro_data['investment'])} |
+| 国债收益率 | {macro_data['bond_yield']}% | {_threshold('bond_yield')} | {_status('bond_yield', macro_data['bond_yield'])} |
+| 贷款利率 | {macro_data['mortgage_rate']}% | {_threshold('mortgage_rate')} | {_status('mortgage_rate', macro_data['mortgage_rate'])} |
+| LTV贷款比 | {macro_data['ltv']} | {_threshold('ltv')} | {_status('ltv', macro_data['ltv'])} |
+
+## 三、资产配置信号
+
+| 资产类别 | 信号 | 操作建议 | 置信度 |
+|---------|------|---------|--------|
+{signal_rows}
+
+---
+*报告由 RE-Cycle Pro 自动生成*
+"""
+
+
+def split_inputs(values):
+    """
+    将扁平的输入字典拆分为 (params, macro_data)，缺少的字段取默认值
+
+    也接受 {"params": {...}, "macro_data": {...}} 形式。None 与空字符串（如 CSV 中的空单元格）视为缺少；
+    其余无法转换为数值的取值抛出 ValueError。
+    """
+    if 'params' in values or 'macro_data' in values:
+        values = {**values.get('params', {}), **values.get('macro_data', {})}
+    values = {field: value for field, value in values.items() if not _is_blank(value)}
+    params = {field: float(values.get(field, default)) for field, default in DEFAULT_PARAMS.items()}
+    macro_data = {field: float(values.get(field, default)) for field, default in DEFAULT_MACRO.items()}
+    return params, macro_data
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def analyze(params, macro_data, as_of=None):
+    """一次完成校验、周期定位与资产信号计算"""
+    cycle_data = calculate_cycles(params, macro_data, as_of)
+    return {
+        'params': params,
+        'macro_data': macro_data,
+        'errors': validate_inputs(params, macro_data),
+        'cycle_data': cycle_data,
+        'signals': calculate_asset_signals(cycle_data, macro_data, params),
+    }
@@ -0,0 +1,227 @@
+"""
+宏观数据自动抓取
+可插拔的数据源接口：每个数据源声明可提供的指标并实现 fetch；多个指标由线程池并发抓取，
+结果写入带 TTL 的磁盘缓存，过期后携带校验标识（ETag / 文件修改时间）做条件刷新。
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+
+MACRO_FIELDS = ('m1m2', 'investment', 'bond_yield', 'mortgage_rate', 'ltv', 'rent_yield')
+
+# 各指标缓存有效期（秒）：月度数据半天，日度收益率一小时
+DEFAULT_TTL = {
+    'm1m2': 12 * 3600,
+    'investment': 12 * 3600,
+    'bond_yield': 3600,
+    'mortgage_rate': 12 * 3600,
+    'ltv': 12 * 3600,
+    'rent_yield': 12 * 3600,
+}
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('RECYCLE_CACHE_DIR', Path.home() / '.cache' / 're-cycle'))
+
+# 数据源配置文件（JSON 列表），未设置时不启用自动抓取
+SOURCES_ENV = 'RECYCLE_DATA_SOURCES'
+
+# 内置样例数据（离线演示与测试用），只在配置中显式声明 {"type": "file"} 时使用
+FIXTURE_PATH = Path(__file__).parent / 'fixtures' / 'macro_latest.json'
+
+
+@dataclass
+class Observation:
+    """一次抓取得到的指标值"""
+    field: str
+    value: float
+    as_of: str
+    source: str
+    validator: str = ''
+    fetched_at: float = 0.0
+    from_cache: bool = False
+    # 来自内置样例数据：不是真实观测，不得写入本地时序库
+    sample: bool = False
+
+
+class NotModified(Exception):
+    """条件刷新时数据源报告数据未变化"""
+
+
+class DataProvider:
+    """数据源基类：子类声明 name / fields 并实现 fetch"""
+
+    name = 'base'
+    fields = ()
+
+    def fetch(self, field, validator=''):
+        """
+        抓取单个指标，返回 Observation
+
+        validator 为上次缓存的校验标识，数据未变化时应抛出 NotModified。
+        """
+        raise NotImplementedError
+
+
+PROVIDERS = {}
+
+
+def register_provider(cls):
+    """注册数据源类型，供配置文件按 type 引用"""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+@register_provider
+class FileProvider(DataProvider):
+    """本地 JSON 文件数据源：{"as_of": "2026-09", "values": {"m1m2": -8.5, ...}}，适用于离线与测试"""
+
+    name = 'file'
+    fields = MACRO_FIELDS
+
+    def __init__(self, path=FIXTURE_PATH):
+        self.path = Path(path)
+
+    def fetch(self, field, validator=''):
+        mtime = str(self.path.stat().st_mtime_ns)
+        if validator and validator == mtime:
+            raise NotModified(field)
+        data = json.loads(self.path.read_text(encoding='utf-8'))
+        if field not in data.get('values', {}):
+            raise KeyError(f"{self.path.name} 中没有指标 {field}")
+        return Observation(field, float(data['values'][field]), data.get('as_of', ''), self.name, mtime,
+                           sample=self.path.resolve() == FIXTURE_PATH.resolve())
+
+
+@register_provider
+class HttpJsonProvider(DataProvider):
+    """
+    HTTP JSON 数据源：每个指标一个 URL，响应为 {"value": ..., "as_of": ...}
+
+    通过 ETag / If-None-Match 做条件请求，服务端返回 304 时沿用缓存。
+    """
+
+    name = 'http'
+
+    def __init__(self, urls, timeout=10.0, headers=None):
+        self.urls = dict(urls)
+        self.fields = tuple(self.urls)
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+
+    def fetch(self, field, validator=''):
+        request = urllib.request.Request(self.urls[field], headers=self.headers)
+        if validator:
+            request.add_header('If-None-Match', validator)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+                etag = response.headers.get('ETag', '')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                raise NotModified(field) from None
+            raise
+        return Observation(field, float(payload['value']), str(payload.get('as_of', '')), self.name, etag)
+
+
+class DiskCache:
+    """按 (数据源, 指标) 存放 JSON 文件的磁盘缓存"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=None):
+        self.directory = Path(directory)
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+
+    def _path(self, source, field):
+        return self.directory / source / f'{field}.json'
+
+    def get(self, source, field):
+        try:
+            data = json.loads(self._path(source, field).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return Observation(**{**data, 'from_cache': True})
+
+    def put(self, obs):
+        path = self._path(obs.source, obs.field)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {k: v for k, v in obs.__dict__.items() if k != 'from_cache'}
+        # 临时文件名含进程与线程号：并发抓取的线程同时写同一指标时互不覆盖
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def is_fresh(self, obs, now=None):
+        now = time.time() if now is None else now
+        return now - obs.fetched_at < self.ttl.get(obs.field, 3600)
+
+
+def _fetch_field(field, providers, cache, force=False):
+    """按优先级依次尝试各数据源，返回 (Observation 或 None, 错误列表)"""
+    errors = []
+    for provider in providers:
+        if field not in provider.fields:
+            continue
+        cached = cache.get(provider.name, field) if cache else None
+        if cached and not force and cache.is_fresh(cached):
+            return cached, errors
+        try:
+            obs = provider.fetch(field, cached.validator if cached else '')
+        except NotModified:
+            # 数据未变化：仅刷新抓取时间
+            cached.fetched_at = time.time()
+            cache.put(cached)
+            return cached, errors
+        except Exception as e:
+            errors.append(f"{provider.name}/{field}: {e}")
+            if cached:
+                # 抓取失败时退回过期缓存
+                return cached, errors
+            continue
+        obs.fetched_at = time.time()
+        if cache:
+            cache.put(obs)
+        return obs, errors
+    return None, errors
+
+
+def fetch_macro_data(providers, fields=MACRO_FIELDS, cache=None, max_workers=8, force=False):
+    """
+    并发抓取宏观指标
+
+    返回 (observations, errors)：observations 为 {指标: Observation}，抓取失败的指标不在其中。
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {field: pool.submit(_fetch_field, field, providers, cache, force) for field in fields}
+    observations, errors = {}, []
+    for field, future in futures.items():
+        obs, field_errors = future.result()
+        errors.extend(field_errors)
+        if obs is not None:
+            observations[field] = obs
+    return observations, errors
+
+
+def build_providers(config=None):
+    """
+    根据配置构建数据源列表（按优先级排列）
+
+    config 为 [{"type": "http", "urls": {...}}, {"type": "file", "path": "..."}] 形式（file 不带 path
+    时为内置样例文件）；未提供时读取环境变量 RECYCLE_DATA_SOURCES 指向的 JSON 文件，
+    再缺省则返回空列表（未配置数据源）。
+    """
+    if config is None:
+        path = os.environ.get(SOURCES_ENV)
+        config = json.loads(Path(path).read_text(encoding='utf-8')) if path else []
+    providers = []
+    for entry in config:
+        options = {k: v for k, v in entry.items() if k != 'type'}
+        if entry['type'] not in PROVIDERS:
+            raise ValueError(f"未知数据源类型: {entry['type']}")
+        providers.append(PROVIDERS[entry['type']](**options))
+    return providers
@@ -0,0 +1,125 @@
+"""
+本地大模型替身
+模拟 openai.OpenAI 客户端的 chat.completions.create 接口（含 stream=True 的逐块返回），
+无需网络与 API Key，用于离线演示、界面测试与压测。设置环境变量 RECYCLE_LLM_BACKEND=fake 启用。
+"""
+
+import asyncio
+import os
+import re
+import time
+from types import SimpleNamespace
+
+from .tokens import count_tokens, message_tokens
+
+
+BACKEND_ENV = 'RECYCLE_LLM_BACKEND'
+
+# 每个文本块之间的延迟（秒），模拟真实模型的出字速度
+DEFAULT_DELAY = float(os.environ.get('RECYCLE_FAKE_LLM_DELAY', '0.02'))
+
+_TEMPLATE = """## 1. 当前阶段操作策略（100字内）
+当前处于{phase}，建议以核心城市优质资产为主、控制杠杆，等待信用底确认后再逐步加仓。
+
+## 2. 2026-2027年关键风险点提示
+- 政策底（{policy}）之后信用传导可能慢于预期
+- 三四线城市人口流出带来的库存去化压力
+- 利率下行空间收窄对估值修复的制约
+
+## 3. 不同资金量配置建议
+- **500万以下**：以自住需求为主，关注一二线核心区次新房
+- **500万-5000万**：分批配置核心城市住宅，保留充足流动性
+- **5000万以上**：关注核心商业资产的折价收购机会，规避三四线商业
+
+*（本地模拟输出，仅用于测试）*
+"""
+
+
+def is_enabled():
+    return os.environ.get(BACKEND_ENV, '').lower() == 'fake'
+
+
+def fake_reply(messages):
+    """根据提示词中的周期相位与政策底生成确定性的模拟回复"""
+    prompt = messages[-1]['content'] if messages else ''
+    phase = re.search(r'当前周期相位[：:]\s*(\S+)', prompt) or re.search(r'"phase":"([^"]+)"', prompt)
+    policy = re.search(r'政策底时间[：:]\s*(\S+)', prompt) or re.search(r'"bottoms":\["([^"]+)"', prompt)
+    return _TEMPLATE.format(
+        phase=phase.group(1) if phase else '当前周期',
+        policy=policy.group(1) if policy else '政策底',
+    )
+
+
+def _chunks(text, size=4):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def _delta(content, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+
+def _completion(text, messages):
+    prompt_tokens, completion_tokens = message_tokens(messages), count_tokens(text)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason='stop')],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+    )
+
+
+class _Completions:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def _stream(self, text):
+        for piece in _chunks(text):
+            if self.delay:
+                time.sleep(self.delay)
+            yield _delta(piece)
+        yield _delta(None, 'stop')
+
+    def create(self, model, messages, stream=False, **kwargs):
+        self.calls += 1
+        text = fake_reply(messages)
+        if stream:
+            return self._stream(text)
+        if self.delay:
+            time.sleep(self.delay * len(text) / 4)
+        return _completion(text, messages)
+
+
+class _AsyncCompletions(_Completions):
+    async def _stream(self, text):
+        for piece in _chunks(text):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield _delta(piece)
+        yield _delta(None, 'stop')
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        self.calls += 1
+        text = fake_reply(messages)
+        if stream:
+            return self._stream(text)
+        if self.delay:
+            await asyncio.sleep(self.delay * len(text) / 4)
+        return _completion(text, messages)
+
+
+class FakeChatClient:
+    """与 openai.OpenAI 接口兼容的本地替身"""
+
+    def __init__(self, delay=DEFAULT_DELAY, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions(delay))
+
+
+class AsyncFakeChatClient:
+    """与 openai.AsyncOpenAI 接口兼容的本地替身"""
+
+    def __init__(self, delay=DEFAULT_DELAY, **kwargs):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(delay))
@@ -0,0 +1,108 @@
+// RE-Cycle Pro 卡片组件：接收一份卡片数据，在浏览器端一次渲染整组卡片。
+// 与 Streamlit 的通信使用自定义组件协议（postMessage），不依赖构建工具。
+(function () {
+  'use strict';
+
+  var EMOJI = { green: '🟢', yellow: '🟡', red: '🔴' };
+  var COLORS = { green: '#10b981', yellow: '#f59e0b', red: '#ef4444' };
+  var STYLE_ID = 'recycle-styles';
+
+  var root = document.getElementById('root');
+  var lastPayload = null;
+
+  function send(type, data) {
+    var message = { isStreamlitMessage: true, type: type };
+    for (var k in data) { message[k] = data[k]; }
+    window.parent.postMessage(message, '*');
+  }
+
+  function setHeight() {
+    // 只注入样式、没有卡片时不占位
+    var height = root.childElementCount ? Math.ceil(document.body.scrollHeight) : 0;
+    send('streamlit:setFrameHeight', { height: height });
+  }
+
+  // 全局样式表注入父页面 <head>，同一页面只注入一次（浏览器缓存样式文件）
+  function injectStyles() {
+    try {
+      var doc = window.parent.document;
+      if (doc.getElementById(STYLE_ID)) { return; }
+      var link = doc.createElement('link');
+      link.id = STYLE_ID;
+      link.rel = 'stylesheet';
+      link.href = new URL('styles.css', window.location.href).href;
+      doc.head.appendChild(link);
+    } catch (e) {
+      // 跨域嵌入时无法访问父页面，卡片本身的样式不受影响
+    }
+  }
+
+  function el(tag, className, text) {
+    var node = document.createElement(tag);
+    if (className) { node.className = className; }
+    if (text !== undefined && text !== null) { node.textContent = text; }
+    return node;
+  }
+
+  function metricCard(card) {
+    var node = el('div', 'metric-card');
+    node.appendChild(el('div', 'metric-label', card.label));
+    node.appendChild(el('div', 'metric-value', card.value));
+    if (card.subtitle) { node.appendChild(el('div', 'metric-subtitle', card.subtitle)); }
+    return node;
+  }
+
+  function signalCard(card) {
+    var pct = Math.round(card.confidence * 100);
+    var node = el('div', 'signal-card');
+    node.appendChild(el('div', 'signal-emoji', EMOJI[card.signal] || EMOJI.red));
+    node.appendChild(el('div', 'signal-name', card.name));
+    node.appendChild(el('div', 'signal-action', card.action));
+    node.appendChild(el('div', 'signal-confidence', '置信度 ' + pct + '%'));
+    var bar = el('div', 'confidence-bar');
+    var fill = el('div', 'confidence-fill');
+    fill.style.width = (card.confidence * 100) + '%';
+    fill.style.backgroundColor = COLORS[card.signal] || COLORS.red;
+    bar.appendChild(fill);
+    node.appendChild(bar);
+    return node;
+  }
+
+  function infoCard(card) {
+    var node = el('div', 'metric-card');
+    node.appendChild(el('div', 'metric-label', card.label));
+    node.appendChild(el('div', 'info-text', card.text));
+    return node;
+  }
+
+  var RENDERERS = { metric: metricCard, signal: signalCard, info: infoCard };
+
+  function render(args) {
+    if (args.styles) { injectStyles(); }
+    // 数据未变化时不重建 DOM
+    var payload = JSON.stringify([args.cards, args.columns]);
+    if (payload !== lastPayload) {
+      lastPayload = payload;
+      root.style.setProperty('--columns', args.columns || 1);
+      var fragment = document.createDocumentFragment();
+      (args.cards || []).forEach(function (card) {
+        var renderer = RENDERERS[card.kind];
+        if (renderer) { fragment.appendChild(renderer(card)); }
+      });
+      root.replaceChildren(fragment);
+    }
+    setHeight();
+  }
+
+  window.addEventListener('message', function (event) {
+    if (event.data && event.data.type === 'streamlit:render') {
+      render(event.data.args || {});
+    }
+  });
+
+  if (window.ResizeObserver) {
+    new ResizeObserver(setHeight).observe(document.body);
+  }
+
+  send('streamlit:componentReady', { apiVersion: 1 });
+})();
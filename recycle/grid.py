@@ -0,0 +1,117 @@
+"""
+情景敏感性网格
+在两个输入维度上按滑块精度铺满整个取值范围，一次性批量评估三底与六类资产信号；
+网格结果按参数键缓存，重复浏览同一组固定参数时不再重新计算。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from .batch import (
+    ASSET_KEYS,
+    CREDIT_QUARTERS,
+    MARKET_QUARTERS,
+    POLICY_QUARTERS,
+    REQUIRED_COLUMNS,
+    SIGNAL_COLORS,
+    calculate_asset_signals_batch,
+    calculate_cycles_batch,
+    current_month_index,
+)
+
+
+# 可作为网格坐标轴的输入：(显示名称, 最小值, 最大值, 步长)
+# 宏观指标取 validate_inputs 的合理范围，其余取侧边栏控件范围，步长与控件一致
+GRID_AXES = {
+    'm1m2': ('M1M2剪刀差（%）', -20.0, 10.0, 0.1),
+    'investment': ('房地产投资增速（%）', -20.0, 20.0, 0.1),
+    'mortgage_rate': ('贷款利率（%）', 2.0, 8.0, 0.01),
+    'ltv': ('LTV贷款价值比', 0.3, 0.9, 0.05),
+    'rent_yield': ('租售比（%）', 1.5, 4.0, 0.1),
+    'inventory': ('库存周期（年）', 2.0, 5.0, 0.1),
+    'population': ('人口周期（年）', 25.0, 35.0, 1.0),
+}
+
+# 可绘制的输出指标：(显示名称, 类别表)
+GRID_METRICS = {
+    'policy_bottom': ('政策底', POLICY_QUARTERS),
+    'credit_bottom': ('信用底', CREDIT_QUARTERS),
+    'market_bottom': ('市场底', MARKET_QUARTERS),
+    'tier1_res': ('一二线核心区住宅', SIGNAL_COLORS),
+    'tier1_com': ('一二线商业地产', SIGNAL_COLORS),
+    'tier2_res': ('二线住宅', SIGNAL_COLORS),
+    'tier2_com': ('二线商业', SIGNAL_COLORS),
+    'tier34_res': ('三四线住宅', SIGNAL_COLORS),
+    'tier34_com': ('三四线商业', SIGNAL_COLORS),
+}
+
+GRID_CACHE_SIZE = 32
+
+
+def axis_values(field):
+    """按控件步长生成坐标轴取值"""
+    _, lo, hi, step = GRID_AXES[field]
+    n = int(round((hi - lo) / step)) + 1
+    return np.round(lo + step * np.arange(n), 6)
+
+
+def _readonly(array):
+    array.setflags(write=False)
+    return array
+
+
+@lru_cache(maxsize=GRID_CACHE_SIZE)
+def _evaluate_grid_cached(x_field, y_field, fixed, month_index):
+    """按 (坐标轴, 固定参数, 月份) 键缓存的网格评估"""
+    xs = axis_values(x_field)
+    ys = axis_values(y_field)
+    scenarios = dict(fixed)
+    scenarios[x_field] = xs[np.newaxis, :]
+    scenarios[y_field] = ys[:, np.newaxis]
+
+    cycles = calculate_cycles_batch(scenarios, month_index=month_index)
+    signals = calculate_asset_signals_batch(cycles['cycle_position'], scenarios)
+
+    codes = {
+        'policy_bottom': cycles['policy_code'],
+        'credit_bottom': cycles['credit_code'],
+        'market_bottom': cycles['market_code'],
+    }
+    for key in ASSET_KEYS:
+        codes[key] = np.ascontiguousarray(signals[key]['signal_code'])
+
+    # 结果在会话间共享，冻结数组防止被调用方就地修改
+    return {
+        'x_field': x_field,
+        'y_field': y_field,
+        'x': _readonly(xs),
+        'y': _readonly(ys),
+        'codes': {metric: _readonly(np.ascontiguousarray(c)) for metric, c in codes.items()},
+    }
+
+
+def evaluate_grid(x_field, y_field, base, now=None):
+    """
+    评估二维敏感性网格
+
+    base 为当前参数（需包含 REQUIRED_COLUMNS），x_field / y_field 两个维度的取值被网格覆盖。
+    返回 {'x', 'y', 'codes': {指标: (len(y), len(x)) 编码矩阵}}，编码含义见 GRID_METRICS。
+    """
+    if x_field == y_field:
+        raise ValueError("横轴与纵轴不能为同一指标")
+    for field in (x_field, y_field):
+        if field not in GRID_AXES:
+            raise KeyError(f"不支持的网格维度: {field}")
+
+    fixed = tuple(
+        (field, float(base[field]))
+        for field in REQUIRED_COLUMNS
+        if field not in (x_field, y_field)
+    )
+    return _evaluate_grid_cached(x_field, y_field, fixed, current_month_index(now))
+
+
+def grid_cache_info():
+    """网格缓存命中统计"""
+    return _evaluate_grid_cached.cache_info()
@@ -0,0 +1,116 @@
+"""
+AI 策略解读缓存
+以 (周期数据, 资产信号, 宏观数据, 模型, 温度) 的稳定摘要为键，将大模型回复持久化到 SQLite，
+跨会话、跨重启共享；支持 TTL 过期与按条数 / 总字节数的最近最少使用淘汰。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .datasources import DEFAULT_CACHE_DIR
+from .memo import canonical_digest
+
+
+DEFAULT_PATH = Path(os.environ.get('RECYCLE_LLM_CACHE', DEFAULT_CACHE_DIR / 'llm_cache.sqlite3'))
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at);
+"""
+
+
+def strategy_cache_key(cycle_data, signals, macro_data, model, temperature, variant=''):
+    """策略解读的缓存键：与进程、字典顺序无关的稳定摘要"""
+    return canonical_digest(
+        {'cycle': cycle_data, 'signals': signals, 'macro': macro_data},
+        model,
+        float(temperature),
+        variant,
+    )
+
+
+class LLMCache:
+    """SQLite 持久化的回复缓存（WAL 模式，可被多个进程同时读写）"""
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key, now=None):
+        """返回未过期的缓存内容，未命中时为 None"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT content, created_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                return None
+            self._conn.execute(
+                'UPDATE llm_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?', (now, key)
+            )
+            return content
+
+    def put(self, key, content, model='', now=None):
+        now = time.time() if now is None else now
+        size = len(content.encode('utf-8'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, model, content, size, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, model, content, size, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        """删除过期条目，再按最近访问时间淘汰直到满足条数与字节上限"""
+        self._conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT key, size FROM llm_cache ORDER BY accessed_at').fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany('DELETE FROM llm_cache WHERE key = ?', doomed)
+
+    def stats(self):
+        with self._lock:
+            count, total, hits = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM llm_cache'
+            ).fetchone()
+        return {'entries': count, 'bytes': total, 'hits': hits}
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM llm_cache')
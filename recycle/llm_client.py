@@ -0,0 +1,348 @@
+"""
+共享大模型客户端
+所有会话共用一个后台事件循环上的异步客户端：连接池复用、并发数上限、429/5xx 指数退避重试、
+单次请求超时，以及相同请求在途合并（并发的相同提示词只向上游发一次请求）。
+不同 API Key 各有一个客户端（按 Key 的摘要索引，空闲过久或数量超限时回收），但共用同一个后台循环
+与全进程的并发上限（RECYCLE_LLM_CONCURRENCY，默认 8）。
+传入 TokenLedger 时按预算检查并记录每次上游调用的 token 用量与耗时。
+Streamlit 的会话线程通过 complete_sync / stream_sync 同步调用。
+"""
+
+import asyncio
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from . import fake_llm
+from .memo import canonical_digest
+from .tokens import count_tokens
+
+
+MAX_CONCURRENCY_ENV = 'RECYCLE_LLM_CONCURRENCY'
+
+# 全进程同时在途的上游请求数上限（所有客户端共用）
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get(MAX_CONCURRENCY_ENV, '8'))
+DEFAULT_TIMEOUT = 90.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 20.0
+
+# 共享客户端数上限与空闲回收时间（秒）
+MAX_CLIENTS = 32
+CLIENT_IDLE_SECONDS = 3600.0
+
+
+@dataclass
+class CompletionResult:
+    """一次补全的结果与用量"""
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    coalesced: bool = False
+
+
+@dataclass
+class ClientStats:
+    requests: int = 0
+    coalesced: int = 0
+    retries: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    latencies: list = field(default_factory=list)
+
+
+class _LoopThread:
+    """在守护线程中常驻运行的事件循环（进程内唯一），附带全进程的并发信号量"""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='llm-client-loop', daemon=True)
+        self.thread.start()
+        self.set_max_concurrency(max_concurrency)
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def set_max_concurrency(self, max_concurrency):
+        """更换并发信号量：之后的请求按新上限排队，已在途的请求不受影响"""
+        async def create():
+            return asyncio.Semaphore(max_concurrency)
+
+        self.semaphore = self.submit(create()).result()
+        self.max_concurrency = max_concurrency
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _shared_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = _LoopThread()
+        return _runner
+
+
+def set_max_concurrency(max_concurrency):
+    """设置全进程的上游并发上限（批量任务按 --concurrency 调整）"""
+    _shared_runner().set_max_concurrency(max_concurrency)
+
+
+def _is_retryable(error):
+    """超时、连接错误、429 与 5xx 可重试"""
+    import openai
+
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after', 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class LLMClient:
+    """
+    带连接池、限流、重试与请求合并的异步大模型客户端
+
+    运行在进程共享的后台循环上，并发受全进程上限约束（见 set_max_concurrency）。
+    """
+
+    def __init__(self, api_key='', base_url=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = ClientStats()
+        self.last_used = time.monotonic()
+        self._runner = _shared_runner()
+        self._inflight = {}
+        self._streams = 0
+        # 异步客户端绑定在后台循环上创建
+        self._client = self._runner.submit(self._setup(api_key, base_url)).result()
+
+    @property
+    def max_concurrency(self):
+        return self._runner.max_concurrency
+
+    @property
+    def idle(self):
+        """没有在途或排队中的请求（可安全回收）"""
+        return not self._inflight and not self._streams
+
+    async def _setup(self, api_key, base_url):
+        if fake_llm.is_enabled():
+            return fake_llm.AsyncFakeChatClient()
+
+        import openai
+
+        # 单个 AsyncOpenAI 实例内部维护 HTTP 连接池，所有请求复用；重试由本层统一处理，关闭 SDK 内置重试
+        client = openai.AsyncOpenAI(
+            api_key=api_key or 'EMPTY',
+            base_url=base_url,
+            max_retries=0,
+            timeout=self.timeout,
+        )
+        return client
+
+    def close(self):
+        """异步关闭连接池（不等待完成）"""
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            self._runner.submit(close())
+
+    def _backoff(self, error, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        return max(delay, _retry_after(error))
+
+    async def _retrying(self, call):
+        """执行上游调用：单次超时，可重试错误按指数退避（优先遵循 Retry-After）重试"""
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(call(), self.timeout)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    self.stats.failures += 1
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(self._backoff(e, attempt))
+                attempt += 1
+
+    async def _complete(self, messages, model, temperature, max_tokens):
+        start = time.perf_counter()
+        async with self._runner.semaphore:
+            self.stats.in_flight += 1
+            try:
+                response = await self._retrying(lambda: self._client.chat.completions.create(
+                    model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+                ))
+            finally:
+                self.stats.in_flight -= 1
+        latency = time.perf_counter() - start
+        self.stats.latencies.append(latency)
+        del self.stats.latencies[:-1000]
+        usage = getattr(response, 'usage', None)
+        return CompletionResult(
+            text=response.choices[0].message.content or '',
+            model=model,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+            latency=latency,
+        )
+
+    async def complete(self, messages, model, temperature=0.7, max_tokens=1500,
+                       ledger=None, mode='full', source='app'):
+        """
+        异步补全；并发的相同请求共享同一个上游调用
+
+        ledger 为 TokenLedger 时先按预算检查（可能压缩 max_tokens，超出时抛出 TokenBudgetError），
+        完成后以 mode / source 记录用量；合并到在途请求的调用不重复记录。
+        """
+        if ledger is not None:
+            estimate, max_tokens = ledger.plan(messages, max_tokens)
+        key = canonical_digest(messages, model, temperature, max_tokens)
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.requests += 1
+            task = asyncio.ensure_future(self._complete(messages, model, temperature, max_tokens))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            result = await asyncio.shield(task)
+            if ledger is not None:
+                ledger.record(
+                    result.prompt_tokens or estimate, result.completion_tokens or count_tokens(result.text),
+                    result.latency, mode=mode, model=model, source=source,
+                )
+            return result
+        self.stats.coalesced += 1
+        result = await asyncio.shield(task)
+        return CompletionResult(**{**result.__dict__, 'coalesced': True})
+
+    async def stream(self, messages, model, temperature=0.7, max_tokens=1500,
+                     ledger=None, mode='full', source='app'):
+        """异步流式补全，逐段产出文本（流式请求不做合并，仅在首段之前重试；用量按文本估算记录）"""
+        if ledger is not None:
+            estimate, max_tokens = ledger.plan(messages, max_tokens)
+        self.stats.requests += 1
+        start = time.perf_counter()
+        pieces = []
+        # 排队等待并发名额期间也计为占用，避免客户端被回收
+        self._streams += 1
+        try:
+            async with self._runner.semaphore:
+                self.stats.in_flight += 1
+                try:
+                    stream = await self._retrying(lambda: self._client.chat.completions.create(
+                        model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True
+                    ))
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            pieces.append(chunk.choices[0].delta.content)
+                            yield pieces[-1]
+                finally:
+                    self.stats.in_flight -= 1
+        finally:
+            self._streams -= 1
+        if ledger is not None:
+            ledger.record(estimate, count_tokens(''.join(pieces)), time.perf_counter() - start,
+                          mode=mode, model=model, source=source)
+
+    # ---- 同步接口（供 Streamlit 会话线程调用） ----
+
+    def run_sync(self, coro):
+        """在客户端的后台循环上运行协程并等待结果（批量任务借此与会话请求共享限流与连接池）"""
+        future = self._runner.submit(coro)
+        try:
+            return future.result()
+        except BaseException:
+            # 调用线程被中断时一并取消后台协程
+            future.cancel()
+            raise
+
+    def complete_sync(self, messages, model, temperature=0.7, max_tokens=1500, **accounting):
+        return self.run_sync(self.complete(messages, model, temperature, max_tokens, **accounting))
+
+    def stream_sync(self, messages, model, temperature=0.7, max_tokens=1500, **accounting):
+        """同步生成器：后台循环把文本块放入队列，调用线程边取边产出"""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for piece in self.stream(messages, model, temperature, max_tokens, **accounting):
+                    chunks.put(piece)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+
+        future = self._runner.submit(pump())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 调用方中途放弃（如页面刷新）时取消上游请求
+            future.cancel()
+
+    def snapshot(self):
+        """客户端统计快照"""
+        latencies = sorted(self.stats.latencies)
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        return {
+            'requests': self.stats.requests,
+            'coalesced': self.stats.coalesced,
+            'retries': self.stats.retries,
+            'failures': self.stats.failures,
+            'in_flight': self.stats.in_flight,
+            'latency_p50': p(0.5),
+            'latency_p95': p(0.95),
+        }
+
+
+# {(API Key 摘要, 接口地址, 是否替身): LLMClient}，按最近使用排序；不保存原始 Key
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def _evict_clients(now, keep):
+    """回收空闲超时或超出数量上限的客户端（只回收没有在途请求的客户端，keep 为本次返回的客户端）"""
+    for key, client in list(_clients.items()):
+        if len(_clients) <= MAX_CLIENTS and now - client.last_used < CLIENT_IDLE_SECONDS:
+            break
+        if key != keep and client.idle:
+            del _clients[key]
+            client.close()
+
+
+def shared_client(api_key='', base_url=None, **options):
+    """按 (API Key, 接口地址) 返回进程内共享的客户端"""
+    key = (hashlib.sha256(api_key.encode('utf-8')).hexdigest(), base_url, fake_llm.is_enabled())
+    with _clients_lock:
+        now = time.monotonic()
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = LLMClient(api_key=api_key, base_url=base_url, **options)
+        _clients.move_to_end(key)
+        client.last_used = now
+        _evict_clients(now, keep=key)
+        return client
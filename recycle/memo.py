@@ -0,0 +1,146 @@
+"""
+纯计算阶段的记忆化缓存
+以输入的规范化摘要（排序键的 JSON → SHA-256）为键的有界 LRU 缓存，进程内所有会话共享，
+并记录命中 / 未命中 / 淘汰次数。
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import types
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import wraps
+
+
+def _digest_default(obj):
+    # 类型化结果等只读映射按字典内容参与摘要，与同内容的普通字典摘要相同
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    return str(obj)
+
+
+def canonical_digest(*parts):
+    """对任意可 JSON 序列化的输入生成稳定摘要（与进程、字典顺序无关）"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=_digest_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def code_digest(func):
+    """
+    函数实现的摘要：字节码、常量、引用的名称与默认参数
+
+    嵌套函数与推导式的代码对象递归计入（其 repr 带内存地址，不能直接参与摘要）。
+    只改常量或默认参数、字节码不变时摘要同样变化。
+    """
+    digest = hashlib.sha256()
+
+    def feed(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode('utf-8'))
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                feed(const)
+            else:
+                digest.update(repr(const).encode('utf-8'))
+
+    feed(func.__code__)
+    digest.update(repr((func.__defaults__, func.__kwdefaults__)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LRUMemo:
+    """线程安全的有界 LRU 缓存"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.code_digest = None
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+# 已注册的记忆化函数：{名称: LRUMemo}
+MEMO_REGISTRY = {}
+
+_MISSING = object()
+
+
+def memoize(maxsize=128, extra_key=None, copy_result=False, name=None):
+    """
+    记忆化装饰器
+
+    extra_key: 可选的无参函数，其返回值并入缓存键，用于依赖当前时间等隐式输入的函数
+    copy_result: 返回缓存值的深拷贝，适用于体积小、调用方可能修改的字典结果；
+                 图表、DataFrame 等较大对象直接共享，调用方不得就地修改
+    """
+    def decorator(func):
+        # Streamlit 每次重跑都会重新执行装饰器：同名且实现未变时沿用已有缓存
+        digest = code_digest(func)
+        memo = MEMO_REGISTRY.get(name or func.__name__)
+        if memo is None or memo.code_digest != digest:
+            memo = LRUMemo(maxsize)
+            memo.code_digest = digest
+            MEMO_REGISTRY[name or func.__name__] = memo
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = canonical_digest(args, kwargs, extra_key() if extra_key else None)
+            result = memo.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                memo.put(key, result)
+            return copy.deepcopy(result) if copy_result else result
+
+        wrapper.memo = memo
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+def memo_stats():
+    """各记忆化函数的缓存统计 {名称: stats}"""
+    return {name: memo.stats() for name, memo in MEMO_REGISTRY.items()}
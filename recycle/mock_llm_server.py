@@ -0,0 +1,170 @@
+"""
+本地模拟大模型服务
+兼容 OpenAI Chat Completions 接口（含 SSE 流式返回）的轻量 HTTP 服务，可注入延迟与 429/503 故障，
+用于在无网络环境下测试共享客户端的重试、限流与请求合并，以及压测时替代真实大模型。
+
+    python -m recycle.mock_llm_server --port 8001 --latency 0.5 --fail-rate 0.1
+
+客户端设置 RECYCLE_LLM_BASE_URL=http://127.0.0.1:8001/v1 即可接入；GET /stats 返回请求计数。
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fake_llm import fake_reply
+from .tokens import count_tokens, message_tokens
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """可注入延迟与故障的模拟服务"""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, fail_rate=0.0, chunk_delay=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.chunk_delay = chunk_delay
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, 'completed': 0, 'failed': 0, 'concurrent': 0, 'max_concurrent': 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        """在后台线程中启动，返回自身"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def count(self, name, delta=1):
+        with self.lock:
+            self.counts[name] += delta
+            if name == 'concurrent':
+                self.counts['max_concurrent'] = max(self.counts['max_concurrent'], self.counts['concurrent'])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            with self.server.lock:
+                self._send_json(200, dict(self.server.counts))
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        server.count('requests')
+        server.count('concurrent')
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            with server.lock:
+                fail = server.random.random() < server.fail_rate
+            if fail:
+                server.count('failed')
+                status = server.random.choice([429, 503])
+                self._send_json(status, {'error': {'message': 'injected failure', 'type': 'mock'}}, {'Retry-After': '0'})
+                return
+
+            messages = request.get('messages', [])
+            model = request.get('model', 'mock')
+            text = fake_reply(messages)
+            if request.get('stream'):
+                self._stream(model, text)
+            else:
+                prompt_tokens, completion_tokens = message_tokens(messages), count_tokens(text)
+                self._send_json(200, {
+                    'id': f'chatcmpl-{uuid.uuid4().hex[:12]}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                    'usage': {
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'total_tokens': prompt_tokens + completion_tokens,
+                    },
+                })
+            server.count('completed')
+        finally:
+            server.count('concurrent', -1)
+
+    def _stream(self, model, text):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        chunk_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+
+        def event(delta, finish_reason=None):
+            payload = {
+                'id': chunk_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            self.wfile.write(f'data: {json.dumps(payload, ensure_ascii=False)}\n\n'.encode('utf-8'))
+            self.wfile.flush()
+
+        event({'role': 'assistant', 'content': ''})
+        for i in range(0, len(text), 4):
+            if self.server.chunk_delay:
+                time.sleep(self.server.chunk_delay)
+            event({'content': text[i:i + 4]})
+        event({}, 'stop')
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟大模型服务（OpenAI 兼容）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.5, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--chunk-delay', type=float, default=0.01, help='流式返回每块之间的延迟（秒）')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='随机返回 429/503 的比例')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), args.latency, args.fail_rate, args.chunk_delay, args.seed)
+    print(f'模拟大模型服务已启动: {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+蒙特卡洛不确定性引擎
+按用户指定的分布对宏观输入抽样，分块送入批量信号引擎，统计各资产红黄绿信号的经验概率
+与三底季度分布。每块只保留计数，内存占用与抽样总量无关；抽样量较大时分发到进程池。
+"""
+
+import numpy as np
+
+from .batch import (
+    ASSET_KEYS,
+    CREDIT_QUARTERS,
+    MARKET_QUARTERS,
+    PHASES,
+    POLICY_QUARTERS,
+    SIGNAL_COLORS,
+    calculate_asset_signals_batch,
+    calculate_cycles_batch,
+    current_month_index,
+)
+from .grid import GRID_AXES
+from .parallel import imap_unordered, workers_for
+
+
+# 参与抽样的宏观输入
+SAMPLED_FIELDS = ('m1m2', 'investment', 'bond_yield', 'mortgage_rate', 'ltv', 'rent_yield')
+
+# 抽样结果截断到合理范围（与 validate_inputs 一致）
+FIELD_BOUNDS = {field: GRID_AXES[field][1:3] for field in SAMPLED_FIELDS if field in GRID_AXES}
+FIELD_BOUNDS['bond_yield'] = (0.5, 5.0)
+
+# 支持的分布及参数个数：normal(均值, 标准差) / uniform(下限, 上限) /
+# triangular(下限, 众数, 上限) / fixed(取值)
+DISTRIBUTIONS = {'normal': 2, 'uniform': 2, 'triangular': 3, 'fixed': 1}
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# 各统计量的类别表
+_COUNT_CATEGORIES = {
+    'phase': PHASES,
+    'policy_bottom': POLICY_QUARTERS,
+    'credit_bottom': CREDIT_QUARTERS,
+    'market_bottom': MARKET_QUARTERS,
+}
+
+
+def validate_distributions(distributions):
+    """检查分布定义，返回错误信息列表"""
+    errors = []
+    for field, spec in distributions.items():
+        if field not in SAMPLED_FIELDS:
+            errors.append(f"不支持抽样的字段: {field}")
+            continue
+        kind, *args = spec
+        if kind not in DISTRIBUTIONS:
+            errors.append(f"{field}: 未知分布类型 {kind}")
+        elif len(args) != DISTRIBUTIONS[kind]:
+            errors.append(f"{field}: {kind} 分布需要 {DISTRIBUTIONS[kind]} 个参数")
+        elif kind == 'normal' and args[1] < 0:
+            errors.append(f"{field}: 标准差不能为负")
+        elif kind == 'uniform' and args[0] > args[1]:
+            errors.append(f"{field}: 均匀分布下限大于上限")
+        elif kind == 'triangular' and not args[0] <= args[1] <= args[2]:
+            errors.append(f"{field}: 三角分布参数需满足 下限 ≤ 众数 ≤ 上限")
+    return errors
+
+
+def _sample(rng, spec, size):
+    kind, *args = spec
+    if kind == 'normal':
+        return rng.normal(args[0], args[1], size)
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1], size)
+    if kind == 'triangular':
+        if args[0] == args[2]:
+            return np.full(size, float(args[0]))
+        return rng.triangular(args[0], args[1], args[2], size)
+    return np.full(size, float(args[0]))
+
+
+def _empty_counts():
+    counts = {name: np.zeros(len(cats), dtype=np.int64) for name, cats in _COUNT_CATEGORIES.items()}
+    for key in ASSET_KEYS:
+        counts[key] = np.zeros(len(SIGNAL_COLORS), dtype=np.int64)
+    return counts
+
+
+def _simulate_chunk(distributions, fixed, size, seed_seq, month_index):
+    """抽样并评估一个数据块，只返回计数（进程池任务入口）"""
+    rng = np.random.default_rng(seed_seq)
+    scenarios = dict(fixed)
+    for field in SAMPLED_FIELDS:
+        if field in distributions:
+            lo, hi = FIELD_BOUNDS[field]
+            scenarios[field] = np.clip(_sample(rng, distributions[field], size), lo, hi)
+
+    cycles = calculate_cycles_batch(scenarios, month_index=month_index)
+    signals = calculate_asset_signals_batch(cycles['cycle_position'], scenarios)
+
+    # 固定参数会被广播为标量形状，统一展开到块大小再计数
+    def count(codes, n):
+        return np.bincount(np.broadcast_to(codes, (size,)), minlength=n)
+
+    counts = {
+        'phase': count(cycles['phase_code'], len(PHASES)),
+        'policy_bottom': count(cycles['policy_code'], len(POLICY_QUARTERS)),
+        'credit_bottom': count(cycles['credit_code'], len(CREDIT_QUARTERS)),
+        'market_bottom': count(cycles['market_code'], len(MARKET_QUARTERS)),
+    }
+    for key in ASSET_KEYS:
+        counts[key] = count(signals[key]['signal_code'], len(SIGNAL_COLORS))
+    return counts
+
+
+def _chunk_sizes(n_draws, chunk_size):
+    full, rest = divmod(n_draws, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def run_monte_carlo(distributions, fixed, n_draws=100_000, chunk_size=DEFAULT_CHUNK_SIZE,
+                    seed=None, now=None, workers=None, progress=None):
+    """
+    运行蒙特卡洛模拟
+
+    distributions: {字段: (分布类型, *参数)}，未列出的宏观字段取 fixed 中的值
+    fixed: 其余输入（inventory、population 及未抽样的宏观字段）
+    progress: 可选回调 progress(已完成抽样数, 总抽样数)，每完成一块调用一次
+    每块使用独立的随机子序列，同一 seed 下串行与并行结果一致。
+    """
+    errors = validate_distributions(distributions)
+    if errors:
+        raise ValueError("；".join(errors))
+    if n_draws <= 0:
+        raise ValueError("抽样次数必须为正数")
+
+    fixed = {k: v for k, v in fixed.items() if k not in distributions}
+    sizes = _chunk_sizes(int(n_draws), int(chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    month_index = current_month_index(now)
+
+    totals = _empty_counts()
+    done = 0
+
+    def accumulate(counts, size):
+        nonlocal done
+        for name, c in counts.items():
+            totals[name] += c
+        done += size
+        if progress is not None:
+            progress(done, n_draws)
+
+    if workers is None:
+        workers = workers_for(n_draws)
+
+    if workers <= 1 or len(sizes) == 1:
+        for size, seed_seq in zip(sizes, seeds):
+            accumulate(_simulate_chunk(distributions, fixed, size, seed_seq, month_index), size)
+    else:
+        jobs = ((distributions, fixed, size, seed_seq, month_index) for size, seed_seq in zip(sizes, seeds))
+        for i, counts in imap_unordered(_simulate_chunk, jobs, workers):
+            accumulate(counts, sizes[i])
+
+    return summarize_counts(totals, n_draws)
+
+
+def summarize_counts(counts, n_draws):
+    """将计数转换为经验概率"""
+    result = {'n_draws': n_draws, 'signals': {}, 'bottoms': {}}
+    for key in ASSET_KEYS:
+        result['signals'][key] = dict(zip(SIGNAL_COLORS, (counts[key] / n_draws).tolist()))
+    for name in ('policy_bottom', 'credit_bottom', 'market_bottom'):
+        result['bottoms'][name] = dict(zip(_COUNT_CATEGORIES[name], (counts[name] / n_draws).tolist()))
+    result['phase'] = dict(zip(PHASES, (counts['phase'] / n_draws).tolist()))
+    return result
@@ -0,0 +1,75 @@
+"""
+共享进程池
+蒙特卡洛、多地区批量分析等大任务共用常驻的 spawn 进程池（每种工作进程数一个），避免每次任务重新启动工作进程。
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+
+# 超过该规模（行数 / 抽样量）时启用进程池：单进程约 300 万条/秒，
+# 更小的任务在进程内算完更快，并行得不偿失（任务分发与数据传输开销）
+PARALLEL_THRESHOLD = 5_000_000
+
+# 按工作进程数各保留一个进程池：并发的任务请求不同进程数时互不关闭对方正在使用的池
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def workers_for(size, threshold=PARALLEL_THRESHOLD):
+    """按任务规模选择工作进程数：达到阈值时用全部 CPU，否则为 1（进程内计算）"""
+    return default_workers() if size >= threshold else 1
+
+
+def get_pool(workers=None):
+    """返回该工作进程数的常驻进程池（线程安全，首次请求时创建）"""
+    workers = workers or default_workers()
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+        return pool
+
+
+@atexit.register
+def shutdown_pool():
+    """关闭全部常驻进程池"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+def imap_unordered(fn, jobs, workers=None, max_in_flight=None):
+    """
+    在进程池中执行 fn(*job)，按完成顺序逐个产出 (job 序号, 结果)
+
+    同时在途的任务数有上限（默认工作进程数的两倍），任务参数按需提交，内存占用有界。
+    """
+    workers = workers or default_workers()
+    pool = get_pool(workers)
+    max_in_flight = max_in_flight or workers * 2
+    jobs = iter(enumerate(jobs))
+    pending = {}
+
+    def submit():
+        job = next(jobs, None)
+        if job is not None:
+            i, args = job
+            pending[pool.submit(fn, *args)] = i
+
+    for _ in range(max_in_flight):
+        submit()
+    while pending:
+        future = next(as_completed(pending))
+        i = pending.pop(future)
+        submit()
+        yield i, future.result()
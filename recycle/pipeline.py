@@ -0,0 +1,213 @@
+"""
+增量计算图
+登记每个计算阶段读取的输入字段与依赖的上游阶段；每次重算时只执行输入字段、上游结果或附加键
+发生变化的阶段，其余直接沿用上次结果，并记录本轮各阶段是执行还是复用及其原因。
+阶段函数只能拿到登记过的字段，漏登记的字段会立即以 KeyError 暴露，而不会悄悄使用过期结果。
+不依赖 Streamlit，运行状态（PipelineState）由调用方按会话保存；传入共享的 ResultStore 时，
+阶段结果按 (阶段, 输入字段, 附加键, 上游结果键) 的摘要存入其中，会话只保留键，
+输入相同的会话共用同一份结果（另一会话已算过的阶段直接复用）。
+"""
+
+import time
+from collections import Counter, namedtuple
+
+from .memo import canonical_digest
+
+
+# 单个阶段在本轮的运行记录：status 为 'ran'（执行）或 'reused'（复用）
+StageRun = namedtuple('StageRun', ['name', 'status', 'reason', 'elapsed'])
+
+_Entry = namedtuple('_Entry', ['values', 'extra', 'upstream', 'output', 'version'])
+
+
+class Stage:
+    """计算阶段：func(inputs, **上游结果)，inputs 只包含 fields 中登记的字段"""
+
+    def __init__(self, name, func, fields=(), deps=(), extra_key=None, cutoff=False):
+        self.name = name
+        self.func = func
+        self.fields = tuple(fields)
+        self.deps = tuple(deps)
+        self.extra_key = extra_key
+        # cutoff：重算结果与上次相等时不视为变化，下游阶段继续复用
+        self.cutoff = cutoff
+
+
+_MISSING = object()
+
+
+class PipelineState:
+    """
+    一个会话的增量计算状态：各阶段上次的输入与结果、本轮运行记录与累计次数
+
+    store / owner：共享的 ResultStore 与本会话的标识；给定时结果存入 store（版本号即结果键），
+    否则保存在本对象中。
+    """
+
+    def __init__(self, store=None, owner=None):
+        self.entries = {}
+        self.last_run = []
+        self.counts = Counter()
+        self.store = store
+        self.owner = owner
+        self._version = 0
+
+    def next_version(self):
+        """结果版本号在会话内单调递增，丢弃后重算的结果不会与旧版本混淆"""
+        self._version += 1
+        return self._version
+
+    def begin_rerun(self):
+        """每次页面重跑开始时调用，清空本轮运行记录"""
+        self.last_run = []
+
+    def invalidate(self, *names):
+        """丢弃指定阶段（缺省为全部）的结果，下次强制重算"""
+        for name in names or list(self.entries):
+            self.entries.pop(name, None)
+            if self.store is not None:
+                self.store.unbind(self.owner, _slot(name))
+
+    def result_key(self, name, values, extra, upstream):
+        """共享存储中的结果键（未使用共享存储时为 None）"""
+        if self.store is None:
+            return None
+        return canonical_digest('pipeline', name, values, extra, upstream)
+
+    def load(self, name):
+        """阶段上次的结果；已被共享存储回收时返回 _MISSING"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return _MISSING
+        if self.store is None:
+            return entry.output
+        return self.store.get(entry.version, _MISSING)
+
+    def save(self, name, values, extra, upstream, output, key=None):
+        """记录阶段结果，返回（共享存储中的）结果对象"""
+        if self.store is None:
+            self.entries[name] = _Entry(values, extra, upstream, output, self.next_version())
+            return output
+        output = self.store.bind(self.owner, _slot(name), key, output)
+        self.entries[name] = _Entry(values, extra, upstream, None, key)
+        return output
+
+    def stats(self):
+        """各阶段累计执行 / 复用次数"""
+        names = dict.fromkeys(name for name, _ in self.counts)
+        return {
+            name: {'ran': self.counts[(name, 'ran')], 'reused': self.counts[(name, 'reused')]}
+            for name in names
+        }
+
+
+class StageGraph:
+    """阶段依赖图（按登记顺序即拓扑序）"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def stage(self, name, fields=(), deps=(), extra_key=None, cutoff=False):
+        """装饰器：登记阶段（上游阶段须先登记）"""
+        def decorator(func):
+            unknown = [dep for dep in deps if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"阶段 {name} 依赖未登记的阶段: {', '.join(unknown)}")
+            self.stages[name] = Stage(name, func, fields, deps, extra_key, cutoff)
+            return func
+        return decorator
+
+    def fields(self, name):
+        """阶段直接或经上游间接读取的全部输入字段"""
+        stage = self.stages[name]
+        fields = dict.fromkeys(stage.fields)
+        for dep in stage.deps:
+            fields.update(dict.fromkeys(self.fields(dep)))
+        return tuple(fields)
+
+    def _closure(self, targets):
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def run(self, state, inputs, targets=None):
+        """
+        计算 targets（缺省为全部阶段）及其上游，返回 {阶段: 结果}
+
+        输入字段、附加键与上游结果版本都未变化的阶段直接复用上次结果；
+        同一轮内重复请求的阶段只记录一次。
+        """
+        names = self._closure(targets or list(self.stages))
+        seen = {run.name for run in state.last_run}
+        outputs = {}
+        for name in names:
+            stage = self.stages[name]
+            values = {field: inputs[field] for field in stage.fields}
+            extra = stage.extra_key() if stage.extra_key else None
+            upstream = tuple(state.entries[dep].version for dep in stage.deps)
+            entry = state.entries.get(name)
+
+            if entry is not None and (entry.values, entry.extra, entry.upstream) == (values, extra, upstream):
+                output = state.load(name)
+                if output is not _MISSING:
+                    outputs[name] = output
+                    if name not in seen:
+                        self._record(state, StageRun(name, 'reused', '', 0.0))
+                    continue
+
+            # 共享存储中已有其他会话算好的相同结果（只查一次：先判断再读取时，两步之间可能已被回收）
+            key = state.result_key(name, values, extra, upstream)
+            shared = state.store.get(key, _MISSING) if key is not None else _MISSING
+            if shared is not _MISSING:
+                outputs[name] = state.save(name, values, extra, upstream, shared, key)
+                self._record(state, StageRun(name, 'reused', '共享结果', 0.0))
+                continue
+
+            start = time.perf_counter()
+            output = stage.func(values, **{dep: outputs[dep] for dep in stage.deps})
+            elapsed = time.perf_counter() - start
+
+            previous = state.load(name) if entry is not None and stage.cutoff else _MISSING
+            if previous is not _MISSING and _equal(output, previous):
+                # 结果未变：沿用原版本，下游阶段继续复用
+                if state.store is None:
+                    state.entries[name] = entry._replace(values=values, extra=extra, upstream=upstream, output=output)
+                else:
+                    output = state.save(name, values, extra, upstream, previous, entry.version)
+            else:
+                output = state.save(name, values, extra, upstream, output, key)
+            outputs[name] = output
+            self._record(state, StageRun(name, 'ran', _reason(stage, entry, values, extra, upstream), elapsed))
+        return outputs
+
+    @staticmethod
+    def _record(state, run):
+        state.last_run.append(run)
+        state.counts[(run.name, run.status)] += 1
+
+
+def _slot(name):
+    return f'pipeline.{name}'
+
+
+def _equal(a, b):
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+def _reason(stage, entry, values, extra, upstream):
+    """阶段需要重算的原因（变化的字段 / 上游阶段 / 附加键）"""
+    if entry is None:
+        return '首次计算'
+    reasons = [field for field in stage.fields if entry.values.get(field) != values[field]]
+    reasons += [f'↑{dep}' for dep, old, new in zip(stage.deps, entry.upstream, upstream) if old != new]
+    if entry.extra != extra:
+        reasons.append('附加键')
+    return ', '.join(reasons) or '结果已回收'
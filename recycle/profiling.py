@@ -0,0 +1,203 @@
+"""
+分阶段计时
+按阶段名记录耗时（次数、总计与分位数），供界面调试面板展示，并可导出 Prometheus 文本格式或 JSON；
+设置 RECYCLE_PROFILE_LOG 时每次页面重跑追加一行 JSON 日志。
+
+默认关闭，设置 RECYCLE_PROFILE=1 开启。关闭时 profiled 装饰器原样返回被装饰函数，
+stage() 返回共享的空上下文，开销只有一次属性判断。
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+PROFILE_ENV = 'RECYCLE_PROFILE'
+PROFILE_LOG_ENV = 'RECYCLE_PROFILE_LOG'
+
+# 每个阶段保留的最近样本数（用于计算分位数）
+MAX_SAMPLES = 2048
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+METRIC_NAME = 'recycle_stage_duration_seconds'
+
+
+def _env_enabled():
+    return os.environ.get(PROFILE_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class _NullStage:
+    """关闭时的空计时上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _StageStats:
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+
+def _quantile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Profiler:
+    """线程安全的分阶段计时器（进程内共享，页面重跑按线程区分）"""
+
+    def __init__(self, enabled=False, max_samples=MAX_SAMPLES, log_path=None):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.log_path = log_path
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds):
+        """记录一次阶段耗时"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _StageStats(self.max_samples)
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.samples.append(seconds)
+        current = getattr(self._local, 'run', None)
+        if current is not None:
+            current[name] = current.get(name, 0.0) + seconds
+
+    def stage(self, name):
+        """计时上下文：with profiler.stage('validation'): ..."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def profiled(self, name=None):
+        """计时装饰器；关闭时原样返回被装饰函数"""
+        def decorator(func):
+            if not self.enabled:
+                return func
+            stage_name = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(stage_name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def run(self, name='rerun'):
+        """一次页面重跑：记录总耗时，并在配置了日志路径时追加本轮各阶段耗时"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Run(self, name)
+
+    def snapshot(self):
+        """{阶段: {count, total, mean, max, p50, p90, p99}}，按总耗时降序"""
+        with self._lock:
+            items = [(name, s.count, s.total, s.max, sorted(s.samples)) for name, s in self._stats.items()]
+        result = {}
+        for name, count, total, peak, ordered in sorted(items, key=lambda item: -item[2]):
+            entry = {'count': count, 'total': total, 'mean': total / count if count else 0.0, 'max': peak}
+            for q in QUANTILES:
+                entry[f'p{round(q * 100)}'] = _quantile(ordered, q)
+            result[name] = entry
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self):
+        """Prometheus 文本格式（summary）"""
+        lines = [
+            f'# HELP {METRIC_NAME} RE-Cycle Pro 各阶段耗时',
+            f'# TYPE {METRIC_NAME} summary',
+        ]
+        for name, entry in self.snapshot().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for q in QUANTILES:
+                lines.append(f'{METRIC_NAME}{{stage="{label}",quantile="{q}"}} {entry[f"p{round(q * 100)}"]:.9g}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {entry["total"]:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {entry["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+
+class _Run:
+    __slots__ = ('profiler', 'name', 'start', 'previous')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.previous = getattr(local, 'run', None)
+        local.run = {}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stages = self.profiler._local.run
+        self.profiler._local.run = self.previous
+        self.profiler.record(self.name, elapsed)
+        if self.profiler.log_path:
+            line = json.dumps({
+                'ts': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'run': self.name,
+                'seconds': round(elapsed, 6),
+                'stages': {name: round(seconds, 6) for name, seconds in stages.items()},
+            }, ensure_ascii=False)
+            with open(self.profiler.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return False
+
+
+# 进程内共享的计时器
+profiler = Profiler(enabled=_env_enabled(), log_path=os.environ.get(PROFILE_LOG_ENV) or None)
+
+stage = profiler.stage
+profiled = profiler.profiled
@@ -0,0 +1,125 @@
+"""
+策略解读提示词
+界面与批量任务共用的提示词模板与模型参数，不依赖 Streamlit。
+提供两种模式：full 为原有的完整中文模板；compact 以紧凑 JSON 传入数据、只保留输出结构说明，
+提示词 token 约为完整模板的一半。
+"""
+
+import json
+import os
+
+
+LLM_MODEL = "gpt-4"
+LLM_TEMPERATURE = 0.7
+LLM_MAX_TOKENS = 1500
+
+# 精简模式的回复上限：三节共约 400 字，留出余量
+COMPACT_MAX_TOKENS = 800
+
+PROMPT_MODES = ('full', 'compact')
+
+DEFAULT_PROMPT_MODE = os.environ.get('RECYCLE_LLM_PROMPT_MODE', 'full')
+
+
+LLM_SYSTEM_PROMPT = "你是一位资深的房地产投资分析师，专注于宏观经济周期与房地产市场的研究。你的分析风格专业、客观、简洁，能够为投资者提供清晰、可操作的策略建议。"
+
+
+def build_strategy_messages(cycle_data, signals, macro_data):
+    """构建策略解读的对话消息"""
+    # 构建信号摘要
+    signal_summary = []
+    for key, value in signals.items():
+        signal_summary.append(f"- {key}: {value['action']} (置信度{value['confidence']*100:.0f}%)")
+    
+    prompt = f"""
+基于以下房地产周期数据，生成专业投资策略解读：
+
+【周期定位】
+- 当前周期相位：{cycle_data['current_phase']}
+- 周期位置：{cycle_data['cycle_position']*100:.1f}%
+- 政策底时间：{cycle_data['policy_bottom']}
+- 信用底时间：{cycle_data['credit_bottom']}
+- 市场底时间：{cycle_data['market_bottom']}
+
+【宏观指标】
+- M1M2剪刀差：{macro_data['m1m2']}%
+- 房地产投资增速：{macro_data['investment']}%
+- 10年期国债收益率：{macro_data['bond_yield']}%
+- 贷款利率：{macro_data['mortgage_rate']}%
+- LTV贷款价值比：{macro_data['ltv']}
+- 租售比：{macro_data['rent_yield']}%
+
+【资产配置信号】
+{chr(10).join(signal_summary)}
+
+请提供以下内容（使用Markdown格式）：
+
+## 1. 当前阶段操作策略（100字内）
+[策略建议]
+
+## 2. 2026-2027年关键风险点提示
+- 风险点1
+- 风险点2
+- 风险点3
+
+## 3. 不同资金量配置建议
+- **500万以下**：配置建议
+- **500万-5000万**：配置建议  
+- **5000万以上**：配置建议
+
+请保持专业、客观的投资分析风格。
+"""
+    
+    return [
+        {
+            "role": "system",
+            "content": LLM_SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+COMPACT_SYSTEM_PROMPT = "你是房地产投资分析师，输出专业、简洁、可操作的策略。"
+
+_COMPACT_INSTRUCTION = """bottoms=政策/信用/市场底，signals=操作,置信度。Markdown三节，勿复述输入：
+## 1. 当前阶段操作策略（100字内）
+## 2. 2026-2027年关键风险点（3条）
+## 3. 资金量配置建议（500万以下/500万-5000万/5000万以上）"""
+
+
+def build_compact_messages(cycle_data, signals, macro_data):
+    """构建精简模式的对话消息：数据以紧凑 JSON 传入"""
+    payload = {
+        'phase': cycle_data['current_phase'],
+        'pos': round(cycle_data['cycle_position'], 3),
+        'bottoms': [cycle_data['policy_bottom'], cycle_data['credit_bottom'], cycle_data['market_bottom']],
+        'macro': {field: macro_data[field] for field in ('m1m2', 'investment', 'bond_yield', 'mortgage_rate', 'ltv', 'rent_yield')},
+        'signals': {key: [value['action'], round(value['confidence'], 2)] for key, value in signals.items()},
+    }
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return [
+        {"role": "system", "content": COMPACT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"{data}\n{_COMPACT_INSTRUCTION}"},
+    ]
+
+
+def build_messages(cycle_data, signals, macro_data, mode='full'):
+    """按提示词模式构建对话消息"""
+    if mode == 'compact':
+        return build_compact_messages(cycle_data, signals, macro_data)
+    if mode != 'full':
+        raise ValueError(f"未知的提示词模式: {mode}")
+    return build_strategy_messages(cycle_data, signals, macro_data)
+
+
+def max_tokens_for(mode):
+    """各提示词模式的默认回复上限"""
+    return COMPACT_MAX_TOKENS if mode == 'compact' else LLM_MAX_TOKENS
+
+
+def cache_variant(mode):
+    """策略缓存键的模式区分（完整模板沿用原有缓存键）"""
+    return '' if mode == 'full' else mode
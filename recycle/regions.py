@@ -0,0 +1,131 @@
+"""
+多地区批量分析
+对每个城市/地区一行的输入表一次性计算周期与六类资产信号；表很大时按块分发到共享进程池。
+输出 地区 × 资产 的信号矩阵，供界面排序、分页展示。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .batch import ASSET_KEYS, REQUIRED_COLUMNS, SIGNAL_COLORS, evaluate_scenarios, valid_rows
+from .core import SIGNAL_EMOJI
+from .parallel import imap_unordered, workers_for
+
+
+REGION_COLUMN = 'region'
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def _input_columns(table, defaults):
+    """从输入表取出引擎所需列，缺少的列用 defaults 补齐"""
+    columns = {}
+    for field in REQUIRED_COLUMNS:
+        if field in table.columns:
+            columns[field] = table[field].to_numpy(dtype=np.float64)
+        elif field in defaults:
+            columns[field] = float(defaults[field])
+        else:
+            raise KeyError(f"地区数据缺少字段且无默认值: {field}")
+    return columns
+
+
+def _evaluate_chunk(columns, now):
+    return evaluate_scenarios(columns, now=now)
+
+
+def analyze_regions(table, defaults=None, now=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    批量分析多个地区
+
+    table 每行一个地区，需包含 region 列及宏观指标列，周期参数列缺省取 defaults。
+    必需字段缺失或无效的地区不参与计算（见 batch.valid_rows）。
+    返回 (结果表, 被剔除的地区名数组)：结果表按输入顺序排列，包含 region + evaluate_scenarios 的全部输出列。
+    """
+    if REGION_COLUMN not in table.columns:
+        raise KeyError(f"地区数据缺少 {REGION_COLUMN} 列")
+    columns = _input_columns(table, defaults or {})
+    valid = valid_rows(columns)
+    regions = table[REGION_COLUMN].to_numpy()
+    if not valid.all():
+        columns = {
+            field: values[valid] if isinstance(values, np.ndarray) else values
+            for field, values in columns.items()
+        }
+    n = int(np.count_nonzero(valid))
+
+    if workers is None:
+        workers = workers_for(n)
+
+    if workers <= 1 or n <= chunk_size:
+        result = evaluate_scenarios(columns, now=now)
+    else:
+        bounds = range(0, n, chunk_size)
+
+        def chunk(start):
+            return {
+                field: values[start:start + chunk_size] if isinstance(values, np.ndarray) else values
+                for field, values in columns.items()
+            }
+
+        parts = [None] * len(bounds)
+        for i, part in imap_unordered(_evaluate_chunk, ((chunk(start), now) for start in bounds), workers):
+            parts[i] = part
+        result = pd.concat(parts, ignore_index=True)
+
+    result.insert(0, REGION_COLUMN, regions[valid])
+    return result, regions[~valid]
+
+
+def signal_summary(result):
+    """各资产红黄绿信号的地区数量统计"""
+    return pd.DataFrame({
+        key: result[f'{key}_signal'].value_counts().reindex(list(SIGNAL_COLORS), fill_value=0)
+        for key in ASSET_KEYS
+    })
+
+
+def sort_regions(result, by=REGION_COLUMN, ascending=True):
+    """
+    按地区名、周期位置或某类资产信号排序
+
+    按资产排序时先按信号（绿 → 黄 → 红）再按置信度从高到低，ascending=False 时整体反转。
+    """
+    if by in ASSET_KEYS:
+        order = np.lexsort((
+            -result[f'{by}_confidence'].to_numpy(),
+            result[f'{by}_signal'].cat.codes.to_numpy(),
+        ))
+        if not ascending:
+            order = order[::-1]
+        return result.iloc[order]
+    return result.sort_values(by, ascending=ascending, kind='stable')
+
+
+def signal_matrix(result, asset_names):
+    """
+    生成 地区 × 资产 的展示矩阵（每格为 信号灯 + 操作建议）
+
+    只对传入的行（通常是当前页）做字符串拼接，避免为整张大表生成文本。
+    """
+    matrix = {
+        '地区': result[REGION_COLUMN].to_numpy(),
+        '周期相位': result['current_phase'].astype(str).to_numpy(),
+        '政策底': result['policy_bottom'].astype(str).to_numpy(),
+        '信用底': result['credit_bottom'].astype(str).to_numpy(),
+        '市场底': result['market_bottom'].astype(str).to_numpy(),
+    }
+    for key in ASSET_KEYS:
+        emoji = result[f'{key}_signal'].map(SIGNAL_EMOJI).astype(str)
+        matrix[asset_names[key]] = (emoji + ' ' + result[f'{key}_action'].astype(str)).to_numpy()
+    return pd.DataFrame(matrix)
+
+
+def regions_from_store(store, regions=None):
+    """从本地时序库索引取各地区最新的宏观数据，组装为多地区输入表"""
+    rows = {}
+    for indicator, series in store.index.items():
+        for region, entry in series.items():
+            if regions is None or region in regions:
+                rows.setdefault(region, {REGION_COLUMN: region})[indicator] = entry['value']
+    return pd.DataFrame(list(rows.values()))
@@ -0,0 +1,407 @@
+"""
+批量策略解读报告
+对情景表（或多地区表）的每一行计算周期与信号，用与界面相同的提示词并发调用大模型，
+在请求数 / token 速率与总 token 预算内派发；每完成一项即写入断点文件并追加到合并报告，
+中断后重新运行会跳过已完成的行继续生成。
+
+    python -m recycle.report_job scenarios.csv -o report.md --concurrency 8 --tpm 60000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .backtest import month_index
+from .batch import REQUIRED_COLUMNS, evaluate_batch
+from .core import DEFAULT_MACRO, DEFAULT_PARAMS, validate_inputs
+from .datasources import MACRO_FIELDS
+from .llm_cache import LLMCache, strategy_cache_key
+from .llm_client import set_max_concurrency, shared_client
+from .memo import canonical_digest
+from .prompts import DEFAULT_PROMPT_MODE, LLM_MODEL, LLM_TEMPERATURE, PROMPT_MODES, build_messages, cache_variant, max_tokens_for
+from .tokens import TokenBudgetError, TokenLedger, message_tokens
+
+
+# 行标签列，按顺序取第一个存在的列
+LABEL_COLUMNS = ('region', 'scenario', 'name')
+
+# 输入表缺少的字段取此默认值（与界面初始参数一致）
+DEFAULT_SCENARIO = {**DEFAULT_PARAMS, **DEFAULT_MACRO}
+
+DEFAULT_CONCURRENCY = 4
+
+
+class BudgetExceeded(Exception):
+    """总 token 预算已用尽"""
+
+
+class RateBudget:
+    """
+    请求数 / token 速率（滑动 60 秒窗口）与总 token 预算
+
+    派发前按 提示词估计 + max_tokens 预占额度，完成后按实际用量结算。
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, rpm=None, tpm=None, max_total_tokens=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_total_tokens = max_total_tokens
+        self.used_tokens = 0
+        self._window = deque()
+        self._lock = None
+
+    def _prune(self, now):
+        while self._window and now - self._window[0][0] >= self.WINDOW:
+            self._window.popleft()
+
+    def _wait_time(self, tokens, now):
+        """当前窗口能否容纳本次请求，不能时返回需要等待的秒数"""
+        self._prune(now)
+        if not self._window:
+            return 0.0
+        if self.rpm and len(self._window) >= self.rpm:
+            return self._window[0][0] + self.WINDOW - now
+        if self.tpm and sum(entry[1] for entry in self._window) + tokens > self.tpm:
+            return self._window[0][0] + self.WINDOW - now
+        return 0.0
+
+    async def acquire(self, tokens):
+        """预占额度，返回用于结算的凭据"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.max_total_tokens is not None and self.used_tokens + tokens > self.max_total_tokens:
+                raise BudgetExceeded(f"总 token 预算不足（已用 {self.used_tokens} / {self.max_total_tokens}）")
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            entry = [now, tokens]
+            self._window.append(entry)
+            self.used_tokens += tokens
+            return entry
+
+    def settle(self, entry, actual_tokens):
+        """按实际用量修正预占额度"""
+        self.used_tokens += actual_tokens - entry[1]
+        entry[1] = actual_tokens
+
+
+def load_scenarios(path):
+    """读取情景表，支持 CSV、Parquet 与 JSON（记录数组）"""
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    if suffix == '.json':
+        return pd.read_json(path, orient='records')
+    return pd.read_csv(path)
+
+
+def _labels(table):
+    for column in LABEL_COLUMNS:
+        if column in table.columns:
+            return table[column].astype(str).to_numpy()
+    return np.array([f'情景 {i + 1}' for i in range(len(table))])
+
+
+def prepare_items(table, defaults=None, now=None):
+    """
+    逐行生成任务项：{index, label, cycle_data, signals, macro_data, errors}
+
+    周期与信号由批量引擎整表计算；表中有 date 列时以各行月份为评估日期。缺少的字段取 defaults。
+    各行先按 validate_inputs 校验，未通过的行不参与计算，cycle_data / signals 为 None，errors 为校验错误。
+    """
+    defaults = {**DEFAULT_SCENARIO, **(defaults or {})}
+    fields = dict.fromkeys(tuple(DEFAULT_PARAMS) + REQUIRED_COLUMNS + MACRO_FIELDS)
+    columns = {}
+    for field in fields:
+        if field in table.columns:
+            columns[field] = table[field].to_numpy(dtype=np.float64)
+        else:
+            columns[field] = np.full(len(table), float(defaults[field]))
+
+    def inputs(i):
+        params = {field: float(columns[field][i]) for field in DEFAULT_PARAMS}
+        return params, {field: float(columns[field][i]) for field in MACRO_FIELDS}
+
+    errors = [validate_inputs(*inputs(i)) for i in range(len(table))]
+    valid = np.array([not e for e in errors], dtype=bool)
+    scenarios = {field: columns[field][valid] for field in REQUIRED_COLUMNS}
+    if 'date' in table.columns:
+        result = evaluate_batch(scenarios, month_index=month_index(pd.to_datetime(table['date']))[valid])
+    else:
+        result = evaluate_batch(scenarios, now=now)
+
+    labels = _labels(table)
+    results = iter(result)
+    for i in range(len(table)):
+        cycle_data, signals = next(results) if valid[i] else (None, None)
+        yield {
+            'index': i,
+            'label': labels[i],
+            'cycle_data': cycle_data,
+            'signals': signals,
+            'macro_data': inputs(i)[1],
+            'errors': errors[i],
+        }
+
+
+def _demote_headings(text):
+    """回复中的标题降一级，嵌入报告的行小节之下"""
+    return re.sub(r'^(#{1,5}) ', r'#\1 ', text, flags=re.MULTILINE)
+
+
+def _section(record):
+    cycle = record['cycle']
+    return (
+        f"## {record['label']}\n\n"
+        f"> {cycle['current_phase']} ｜ 周期位置 {cycle['cycle_position']*100:.1f}% ｜ "
+        f"政策底 {cycle['policy_bottom']} · 信用底 {cycle['credit_bottom']} · 市场底 {cycle['market_bottom']}\n\n"
+        f"{_demote_headings(record['content'].strip())}\n\n---\n\n"
+    )
+
+
+def _header(model, total):
+    return (
+        f"# RE-Cycle 批量策略解读报告\n\n"
+        f"生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M')} ｜ 模型：{model} ｜ 情景数：{total}\n\n---\n\n"
+    )
+
+
+def _read_checkpoint(path):
+    """逐行读取断点文件（忽略中断时写了一半的末行）"""
+    if not path.exists():
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class _ReportWriter:
+    """断点文件与合并报告的流式写入"""
+
+    def __init__(self, output, checkpoint, model, total, resume):
+        self.output = Path(output)
+        self.checkpoint = Path(checkpoint)
+        if not resume and self.checkpoint.exists():
+            self.checkpoint.unlink()
+
+        self.done = set()
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        self._report = open(self.output, 'w', encoding='utf-8')
+        self._report.write(_header(model, total))
+        # 续跑时按断点文件重建报告，保证报告与断点一致
+        for record in _read_checkpoint(self.checkpoint):
+            if record['id'] not in self.done:
+                self.done.add(record['id'])
+                self._report.write(_section(record))
+        self._report.flush()
+        self._checkpoint = open(self.checkpoint, 'a', encoding='utf-8')
+        if self._checkpoint.tell() and not self.checkpoint.read_bytes().endswith(b'\n'):
+            # 中断时写了一半的末行另起一行，避免与新记录粘连
+            self._checkpoint.write('\n')
+
+    def write(self, record):
+        # 先落盘断点，再追加报告；崩溃时最多丢失报告中的最后一节，续跑会重建
+        self._checkpoint.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+        self._report.write(_section(record))
+        self._report.flush()
+        self.done.add(record['id'])
+
+    def close(self, summary):
+        self._report.write(
+            f"*共 {summary['total']} 项：新生成 {summary['generated']}，缓存 {summary['cached']}，"
+            f"续跑跳过 {summary['resumed']}，失败 {summary['failed']}，预算不足未生成 {summary['skipped']}，"
+            f"输入无效跳过 {summary['invalid']}；"
+            f"消耗 {summary['prompt_tokens'] + summary['completion_tokens']} tokens，用时 {summary['elapsed']:.1f} 秒*\n"
+        )
+        self.abort()
+
+    def abort(self):
+        self._report.close()
+        self._checkpoint.close()
+
+
+async def _run(items, total, writer, client, model, temperature, max_tokens, prompt_mode, concurrency,
+               budget, ledger, cache, progress):
+    summary = {
+        'total': total, 'generated': 0, 'cached': 0, 'resumed': 0, 'failed': 0, 'skipped': 0, 'invalid': 0,
+        'prompt_tokens': 0, 'completion_tokens': 0, 'errors': [],
+    }
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    stop = asyncio.Event()
+
+    def report_progress():
+        if progress is not None:
+            finished = sum(summary[k] for k in ('generated', 'cached', 'resumed', 'failed', 'skipped', 'invalid'))
+            progress(finished, total)
+
+    async def produce():
+        for item in items:
+            await queue.put(item)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def handle(item):
+        if item['errors']:
+            # 输入未通过校验：不调用大模型，逐行报告
+            summary['invalid'] += 1
+            summary['errors'].append(f"{item['label']}: 输入无效，已跳过（{'；'.join(item['errors'])}）")
+            return
+        key = strategy_cache_key(item['cycle_data'], item['signals'], item['macro_data'], model, temperature,
+                                 cache_variant(prompt_mode))
+        # 行标识含标签：输入相同的不同地区各占一节，但共享缓存与在途请求
+        item_id = canonical_digest(item['label'], key)
+        if item_id in writer.done:
+            summary['resumed'] += 1
+            return
+        record = {'id': item_id, 'key': key, 'index': item['index'], 'label': item['label'], 'cycle': item['cycle_data'].to_dict()}
+
+        content = cache.get(key) if cache is not None else None
+        if content is not None:
+            writer.write({**record, 'content': content, 'cached': True})
+            summary['cached'] += 1
+            return
+        if stop.is_set():
+            summary['skipped'] += 1
+            return
+
+        messages = build_messages(item['cycle_data'], item['signals'], item['macro_data'], prompt_mode)
+        entry = None
+        try:
+            if budget is not None:
+                entry = await budget.acquire(message_tokens(messages) + max_tokens)
+            result = await client.complete(
+                messages, model=model, temperature=temperature, max_tokens=max_tokens,
+                ledger=ledger, mode=prompt_mode, source='report_job',
+            )
+        except (BudgetExceeded, TokenBudgetError) as e:
+            if entry is not None:
+                budget.settle(entry, 0)
+            if not stop.is_set():
+                summary['errors'].append(f"停止派发: {e}")
+            stop.set()
+            summary['skipped'] += 1
+            return
+        except Exception as e:
+            if entry is not None:
+                budget.settle(entry, 0)
+            summary['failed'] += 1
+            summary['errors'].append(f"{item['label']}: {e}")
+            return
+
+        if entry is not None:
+            budget.settle(entry, (result.prompt_tokens + result.completion_tokens) or entry[1])
+        if cache is not None and result.text:
+            cache.put(key, result.text, model=model)
+        writer.write({
+            **record, 'content': result.text, 'cached': False,
+            'prompt_tokens': result.prompt_tokens, 'completion_tokens': result.completion_tokens,
+        })
+        summary['generated'] += 1
+        summary['prompt_tokens'] += result.prompt_tokens
+        summary['completion_tokens'] += result.completion_tokens
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await handle(item)
+            report_progress()
+
+    await asyncio.gather(produce(), *(worker() for _ in range(concurrency)))
+    return summary
+
+
+def run_report_job(table, output, client, model=LLM_MODEL, temperature=LLM_TEMPERATURE,
+                   max_tokens=None, prompt_mode=DEFAULT_PROMPT_MODE, concurrency=DEFAULT_CONCURRENCY,
+                   budget=None, ledger=None, cache=None, checkpoint=None, resume=True, defaults=None,
+                   now=None, progress=None):
+    """
+    为情景表的每一行生成策略解读，合并写入一份 Markdown 报告
+
+    checkpoint 缺省为 <output>.checkpoint.jsonl；resume=False 时丢弃已有断点从头生成。
+    budget 控制派发速率，ledger（TokenLedger）记录用量并执行单次 / 每日 token 预算。
+    失败或因预算不足未生成的行不写入断点，下次运行会重试；输入未通过校验的行不调用大模型，计入 invalid。返回运行统计。
+    """
+    start = time.perf_counter()
+    max_tokens = max_tokens or max_tokens_for(prompt_mode)
+    checkpoint = checkpoint or f'{output}.checkpoint.jsonl'
+    writer = _ReportWriter(output, checkpoint, model, len(table), resume)
+    items = prepare_items(table, defaults, now)
+    try:
+        summary = client.run_sync(_run(
+            items, len(table), writer, client, model, temperature, max_tokens, prompt_mode,
+            concurrency, budget, ledger, cache, progress
+        ))
+        summary['elapsed'] = time.perf_counter() - start
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close(summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量生成策略解读报告')
+    parser.add_argument('input', help='情景表（CSV / Parquet / JSON），每行一个情景或地区')
+    parser.add_argument('-o', '--output', default=f"RE_Cycle_Batch_Report_{datetime.now().strftime('%Y%m%d')}.md")
+    parser.add_argument('--checkpoint', default=None, help='断点文件，缺省为 <output>.checkpoint.jsonl')
+    parser.add_argument('--fresh', action='store_true', help='忽略已有断点，从头生成')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--rpm', type=int, default=None, help='每分钟请求数上限')
+    parser.add_argument('--tpm', type=int, default=None, help='每分钟 token 数上限')
+    parser.add_argument('--token-budget', type=int, default=None, help='本次运行的总 token 上限')
+    parser.add_argument('--model', default=LLM_MODEL)
+    parser.add_argument('--temperature', type=float, default=LLM_TEMPERATURE)
+    parser.add_argument('--max-tokens', type=int, default=None, help='回复上限，缺省按提示词模式')
+    parser.add_argument('--prompt-mode', choices=PROMPT_MODES, default=DEFAULT_PROMPT_MODE)
+    parser.add_argument('--as-of', default=None, help='评估月份 YYYY-MM（表中无 date 列时使用），缺省为当前月份')
+    parser.add_argument('--base-url', default=os.environ.get('RECYCLE_LLM_BASE_URL') or None)
+    parser.add_argument('--no-cache', action='store_true', help='不读写策略解读缓存')
+    args = parser.parse_args()
+
+    table = load_scenarios(args.input)
+    set_max_concurrency(args.concurrency)
+    client = shared_client(os.environ.get('OPENAI_API_KEY', ''), base_url=args.base_url)
+    budget = RateBudget(args.rpm, args.tpm, args.token_budget)
+    now = datetime.strptime(args.as_of, '%Y-%m') if args.as_of else None
+
+    def progress(done, total):
+        print(f'\r进度 {done}/{total}', end='', flush=True)
+
+    summary = run_report_job(
+        table, args.output, client, model=args.model, temperature=args.temperature,
+        max_tokens=args.max_tokens, prompt_mode=args.prompt_mode, concurrency=args.concurrency,
+        budget=budget, ledger=TokenLedger(), cache=None if args.no_cache else LLMCache(), checkpoint=args.checkpoint,
+        resume=not args.fresh, now=now, progress=progress,
+    )
+    print()
+    print(f"报告已写入 {args.output}：新生成 {summary['generated']}，缓存 {summary['cached']}，"
+          f"续跑跳过 {summary['resumed']}，失败 {summary['failed']}，预算不足未生成 {summary['skipped']}，"
+          f"输入无效跳过 {summary['invalid']}")
+    for error in summary['errors']:
+        print(f'  {error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+会话共享的结果存储
+分析结果（输入快照、各计算阶段的输出、AI 解读、蒙特卡洛结果等）按内容摘要存放一份，进程内所有会话共享；
+会话只在各自的槽位（slot）中记录键，输入相同的会话引用同一个对象。条目按引用计数管理：
+无会话引用的条目作为缓存按 LRU 保留，总体积超过上限时优先淘汰；仍超限时按最久未活动的顺序回收会话。
+空闲超过 idle_seconds 的会话在 sweep() 时整体释放。
+
+存放的结果由所有会话共享，调用方只读、不得就地修改。不依赖 Streamlit。
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+STORE_MB_ENV = 'RECYCLE_RESULT_STORE_MB'
+IDLE_MINUTES_ENV = 'RECYCLE_SESSION_IDLE_MINUTES'
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get(STORE_MB_ENV, '256')) * 2**20)
+DEFAULT_IDLE_SECONDS = float(os.environ.get(IDLE_MINUTES_ENV, '60')) * 60
+
+_MISSING = object()
+
+
+def estimate_size(obj, _seen=None):
+    """对象的近似内存占用（字节）：递归计入容器内容，DataFrame / ndarray 按实际数据量"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(item, seen) for item in obj)
+    memory_usage = getattr(obj, 'memory_usage', None)
+    if callable(memory_usage):
+        # pandas DataFrame / Series
+        usage = memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return sys.getsizeof(obj) + nbytes
+    if isinstance(obj, ResultStore):
+        # 共享存储单独统计，不计入引用它的对象
+        return 0
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + estimate_size(vars(obj), seen)
+    slots = [name for cls in type(obj).__mro__ for name in getattr(cls, '__slots__', ())]
+    return sys.getsizeof(obj) + sum(estimate_size(getattr(obj, name, None), seen) for name in slots)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'refs')
+
+    def __init__(self, value, size):
+        self.value = value
+        self.size = size
+        self.refs = 0
+
+
+class _Session:
+    __slots__ = ('slots', 'last_seen')
+
+    def __init__(self, now):
+        self.slots = {}
+        self.last_seen = now
+
+
+class ResultStore:
+    """按内容键共享、引用计数的结果存储（线程安全）"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._sessions = {}
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sessions_evicted = 0
+
+    # 条目
+
+    def put(self, key, value):
+        """存入条目（不被任何会话引用），返回共享的对象：键已存在时返回已有对象"""
+        with self._lock:
+            value = self._put(key, value)
+            self._enforce_cap()
+            return value
+
+    def _put(self, key, value):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(value, estimate_size(value))
+            self.bytes += entry.size
+        else:
+            self._entries.move_to_end(key)
+        return entry.value
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # 会话槽位
+
+    def bind(self, session, slot, key, value=_MISSING):
+        """
+        会话的 slot 指向 key（传入 value 时先存入），释放该槽位原来引用的条目，返回共享的对象
+
+        key 不存在且未传入 value 时抛出 KeyError。
+        """
+        with self._lock:
+            if value is not _MISSING:
+                value = self._put(key, value)
+            elif key in self._entries:
+                value = self._entries[key].value
+            else:
+                raise KeyError(key)
+            state = self._touch(session)
+            old = state.slots.get(slot)
+            if old != key:
+                self._entries[key].refs += 1
+                state.slots[slot] = key
+                if old is not None:
+                    self._release(old)
+            self._enforce_cap(protect=session)
+            return value
+
+    def unbind(self, session, slot):
+        with self._lock:
+            state = self._sessions.get(session)
+            key = state.slots.pop(slot, None) if state else None
+            if key is not None:
+                self._release(key)
+
+    def lookup(self, session, slot, default=None):
+        """会话 slot 当前指向的对象（会话已被回收或槽位为空时返回 default）"""
+        return self.lookup_item(session, slot, default)[1]
+
+    def lookup_item(self, session, slot, default=None):
+        """
+        一次读取会话 slot 的 (键, 对象)，槽位为空时返回 (None, default)
+
+        键与对象需要同时使用时应调用本方法：分两次读取时，其间其他会话的写入可能触发回收。
+        """
+        with self._lock:
+            state = self._sessions.get(session)
+            key = state.slots.get(slot) if state else None
+            if key is None:
+                return None, default
+            state.last_seen = self.clock()
+            self._entries.move_to_end(key)
+            return key, self._entries[key].value
+
+    def slot_key(self, session, slot):
+        with self._lock:
+            state = self._sessions.get(session)
+            return state.slots.get(slot) if state else None
+
+    def touch(self, session):
+        with self._lock:
+            self._touch(session)
+
+    def _touch(self, session):
+        state = self._sessions.get(session)
+        if state is None:
+            state = self._sessions[session] = _Session(self.clock())
+        else:
+            state.last_seen = self.clock()
+        return state
+
+    def _release(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.refs -= 1
+
+    def drop_session(self, session):
+        """释放会话的全部槽位"""
+        with self._lock:
+            state = self._sessions.pop(session, None)
+            for key in (state.slots.values() if state else ()):
+                self._release(key)
+
+    # 回收
+
+    def sweep(self, protect=None):
+        """
+        回收空闲超时的会话，并按体积上限淘汰无引用的条目；返回回收的会话数
+
+        protect 为当前正在运行的会话：先刷新其活动时间，且不因体积上限被回收。
+        """
+        with self._lock:
+            if protect is not None:
+                self._touch(protect)
+            cutoff = self.clock() - self.idle_seconds
+            idle = [session for session, state in self._sessions.items() if state.last_seen < cutoff]
+            for session in idle:
+                self.drop_session(session)
+            self.sessions_evicted += len(idle)
+            self._enforce_cap(protect=protect)
+            return len(idle)
+
+    def _evict_unreferenced(self):
+        for key in [key for key, entry in self._entries.items() if entry.refs <= 0]:
+            if self.bytes <= self.max_bytes:
+                return
+            self.bytes -= self._entries.pop(key).size
+            self.evictions += 1
+
+    def _enforce_cap(self, protect=None):
+        if self.bytes <= self.max_bytes:
+            return
+        self._evict_unreferenced()
+        # 仍超限：按最久未活动的顺序回收会话（不回收正在写入的会话）
+        while self.bytes > self.max_bytes:
+            candidates = [(state.last_seen, session) for session, state in self._sessions.items() if session != protect]
+            if not candidates:
+                return
+            self.drop_session(min(candidates)[1])
+            self.sessions_evicted += 1
+            self._evict_unreferenced()
+
+    # 统计
+
+    def stats(self):
+        """总体统计；shared_saved 为多个会话共用同一条目而节省的字节数"""
+        with self._lock:
+            referenced = [entry for entry in self._entries.values() if entry.refs > 0]
+            return {
+                'entries': len(self._entries),
+                'referenced': len(referenced),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'sessions': len(self._sessions),
+                'shared_saved': sum(entry.size * (entry.refs - 1) for entry in referenced),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'sessions_evicted': self.sessions_evicted,
+            }
+
+    def session_stats(self, session=None):
+        """
+        各会话（或指定会话）的内存占用：
+        bytes 为其引用的条目总大小，share 为按引用数分摊后的大小（各会话 share 之和即被引用条目的总大小）
+        """
+        with self._lock:
+            now = self.clock()
+            sessions = [session] if session is not None else list(self._sessions)
+            result = {}
+            for name in sessions:
+                state = self._sessions.get(name)
+                if state is None:
+                    continue
+                entries = [self._entries[key] for key in state.slots.values() if key in self._entries]
+                result[name] = {
+                    'slots': len(state.slots),
+                    'bytes': sum(entry.size for entry in entries),
+                    'share': sum(entry.size / entry.refs for entry in entries if entry.refs > 0),
+                    'idle': now - state.last_seen,
+                }
+            return result
@@ -0,0 +1,200 @@
+"""
+类型化的分析结果
+周期定位与资产信号的结果对象：信号颜色与周期相位以枚举编码，对象以 __slots__ 存储且不可变。
+每类资产各规则分支的信号对象在进程内只构造一次，标量求值直接返回共享对象，不再逐条复制字典。
+
+结果对象同时实现只读映射接口（cycle_data['current_phase']、signals['tier1_res']['confidence']），
+按字典读取的调用方无需改动；to_dict() / from_dict() 与普通字典互转，映射接口读出的值与原字典一致，
+因此 canonical_digest 等摘要不变。JSON 序列化时传入 default=json_default。
+批量结果的列式存储见 recycle.batch.ResultBatch。只依赖标准库（DataFrame 互转时才导入 pandas）。
+"""
+
+from collections.abc import Mapping
+from enum import IntEnum
+
+from .rules import RULES
+
+
+# 六类资产键（顺序与界面、报告一致）
+ASSET_KEYS = ('tier1_res', 'tier1_com', 'tier2_res', 'tier2_com', 'tier34_res', 'tier34_com')
+
+
+class SignalColor(IntEnum):
+    """资产信号颜色（编码即批量引擎 SIGNAL_COLORS 中的下标）"""
+
+    GREEN = 0
+    YELLOW = 1
+    RED = 2
+
+    @property
+    def label(self):
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, value):
+        """由 'green' / 'yellow' / 'red' 或编码得到枚举值"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls[value.upper()]
+        return cls(int(value))
+
+
+# 周期相位：成员名与编码取自规则表 phase 规则的结果表（与 batch.PHASES 一致）
+Phase = IntEnum(
+    'Phase',
+    [(label, code) for code, label in enumerate(RULES.cycles['phase'].outcomes)],
+    module=__name__,
+)
+Phase.__doc__ = "周期相位（成员名为相位名称，编码为规则表中的结果下标）"
+
+
+def parse_phase(value):
+    """由相位名称或编码得到 Phase"""
+    if isinstance(value, Phase):
+        return value
+    if isinstance(value, str):
+        return Phase[value]
+    return Phase(int(value))
+
+
+def json_default(obj):
+    """json.dumps / orjson.dumps 的 default：结果对象按映射接口转为字典"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _Record(Mapping):
+    """
+    不可变结果对象的基类：属性存于 __slots__，映射接口按 FIELDS 读取同名属性
+
+    构造参数与 __slots__ 顺序一致；相等比较与哈希基于槽位元组，与普通字典比较时按映射内容。
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values, strict=True):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 不可修改")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 不可修改")
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self.astuple() == other.astuple()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __reduce__(self):
+        return type(self), self.astuple()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class CycleResult(_Record):
+    """周期定位结果：相位、三底季度、库存周期内的位置（0~1）与库存周期月数"""
+
+    __slots__ = ('phase', 'policy_bottom', 'credit_bottom', 'market_bottom', 'cycle_position', 'inventory_months')
+    FIELDS = ('policy_bottom', 'credit_bottom', 'market_bottom', 'current_phase', 'cycle_position', 'inventory_months')
+
+    @property
+    def current_phase(self):
+        return self.phase.name
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            parse_phase(data['current_phase']),
+            data['policy_bottom'],
+            data['credit_bottom'],
+            data['market_bottom'],
+            float(data['cycle_position']),
+            float(data['inventory_months']),
+        )
+
+
+class AssetSignal(_Record):
+    """单类资产的信号：颜色、操作建议与置信度"""
+
+    __slots__ = ('color', 'action', 'confidence')
+    FIELDS = ('signal', 'action', 'confidence')
+
+    @property
+    def signal(self):
+        return self.color.label
+
+    def to_dict(self):
+        return {'signal': self.color.label, 'action': self.action, 'confidence': self.confidence}
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(SignalColor.parse(data['signal']), data['action'], data['confidence'])
+
+
+# 各类资产每个规则分支的共享信号对象（下标即规则表中的结果编码）
+SIGNAL_RESULTS = {
+    key: tuple(AssetSignal.from_dict(outcome) for outcome in RULES.signals[key].outcomes)
+    for key in ASSET_KEYS
+}
+
+
+class AssetSignals(_Record):
+    """六类资产的信号（按资产键读取 AssetSignal）"""
+
+    __slots__ = ASSET_KEYS
+    FIELDS = ASSET_KEYS
+
+    def to_dict(self):
+        return {key: getattr(self, key).to_dict() for key in ASSET_KEYS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(AssetSignal.from_dict(data[key]) for key in ASSET_KEYS))
+
+    def to_frame(self):
+        """每类资产一行（索引为资产键），列为 signal / action / confidence"""
+        import pandas as pd
+
+        return pd.DataFrame(
+            [getattr(self, key).to_dict() for key in ASSET_KEYS],
+            index=pd.Index(ASSET_KEYS, name='asset'),
+        )
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(*(AssetSignal.from_dict(frame.loc[key]) for key in ASSET_KEYS))
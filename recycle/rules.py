@@ -0,0 +1,246 @@
+"""
+决策规则表
+周期定位、资产信号与监测指标状态的阈值以声明式规则表（JSON / YAML）维护，启动时编译为
+各维度有序断点数组 + 决策网格：每个维度用二分查找（批量时 numpy.searchsorted）定位所在区间，
+再按区间编号查网格得到结果，单条 O(log k)、整表完全向量化。
+
+规则写法：
+    {"cases": [{"when": {"rent_yield": "> 2.5", "cycle_position": ">= 0.5"}, "then": ...}, ...],
+     "default": ...}
+cases 按顺序取第一个成立的分支；when 为字典时各条件同时成立，为字典列表时任一成立；
+同一维度可写条件列表（如 [">= 0.25", "< 0.5"]）。设置 RECYCLE_RULES 指向自定义规则文件即可
+在不改代码的情况下调整阈值（进程启动时加载）。
+"""
+
+import itertools
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right
+from functools import partial
+from pathlib import Path
+
+
+RULES_ENV = 'RECYCLE_RULES'
+
+DEFAULT_RULES_PATH = Path(__file__).with_name('rule_table.json')
+
+# 断点不超过该数量时，批量求值用逐个比较累加代替 searchsorted（断点很少时比较更快）
+COMPARE_MAX_CUTS = 8
+
+_CONDITION = re.compile(r'^\s*(>=|<=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+class RuleError(ValueError):
+    """规则表格式错误"""
+
+
+def _parse_condition(dim, text):
+    """解析 '>= 0.5' 形式的条件，返回 (维度, 断点, 断点类型, 是否取反)"""
+    match = _CONDITION.match(str(text))
+    if not match:
+        raise RuleError(f"无法解析的条件: {dim} {text}")
+    op, value = match.group(1), float(match.group(2))
+    # 断点类型 ge 表示 x >= t，gt 表示 x > t；< 与 <= 分别是二者的取反
+    return {
+        '>=': (dim, value, 'ge', False),
+        '>': (dim, value, 'gt', False),
+        '<': (dim, value, 'ge', True),
+        '<=': (dim, value, 'gt', True),
+    }[op]
+
+
+def _clauses(when):
+    """将 when 规范化为 [[条件, ...], ...]（外层为“或”，内层为“且”）"""
+    groups = when if isinstance(when, list) else [when]
+    clauses = []
+    for group in groups:
+        conditions = []
+        for dim, spec in group.items():
+            for text in (spec if isinstance(spec, list) else [spec]):
+                conditions.append(_parse_condition(dim, text))
+        clauses.append(conditions)
+    return clauses
+
+
+def _locator(ge, gt):
+    """返回标量 x -> 区间编号 的定位函数（满足的断点个数）"""
+    if ge and gt:
+        return lambda x: bisect_right(ge, x) + bisect_left(gt, x)
+    if gt:
+        return partial(bisect_left, gt)
+    return partial(bisect_right, ge)
+
+
+def _outcome_key(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+class CompiledRule:
+    """
+    编译后的单条规则
+
+    dims: 参与判断的维度；ge / gt: 各维度 x >= t 与 x > t 两类断点的有序数组；
+    outcomes: 去重后的结果表（按首次出现顺序，编码即下标）；table: 按区间编号展平的决策网格。
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        cases = [(_clauses(case['when']), case['then']) for case in spec.get('cases', [])]
+        if 'default' not in spec:
+            raise RuleError(f"规则 {name} 缺少 default")
+
+        self.outcomes = []
+        index = {}
+        branch_codes = []
+        for then in [then for _, then in cases] + [spec['default']]:
+            key = _outcome_key(then)
+            if key not in index:
+                index[key] = len(self.outcomes)
+                self.outcomes.append(then)
+            branch_codes.append(index[key])
+
+        # 收集各维度断点：同一阈值 ge 排在 gt 之前，满足的断点恰为有序断点的前缀，
+        # 因此区间编号 = 满足的断点个数 = bisect_right(ge, x) + bisect_left(gt, x)
+        cuts = {}
+        for clauses, _ in cases:
+            for conditions in clauses:
+                for dim, value, kind, _ in conditions:
+                    cuts.setdefault(dim, set()).add((value, kind))
+        self.dims = tuple(cuts)
+        ordered = {dim: sorted(cuts[dim], key=lambda c: (c[0], c[1] != 'ge')) for dim in self.dims}
+        position = {dim: {cut: i for i, cut in enumerate(ordered[dim])} for dim in self.dims}
+        self.ge = {dim: [v for v, kind in ordered[dim] if kind == 'ge'] for dim in self.dims}
+        self.gt = {dim: [v for v, kind in ordered[dim] if kind == 'gt'] for dim in self.dims}
+        self.shape = tuple(len(ordered[dim]) + 1 for dim in self.dims)
+
+        def holds(conditions, cell):
+            for dim, value, kind, negate in conditions:
+                satisfied = cell[self.dims.index(dim)] > position[dim][(value, kind)]
+                if satisfied == negate:
+                    return False
+            return True
+
+        # 在每个区间组合上按顺序求值，得到决策网格
+        self.table = []
+        for cell in itertools.product(*(range(n) for n in self.shape)):
+            code = branch_codes[-1]
+            for (clauses, _), branch in zip(cases, branch_codes):
+                if any(holds(conditions, cell) for conditions in clauses):
+                    code = branch
+                    break
+            self.table.append(code)
+
+        strides = []
+        stride = 1
+        for n in reversed(self.shape):
+            strides.insert(0, stride)
+            stride *= n
+        self._locators = tuple(
+            (dim, _locator(self.ge[dim], self.gt[dim]), stride) for dim, stride in zip(self.dims, strides)
+        )
+        self._strides = tuple(strides)
+        # 决策网格直接存结果对象，单条求值省去一次编码到结果的转换
+        self._results = [self.outcomes[code] for code in self.table]
+        self._arrays = None
+
+    def _flat(self, values):
+        flat = 0
+        for dim, locate, stride in self._locators:
+            flat += locate(values[dim]) * stride
+        return flat
+
+    def code(self, values):
+        """单条求值，返回结果编码（values 为 {维度: 数值}）"""
+        return self.table[self._flat(values)]
+
+    def evaluate(self, values):
+        """单条求值，返回结果（规则表中的原对象，调用方不应修改）"""
+        return self._results[self._flat(values)]
+
+    def _cells(self, dim, x):
+        """批量定位区间编号：断点少时比较累加，断点多时 searchsorted"""
+        import numpy as np
+
+        ge, gt = self._arrays[dim]
+        if len(ge) + len(gt) <= COMPARE_MAX_CUTS:
+            cells = np.zeros(x.shape, dtype=np.uint8)
+            for t in ge:
+                cells += x >= t
+            for t in gt:
+                cells += x > t
+            return cells
+        return np.searchsorted(ge, x, side='right') + np.searchsorted(gt, x, side='left')
+
+    def codes(self, columns):
+        """批量求值：columns 为 {维度: 数组/标量}（可为任意可广播形状），返回 int8 编码数组"""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = {
+                dim: (np.asarray(self.ge[dim], dtype=np.float64), np.asarray(self.gt[dim], dtype=np.float64))
+                for dim in self.dims
+            }
+            self._table = np.asarray(self.table, dtype=np.int8)
+        if not self.dims:
+            return np.zeros((), dtype=np.int8)
+        # 网格不超过 256 格时区间编号全程用 uint8 运算
+        dtype = np.uint8 if len(self.table) <= 256 else np.intp
+        flat = None
+        for dim, stride in zip(self.dims, self._strides):
+            cells = self._cells(dim, np.asarray(columns[dim], dtype=np.float64)).astype(dtype, copy=False)
+            if stride != 1:
+                cells = cells * dtype(stride)
+            flat = cells if flat is None else flat + cells
+        return np.take(self._table, flat)
+
+
+class RuleTable:
+    """整张规则表：cycles / signals / metrics 三组编译后的规则"""
+
+    def __init__(self, spec, source=None):
+        self.source = source
+        self.version = spec.get('version')
+        try:
+            self.cycles = {name: CompiledRule(name, rule) for name, rule in spec['cycles'].items()}
+            self.signals = {name: CompiledRule(name, rule) for name, rule in spec['signals'].items()}
+            self.metrics = {name: CompiledRule(name, rule) for name, rule in spec['metrics'].items()}
+        except (KeyError, TypeError, AttributeError) as e:
+            raise RuleError(f"规则表格式错误: {e!r}") from None
+        self.metric_meta = {
+            name: {
+                'threshold': rule.get('threshold', ''),
+                'labels': rule.get('labels', {}),
+                'report_labels': rule.get('report_labels', rule.get('labels', {})),
+            }
+            for name, rule in spec['metrics'].items()
+        }
+
+    def fields(self, group):
+        """某组规则（'cycles' / 'signals' / 'metrics'）用到的全部维度"""
+        return {dim for rule in getattr(self, group).values() for dim in rule.dims}
+
+    def metric_status(self, name, value, labels='labels'):
+        """监测指标状态文字（labels 取 'labels' 或 'report_labels'）"""
+        level = self.metrics[name].evaluate({name: value})
+        return self.metric_meta[name][labels].get(level, level)
+
+
+def read_rules(path):
+    """读取规则文件：.yaml / .yml 需要 PyYAML，其余按 JSON 解析"""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def load_rules(path=None):
+    """加载并编译规则表，缺省读取 RECYCLE_RULES 或内置规则表"""
+    path = path or os.environ.get(RULES_ENV) or DEFAULT_RULES_PATH
+    return RuleTable(read_rules(path), source=str(path))
+
+
+# 进程启动时编译一次，各模块共用
+RULES = load_rules()
@@ -0,0 +1,219 @@
+"""
+分析 API 服务
+基于 Starlette 的异步 HTTP 服务，向其他系统提供周期定位与资产信号（单条 / 批量）以及报告导出。
+请求按 validate_inputs 的规则校验：超出合理范围返回 422，无法计算的取值（周期长度不是有限正数、
+指标不是有限数值）返回 400，批量请求中逐情景报告、不影响其余情景。响应体按 输入摘要 + 当前月份 缓存在进程内 LRU 中，
+命中时直接返回已序列化的字节，并支持 ETag 条件请求。
+
+    python -m recycle.service --port 8000 --workers 4
+
+接口：
+    GET  /health
+    GET  /metrics             各阶段耗时（Prometheus 文本格式，需设置 RECYCLE_PROFILE=1）
+    POST /v1/analyze          {"params": {...}, "macro_data": {...}, "as_of": "2026-09"}（也接受扁平字典）
+    POST /v1/analyze/batch    {"scenarios": [...], "as_of": "2026-09"}
+    POST /v1/report           同 /v1/analyze，返回 Markdown（?format=json 时返回 JSON）；缓存正文，生成时间按请求时刻填入
+"""
+
+import argparse
+import json
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from .core import analyze, report_body, split_inputs, stamp_report, value_errors
+from .memo import LRUMemo, canonical_digest
+from .profiling import profiled, profiler
+from .results import json_default
+
+
+DEFAULT_CACHE_SIZE = 20_000
+
+# 单次批量请求的情景数上限
+MAX_BATCH = 10_000
+
+# 超过该条数的批量请求放到线程池计算，避免阻塞事件循环
+THREADPOOL_THRESHOLD = 500
+
+try:
+    import orjson
+
+    def _dumps(payload):
+        return orjson.dumps(payload, default=json_default)
+except ImportError:
+    def _dumps(payload):
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+
+class InputError(ValueError):
+    """请求体格式、字段类型错误或无法计算的取值"""
+
+
+response_cache = LRUMemo(DEFAULT_CACHE_SIZE)
+
+
+def _parse_as_of(value):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(str(value), '%Y-%m')
+    except ValueError:
+        raise InputError(f"as_of 须为 YYYY-MM 格式: {value}") from None
+
+
+def _split(body):
+    if not isinstance(body, dict):
+        raise InputError("情景须为 JSON 对象")
+    try:
+        return split_inputs(body)
+    except (TypeError, ValueError) as e:
+        raise InputError(f"字段类型错误: {e}") from None
+
+
+def _analysis(body, as_of):
+    """
+    校验并分析单个情景，输入超出合理范围时返回 {'errors': [...]}
+
+    周期长度不是有限正数或指标不是有限数值时无法计算，抛出 InputError。
+    """
+    params, macro_data = _split(body)
+    invalid = value_errors(params, macro_data)
+    if invalid:
+        raise InputError('；'.join(invalid))
+    result = analyze(params, macro_data, as_of)
+    if result['errors']:
+        return {'params': params, 'macro_data': macro_data, 'errors': result['errors']}
+    return result
+
+
+def _single(body):
+    if not isinstance(body, dict):
+        raise InputError("请求体须为 JSON 对象")
+    result = _analysis(body, _parse_as_of(body.get('as_of')))
+    return (422 if result['errors'] else 200), result
+
+
+def _batch_item(scenario, as_of):
+    """批量中的单个情景：无法计算时只在该情景的结果中报告错误，不影响其余情景"""
+    try:
+        return _analysis(scenario, as_of)
+    except InputError as e:
+        return {'errors': [str(e)]}
+
+
+def _batch(body):
+    if not isinstance(body, dict) or not isinstance(body.get('scenarios'), list):
+        raise InputError("请求体须包含 scenarios 数组")
+    scenarios = body['scenarios']
+    if len(scenarios) > MAX_BATCH:
+        raise InputError(f"单次最多 {MAX_BATCH} 个情景")
+    as_of = _parse_as_of(body.get('as_of'))
+    results = [_batch_item(scenario, as_of) for scenario in scenarios]
+    return 200, {
+        'count': len(results),
+        'invalid': sum(1 for result in results if result['errors']),
+        'results': results,
+    }
+
+
+def _report(body):
+    status, result = _single(body)
+    if status != 200:
+        return status, result
+    return 200, {
+        'cycle_data': result['cycle_data'],
+        'signals': result['signals'],
+        'markdown': report_body(result['cycle_data'], result['signals'], result['macro_data']),
+    }
+
+
+def _error(status, message):
+    return Response(_dumps({'errors': [message]}), status_code=status, media_type='application/json')
+
+
+def _cached_endpoint(compute, kind, markdown=False):
+    """
+    包装计算函数为带缓存的端点
+
+    缓存键为 (接口, 请求体, 当前月份) 的摘要；缓存值为已序列化的 (状态码, 响应体, 媒体类型)。
+    markdown=True 为报告接口：缓存报告正文，生成时间在每次返回时填入（JSON 格式缓存未序列化的结果）。
+    """
+    compute = profiled(f'api.{kind}')(compute)
+
+    async def endpoint(request: Request):
+        raw = await request.body()
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            return _error(400, "请求体不是合法的 JSON")
+
+        as_markdown = markdown and request.query_params.get('format') != 'json'
+        key = canonical_digest(kind, body, as_markdown, datetime.now().strftime('%Y-%m'))
+        etag = f'"{key[:32]}"'
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers={'ETag': etag})
+
+        entry = response_cache.get(key)
+        hit = entry is not None
+        if not hit:
+            try:
+                scenarios = body.get('scenarios') if isinstance(body, dict) else None
+                if isinstance(scenarios, list) and len(scenarios) > THREADPOOL_THRESHOLD:
+                    status, payload = await run_in_threadpool(compute, body)
+                else:
+                    status, payload = compute(body)
+            except InputError as e:
+                return _error(400, str(e))
+            if as_markdown and status == 200:
+                entry = (status, payload['markdown'], 'text/markdown; charset=utf-8')
+            elif markdown and status == 200:
+                entry = (status, payload, 'application/json')
+            else:
+                entry = (status, _dumps(payload), 'application/json')
+            response_cache.put(key, entry)
+
+        status, content, media_type = entry
+        if markdown and status == 200:
+            content = (stamp_report(content).encode('utf-8') if as_markdown
+                       else _dumps({**content, 'markdown': stamp_report(content['markdown'])}))
+        return Response(content, status_code=status, media_type=media_type,
+                        headers={'ETag': etag, 'X-Cache': 'hit' if hit else 'miss'})
+
+    return endpoint
+
+
+async def health(request):
+    return Response(_dumps({'status': 'ok', 'cache': response_cache.stats()}), media_type='application/json')
+
+
+async def metrics(request):
+    return Response(profiler.to_prometheus(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+app = Starlette(routes=[
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/v1/analyze', _cached_endpoint(_single, 'single'), methods=['POST']),
+    Route('/v1/analyze/batch', _cached_endpoint(_batch, 'batch'), methods=['POST']),
+    Route('/v1/report', _cached_endpoint(_report, 'report', markdown=True), methods=['POST']),
+])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='RE-Cycle Pro 分析 API 服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help='工作进程数（各进程独立缓存）')
+    args = parser.parse_args()
+    uvicorn.run('recycle.service:app', host=args.host, port=args.port, workers=args.workers,
+                log_level='warning', access_log=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+分析 API 压测脚本
+以固定数量的长连接并发压测本机的 recycle.service，统计吞吐、延迟分位数、状态码与缓存命中率。
+只依赖标准库（asyncio 原生 HTTP/1.1 长连接），压测端自身开销小。
+
+    python -m recycle.service --port 8000 &
+    python -m recycle.service_loadtest --url http://127.0.0.1:8000 --connections 64 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def _payloads(kind, variety, seed):
+    """生成 variety 种不同的请求体（variety 越大，缓存命中率越低）"""
+    rng = random.Random(seed)
+
+    def scenario():
+        return {
+            'params': {'inventory': rng.choice([3.0, 3.5, 4.0]), 'population': rng.choice([26.0, 30.0])},
+            'macro_data': {
+                'm1m2': round(rng.uniform(-15, 0), 1),
+                'investment': round(rng.uniform(-15, 5), 1),
+                'mortgage_rate': round(rng.uniform(3, 5), 2),
+                'ltv': round(rng.uniform(0.5, 0.85), 2),
+                'rent_yield': round(rng.uniform(1.5, 3.5), 2),
+            },
+        }
+
+    if kind == 'batch':
+        return [{'scenarios': [scenario() for _ in range(50)]} for _ in range(variety)]
+    return [scenario() for _ in range(variety)]
+
+
+def _request(host, path, body):
+    data = json.dumps(body).encode('utf-8')
+    head = (
+        f'POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(data)}\r\nConnection: keep-alive\r\n\r\n'
+    )
+    return head.encode('ascii') + data
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('连接已关闭')
+    status = int(status_line.split()[1])
+    length, cache = 0, ''
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'x-cache':
+            cache = value.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, cache
+
+
+async def _connection(host, port, requests, deadline, latencies, statuses, caches):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        i = 0
+        while time.perf_counter() < deadline:
+            request = requests[i % len(requests)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, cache = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            caches[cache or '-'] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(url, path='/v1/analyze', connections=64, duration=10.0, variety=100, kind='single', seed=0):
+    """压测并返回统计结果"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    bodies = _payloads(kind, variety, seed)
+    requests = [_request(f'{host}:{port}', path, body) for body in bodies]
+    latencies, statuses, caches = [], Counter(), Counter()
+
+    start = time.perf_counter()
+    deadline = start + duration
+    results = await asyncio.gather(*(
+        _connection(host, port, requests[i:] + requests[:i], deadline, latencies, statuses, caches)
+        for i in range(connections)
+    ), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'statuses': dict(statuses),
+        'cache': dict(caches),
+        'connection_errors': [repr(r) for r in results if isinstance(r, Exception)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析 API 压测')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--endpoint', choices=('single', 'batch', 'report'), default='single')
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--variety', type=int, default=100, help='不同请求体的数量（控制缓存命中率）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    path = {'single': '/v1/analyze', 'batch': '/v1/analyze/batch', 'report': '/v1/report'}[args.endpoint]
+    kind = 'batch' if args.endpoint == 'batch' else 'single'
+    stats = asyncio.run(run_load(args.url, path, args.connections, args.duration, args.variety, kind, args.seed))
+    print(f"{path}: {stats['requests']} 个请求，{stats['rps']:.0f} 次/秒")
+    print(f"延迟 p50 {stats['p50_ms']:.1f} ms · p95 {stats['p95_ms']:.1f} ms · p99 {stats['p99_ms']:.1f} ms")
+    print(f"状态码 {stats['statuses']} · 缓存 {stats['cache']}")
+    for error in stats['connection_errors']:
+        print(f'连接错误: {error}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,445 @@
+"""
+界面多会话压测
+按 Streamlit 浏览器端的 WebSocket 协议模拟多个并发会话，每个会话循环执行：
+修改侧边栏宏观输入 → 点击「生成周期分析报告」→ 点击「生成深度解读」→ 下载报告。
+大模型由进程内的 recycle.mock_llm_server 替代；并发会话数逐级递增，统计各步骤的重跑延迟分位数、
+服务进程内存（每会话增量）与吞吐，并给出吞吐不再随并发增长的饱和点。
+
+    python -m recycle.session_loadtest --sessions 1 2 4 8 16 --duration 20
+    python -m recycle.session_loadtest --url http://127.0.0.1:8501 --pid 12345   # 压测已启动的服务
+
+缺省自动启动一个无界面的 streamlit 服务（运行时数据库与缓存指向临时目录）；
+压测已有服务时，需自行以 RECYCLE_LLM_BASE_URL 或 RECYCLE_LLM_BACKEND=fake 接入替身，
+并通过 --pid 指定服务进程以统计内存（仅 Linux）。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .mock_llm_server import MockLLMServer
+
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+
+STEPS = ('generate', 'llm', 'export')
+
+GENERATE_LABEL = '生成周期分析报告'
+LLM_LABEL = '生成深度解读'
+EXPORT_LABEL = '下载PDF报告'
+API_KEY_LABEL = 'OpenAI API Key'
+
+# 侧边栏数值输入（按标签前缀匹配）-> 情景字段
+SIDEBAR_FIELDS = {
+    'M1M2剪刀差': 'm1m2',
+    '房地产投资增速': 'investment',
+    '10年期国债收益率': 'bond_yield',
+    '贷款利率': 'mortgage_rate',
+    'LTV贷款价值比': 'ltv',
+    '租售比': 'rent_yield',
+}
+
+# 吞吐增幅低于该比例时视为饱和
+SATURATION_GAIN = 0.1
+
+# 脚本正常结束的状态（FINISHED_SUCCESSFULLY / FINISHED_FRAGMENT_RUN_SUCCESSFULLY）
+_FINISHED = {0, 3}
+_COMPILE_ERROR = 1
+
+
+def _scenarios(variety, seed):
+    """生成 variety 种不同的侧边栏输入（variety 越小，计算缓存与 AI 解读缓存命中率越高）"""
+    rng = random.Random(seed)
+    return [
+        {
+            'm1m2': round(rng.uniform(-15, 0), 1),
+            'investment': round(rng.uniform(-15, 5), 1),
+            'bond_yield': round(rng.uniform(1.5, 3.0), 2),
+            'mortgage_rate': round(rng.uniform(3, 5), 2),
+            'ltv': round(rng.choice([0.5, 0.6, 0.7, 0.8]), 2),
+            'rent_yield': round(rng.uniform(1.5, 3.5), 2),
+        }
+        for _ in range(variety)
+    ]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def read_rss(pid):
+    """进程常驻内存（字节），读取 /proc，非 Linux 返回 None"""
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _http_get(url, timeout=30):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return len(response.read())
+
+
+class SessionError(RuntimeError):
+    """会话运行出错（脚本异常、找不到控件或超时）"""
+
+
+class Session:
+    """一个模拟的浏览器会话：维护控件表、已缓存消息摘要，并按协议触发重跑"""
+
+    def __init__(self, base_url, timeout=60.0):
+        self.base_url = base_url.rstrip('/')
+        parts = urlsplit(self.base_url)
+        self.ws_url = f"{'wss' if parts.scheme == 'https' else 'ws'}://{parts.netloc}{parts.path}/_stcore/stream"
+        self.timeout = timeout
+        self.ws = None
+        self.page_script_hash = ''
+        self.widgets = {}
+        self.cached_hashes = set()
+        self.bytes_received = 0
+
+    async def connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.ws_url, max_size=None)
+        return await self.rerun()
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def widget(self, kind, label):
+        for (widget_kind, widget_label), proto in self.widgets.items():
+            if widget_kind == kind and label in widget_label:
+                return proto
+        raise SessionError(f'页面中没有找到控件 {kind}「{label}」')
+
+    async def rerun(self, states=()):
+        """发送一次重跑请求（states 为 WidgetState 关键字参数列表），等待脚本结束，返回耗时"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        message = BackMsg()
+        client = message.rerun_script
+        client.query_string = ''
+        client.page_script_hash = self.page_script_hash
+        client.cached_message_hashes.extend(sorted(self.cached_hashes))
+        for state in states:
+            client.widget_states.widgets.add(**state)
+
+        start = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+        await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        return time.perf_counter() - start
+
+    async def _read_until_finished(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        widgets, errors = {}, []
+        while True:
+            raw = await self.ws.recv()
+            self.bytes_received += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof('type')
+            if msg.metadata.cacheable and msg.hash:
+                self.cached_hashes.add(msg.hash)
+
+            if kind == 'new_session':
+                self.page_script_hash = msg.new_session.page_script_hash
+                widgets = {}
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                element_kind = element.WhichOneof('type')
+                proto = getattr(element, element_kind)
+                if element_kind == 'exception':
+                    errors.append(proto.message)
+                elif getattr(proto, 'id', '') and hasattr(proto, 'label'):
+                    widgets[(element_kind, proto.label)] = proto
+            elif kind == 'script_finished':
+                status = msg.script_finished
+                if status == _COMPILE_ERROR:
+                    raise SessionError('app.py 编译失败')
+                if status in _FINISHED:
+                    self.widgets = widgets
+                    if errors:
+                        raise SessionError(f'脚本异常: {errors[0]}')
+                    return
+
+    def input_states(self, scenario, api_key=None):
+        """侧边栏数值输入（及 API Key）的控件状态"""
+        states = []
+        for (kind, label), proto in self.widgets.items():
+            if kind == 'number_input':
+                field = next((f for prefix, f in SIDEBAR_FIELDS.items() if label.startswith(prefix)), None)
+                if field is not None:
+                    states.append({'id': proto.id, 'double_value': scenario[field]})
+            elif kind == 'text_input' and api_key and API_KEY_LABEL in label:
+                states.append({'id': proto.id, 'string_value': api_key})
+        return states
+
+    async def click(self, label, scenario, api_key=None):
+        button = self.widget('button', label)
+        return await self.rerun([*self.input_states(scenario, api_key), {'id': button.id, 'trigger_value': True}])
+
+    async def export(self):
+        """下载报告（按下载按钮的媒体文件地址请求）"""
+        button = self.widget('download_button', EXPORT_LABEL)
+        if not button.url:
+            raise SessionError('下载按钮没有文件地址')
+        start = time.perf_counter()
+        self.bytes_received += await asyncio.to_thread(_http_get, f'{self.base_url}{button.url}', self.timeout)
+        return time.perf_counter() - start
+
+
+async def run_flow(session, scenario, latencies, think=0.0, llm=True, api_key='sk-loadtest'):
+    """一次完整流程：输入 → 生成报告 →（AI 解读）→ 导出，各步耗时追加到 latencies"""
+    latencies['generate'].append(await session.click(GENERATE_LABEL, scenario, api_key))
+    if llm:
+        await asyncio.sleep(think)
+        latencies['llm'].append(await session.click(LLM_LABEL, scenario, api_key))
+    await asyncio.sleep(think)
+    latencies['export'].append(await session.export())
+
+
+async def _session_loop(base_url, scenarios, deadline, latencies, errors, flows, think, llm, api_key, timeout, offset):
+    session = Session(base_url, timeout)
+    try:
+        latencies['connect'].append(await session.connect())
+        i = offset
+        while time.perf_counter() < deadline:
+            await run_flow(session, scenarios[i % len(scenarios)], latencies, think, llm, api_key)
+            i += 1
+            flows.append(time.perf_counter())
+            await asyncio.sleep(think)
+    except Exception as e:  # 脚本异常、超时、连接关闭等：记录后结束该会话
+        errors.append(repr(e))
+    finally:
+        await session.close()
+    return session.bytes_received
+
+
+def _percentiles(values):
+    values = sorted(values)
+
+    def pct(q):
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+    return {'count': len(values), 'p50_ms': pct(0.50), 'p95_ms': pct(0.95), 'p99_ms': pct(0.99)}
+
+
+async def run_level(base_url, sessions, duration, scenarios, think=0.2, llm=True, api_key='sk-loadtest',
+                    timeout=60.0, pid=None, sample_interval=0.5):
+    """以 sessions 个并发会话运行 duration 秒，返回该级别的统计"""
+    latencies, errors, flows = defaultdict(list), [], []
+    rss_before = read_rss(pid) if pid else None
+    rss_peak = rss_before
+
+    start = time.perf_counter()
+    deadline = start + duration
+    tasks = [
+        asyncio.create_task(_session_loop(base_url, scenarios, deadline, latencies, errors, flows,
+                                          think, llm, api_key, timeout, i))
+        for i in range(sessions)
+    ]
+    while pid and not all(task.done() for task in tasks):
+        await asyncio.sleep(sample_interval)
+        rss = read_rss(pid)
+        if rss is not None:
+            rss_peak = max(rss_peak or 0, rss)
+    received = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    reruns = sum(len(latencies[step]) for step in ('generate', 'llm'))
+    stats = {
+        'sessions': sessions,
+        'elapsed': elapsed,
+        'flows': len(flows),
+        'flows_per_s': len(flows) / elapsed,
+        'reruns_per_s': reruns / elapsed,
+        'bytes_per_session': sum(received) / sessions,
+        'steps': {step: _percentiles(latencies[step]) for step in ('connect', *STEPS) if latencies[step]},
+        'rerun': _percentiles(latencies['generate'] + latencies['llm']),
+        'errors': errors,
+    }
+    if rss_before is not None:
+        stats['rss_before'] = rss_before
+        stats['rss_peak'] = rss_peak
+        stats['rss_per_session'] = max(rss_peak - rss_before, 0) / sessions
+    return stats
+
+
+def saturation_point(levels, gain=SATURATION_GAIN):
+    """吞吐（每秒完成的流程数）增幅首次低于 gain 时的上一级并发数；始终在增长时返回 None"""
+    for previous, current in zip(levels, levels[1:]):
+        if current['flows_per_s'] < previous['flows_per_s'] * (1 + gain):
+            return previous['sessions']
+    return None
+
+
+class StreamlitServer:
+    """以子进程启动无界面的 streamlit 服务（运行时数据库与缓存指向 workdir）"""
+
+    def __init__(self, workdir, llm_base_url=None, port=None, app_path=APP_PATH):
+        self.port = port or _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        workdir = Path(workdir)
+        env = {
+            **os.environ,
+            'RECYCLE_STORE_DIR': str(workdir / 'store'),
+            'RECYCLE_CACHE_DIR': str(workdir / 'cache'),
+            'RECYCLE_LLM_CACHE': str(workdir / 'llm_cache.sqlite3'),
+            'RECYCLE_TOKEN_LEDGER': str(workdir / 'token_ledger.sqlite3'),
+        }
+        if llm_base_url:
+            env['RECYCLE_LLM_BASE_URL'] = llm_base_url
+            env.pop('RECYCLE_LLM_BACKEND', None)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', str(app_path),
+             '--server.headless', 'true', '--server.port', str(self.port),
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=str(Path(app_path).parent),
+        )
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def wait_ready(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'streamlit 服务启动失败（退出码 {self.process.returncode}）')
+            try:
+                urllib.request.urlopen(f'{self.url}/_stcore/health', timeout=2).read()
+                return self
+            except OSError:
+                time.sleep(0.3)
+        raise RuntimeError('等待 streamlit 服务启动超时')
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+async def run_load(base_url, levels=(1, 2, 4, 8), duration=20.0, variety=20, think=0.2, llm=True,
+                   timeout=60.0, pid=None, seed=0, log=print):
+    """逐级递增并发会话数压测，返回 {levels: [...], saturation: 并发数或 None}"""
+    scenarios = _scenarios(variety, seed)
+
+    # 预热：首个流程承担模块导入、组件注册与图表库加载，不计入统计
+    warm = Session(base_url, timeout)
+    try:
+        await warm.connect()
+        await run_flow(warm, scenarios[0], defaultdict(list), llm=llm)
+    finally:
+        await warm.close()
+
+    results = []
+    for sessions in levels:
+        stats = await run_level(base_url, sessions, duration, scenarios, think, llm, timeout=timeout, pid=pid)
+        results.append(stats)
+        log(format_level(stats))
+    return {'levels': results, 'saturation': saturation_point(results)}
+
+
+def format_level(stats):
+    rerun = stats['rerun']
+    line = (
+        f"{stats['sessions']:>4} 会话  {stats['flows_per_s']:>6.2f} 流程/秒  {stats['reruns_per_s']:>6.2f} 重跑/秒  "
+        f"重跑 p50 {rerun['p50_ms']:>7.0f} ms · p95 {rerun['p95_ms']:>7.0f} ms · p99 {rerun['p99_ms']:>7.0f} ms"
+    )
+    if 'rss_per_session' in stats:
+        line += f"  内存 {stats['rss_peak'] / 2**20:.0f} MB（每会话 +{stats['rss_per_session'] / 2**20:.1f} MB）"
+    if stats['errors']:
+        line += f"  错误 {len(stats['errors'])}"
+    return line
+
+
+def format_steps(stats):
+    return '\n'.join(
+        f"      {step:<9} n={s['count']:<5} p50 {s['p50_ms']:>7.0f} ms · p95 {s['p95_ms']:>7.0f} ms · p99 {s['p99_ms']:>7.0f} ms"
+        for step, s in stats['steps'].items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='界面多会话压测')
+    parser.add_argument('--url', default=None, help='压测已启动的服务；缺省自动启动并在结束后关闭')
+    parser.add_argument('--pid', type=int, default=None, help='--url 对应的服务进程号（用于统计内存）')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8], help='逐级压测的并发会话数')
+    parser.add_argument('--duration', type=float, default=20.0, help='每级持续秒数')
+    parser.add_argument('--variety', type=int, default=20, help='不同输入情景的数量（控制缓存命中率）')
+    parser.add_argument('--think', type=float, default=0.2, help='每步之间的思考时间（秒）')
+    parser.add_argument('--no-llm', dest='llm', action='store_false', help='跳过 AI 解读步骤')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='替身大模型每个请求的延迟（秒）')
+    parser.add_argument('--llm-chunk-delay', type=float, default=0.0, help='替身大模型流式返回每块之间的延迟（秒）')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单次重跑的超时秒数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None, help='结果另存为 JSON')
+    args = parser.parse_args()
+
+    mock = MockLLMServer(latency=args.llm_latency, chunk_delay=args.llm_chunk_delay, seed=args.seed).start()
+    server = None
+    try:
+        with tempfile.TemporaryDirectory(prefix='recycle-loadtest-') as workdir:
+            if args.url:
+                base_url, pid = args.url, args.pid
+            else:
+                server = StreamlitServer(workdir, llm_base_url=mock.base_url).wait_ready()
+                base_url, pid = server.url, server.pid
+                print(f'streamlit 服务 {base_url}（pid {pid}），替身大模型 {mock.base_url}')
+
+            result = asyncio.run(run_load(base_url, args.sessions, args.duration, args.variety, args.think,
+                                          args.llm, args.timeout, pid, args.seed))
+            if server is not None:
+                server.stop()
+                server = None
+    finally:
+        if server is not None:
+            server.stop()
+        mock.shutdown()
+
+    print()
+    for stats in result['levels']:
+        print(f"{stats['sessions']} 会话：")
+        print(format_steps(stats))
+        for error in stats['errors'][:3]:
+            print(f'      错误: {error}')
+    saturation = result['saturation']
+    if saturation is None:
+        print(f"\n吞吐随并发持续增长，{args.sessions[-1]} 个会话内未饱和")
+    else:
+        print(f"\n饱和点：约 {saturation} 个并发会话（再增加并发吞吐增幅低于 {SATURATION_GAIN * 100:.0f}%）")
+    result['llm_requests'] = dict(mock.counts)
+    if args.llm:
+        clicks = sum(stats['steps'].get('llm', {}).get('count', 0) for stats in result['levels'])
+        print(f"AI 解读 {clicks} 次，替身大模型实际请求 {mock.counts['requests']} 次（其余命中缓存）")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
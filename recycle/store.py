@@ -0,0 +1,185 @@
+"""
+本地指标时序库
+每个指标一个目录，按年份分区存放未压缩的 Arrow IPC（Feather v2）文件，读取时内存映射、零拷贝；
+index.json 记录各 (指标, 地区) 序列的最新日期与取值。追加只重写涉及的分区（通常仅最后一年）。
+
+目录结构：
+    <root>/index.json
+    <root>/<indicator>/<year>.arrow    列：date, region, value
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+DEFAULT_STORE_DIR = Path(os.environ.get('RECYCLE_STORE_DIR', Path.home() / '.local' / 'share' / 're-cycle' / 'store'))
+
+# 全国口径的地区名
+NATIONAL = '全国'
+
+SCHEMA = pa.schema([
+    ('date', pa.timestamp('ms')),
+    ('region', pa.string()),
+    ('value', pa.float64()),
+])
+
+INDEX_FILE = 'index.json'
+
+
+def _month_start(dates):
+    return pd.to_datetime(pd.Series(dates)).dt.to_period('M').dt.to_timestamp()
+
+
+class IndicatorStore:
+    """追加写入、内存映射读取的指标时序库（单写多读，同进程内写入互斥）"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._index = None
+
+    # ---- 索引 ----
+
+    @property
+    def index(self):
+        """{指标: {地区: {'date': 'YYYY-MM-DD', 'value': 最新值}}}"""
+        if self._index is None:
+            try:
+                self._index = json.loads((self.root / INDEX_FILE).read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _write_index(self):
+        path = self.root / INDEX_FILE
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def indicators(self):
+        return sorted(self.index)
+
+    def latest(self, indicator, region=NATIONAL):
+        """返回序列最新的 (日期, 取值)，无数据时为 None"""
+        entry = self.index.get(indicator, {}).get(region)
+        return (pd.Timestamp(entry['date']), entry['value']) if entry else None
+
+    def latest_values(self, region=NATIONAL):
+        """各指标在某地区的最新取值 {指标: 值}，只读索引、不触碰数据文件"""
+        return {
+            indicator: series[region]['value']
+            for indicator, series in self.index.items()
+            if region in series
+        }
+
+    # ---- 写入 ----
+
+    def _partition_path(self, indicator, year):
+        return self.root / indicator / f'{year}.arrow'
+
+    def _write_partition(self, path, table):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with pa.OSFile(str(tmp), 'wb') as sink:
+            with pa.ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+    def append(self, indicator, frame):
+        """
+        追加一个指标的数据，frame 需含 date、value 列，region 列可选（缺省为全国）
+
+        日期统一到月初；不晚于序列已有最新日期的行视为已入库而跳过（修订历史需重建该指标）。
+        返回实际写入的行数。
+        """
+        frame = pd.DataFrame({
+            'date': _month_start(frame['date']).to_numpy(),
+            'region': frame['region'].astype(str).to_numpy() if 'region' in frame else NATIONAL,
+            'value': pd.to_numeric(frame['value']).to_numpy(dtype='float64'),
+        })
+
+        with self._lock:
+            series_index = self.index.setdefault(indicator, {})
+            latest = frame['region'].map(lambda r: series_index.get(r, {}).get('date'))
+            latest = pd.to_datetime(latest)
+            new = frame[latest.isna() | (frame['date'] > latest)]
+            new = new.drop_duplicates(['region', 'date'], keep='last').sort_values(['date', 'region'])
+            if new.empty:
+                return 0
+
+            # 只重写本次涉及的年份分区
+            for year, part in new.groupby(new['date'].dt.year):
+                path = self._partition_path(indicator, year)
+                table = pa.Table.from_pandas(part, schema=SCHEMA, preserve_index=False)
+                if path.exists():
+                    table = pa.concat_tables([self._read_partition(path), table])
+                self._write_partition(path, table)
+
+            for region, rows in new.groupby('region'):
+                last = rows.iloc[-1]
+                series_index[region] = {'date': last['date'].strftime('%Y-%m-%d'), 'value': float(last['value'])}
+            self._write_index()
+        return len(new)
+
+    def append_observations(self, observations, region=NATIONAL):
+        """追加一批最新观测值 {指标: (日期, 取值)}，用于自动抓取后入库"""
+        written = 0
+        for indicator, (date, value) in observations.items():
+            written += self.append(indicator, pd.DataFrame({'date': [date], 'region': [region], 'value': [value]}))
+        return written
+
+    # ---- 读取 ----
+
+    @staticmethod
+    def _read_partition(path):
+        # 内存映射 + 未压缩 IPC：表的缓冲区直接引用映射页，不做解析与拷贝
+        return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+    def read_table(self, indicator, start=None, end=None, regions=None):
+        """读取指标为 Arrow 表（零拷贝），可按年份范围与地区过滤"""
+        directory = self.root / indicator
+        paths = sorted(directory.glob('*.arrow'), key=lambda p: int(p.stem)) if directory.exists() else []
+        start_year = pd.Timestamp(start).year if start is not None else None
+        end_year = pd.Timestamp(end).year if end is not None else None
+        tables = [
+            self._read_partition(p) for p in paths
+            if (start_year is None or int(p.stem) >= start_year) and (end_year is None or int(p.stem) <= end_year)
+        ]
+        if not tables:
+            return SCHEMA.empty_table()
+        table = pa.concat_tables(tables)
+
+        mask = None
+        if start is not None:
+            mask = pc.greater_equal(table['date'], pa.scalar(pd.Timestamp(start), pa.timestamp('ms')))
+        if end is not None:
+            cond = pc.less_equal(table['date'], pa.scalar(pd.Timestamp(end), pa.timestamp('ms')))
+            mask = cond if mask is None else pc.and_(mask, cond)
+        if regions is not None:
+            cond = pc.is_in(table['region'], value_set=pa.array(list(regions), pa.string()))
+            mask = cond if mask is None else pc.and_(mask, cond)
+        return table if mask is None else table.filter(mask)
+
+    def read_frame(self, indicator, start=None, end=None, regions=None):
+        """读取指标为 DataFrame（date, region, value）"""
+        return self.read_table(indicator, start, end, regions).to_pandas()
+
+    def load_panel(self, indicators, start=None, end=None, regions=None):
+        """
+        读取多个指标并按 (date, region) 对齐为宽表
+
+        输出列与 backtest.load_macro_series 的格式一致，可直接用于历史回测。
+        """
+        panel = None
+        for indicator in indicators:
+            frame = self.read_frame(indicator, start, end, regions).rename(columns={'value': indicator})
+            panel = frame if panel is None else panel.merge(frame, on=['date', 'region'], how='outer')
+        if panel is None:
+            return pd.DataFrame(columns=['date', 'region'])
+        return panel.sort_values(['region', 'date']).reset_index(drop=True)
@@ -0,0 +1,170 @@
+"""
+多周期叠加引擎
+库存（基钦）周期、朱格拉周期与人口周期在任意未来月数上逐月定位，按 core.CYCLE_WEIGHTS 合成综合得分，
+并给出各周期与综合曲线所处的阶段。整个展望期作为一个数组一次算出（周期 × 情景 × 月份广播），
+不逐月循环；周期参数可为标量或数组（批量情景），结果与 core.composite_state 逐月计算一致。
+
+叠加后的等效周期位置（或库存周期位置）再交给规则表批量求值，得到展望期内逐月的周期相位与六类资产信号。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .batch import ASSET_KEYS, SIGNAL_COLORS, calculate_asset_signals_batch, current_month_index
+from .core import CYCLE_MODES, CYCLE_WEIGHTS, cycle_errors
+from .rules import RULES
+
+
+# 参与叠加的周期（顺序即结果数组第一维）
+CYCLES = tuple(CYCLE_WEIGHTS)
+
+# 按波形符号与走向划分的阶段（编码即下标）
+REGIMES = ('扩张', '见顶回落', '收缩', '筑底回升')
+
+DEFAULT_HORIZON = 120
+
+# 单次展望的月数上限（100 年）
+MAX_HORIZON = 1200
+
+
+def horizon_months(horizon, now=None, month_index=None):
+    """从评估月份起连续 horizon 个月的月份序号（以 2026 年为基准，与 calculate_cycles 口径一致）"""
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"展望月数须在 1 ~ {MAX_HORIZON} 之间: {horizon}")
+    start = current_month_index(now) if month_index is None else month_index
+    return start + np.arange(horizon)
+
+
+def month_labels(months):
+    """月份序号 -> 'YYYY-MM' 标签数组"""
+    months = np.asarray(months)
+    years = 2026 + (months - 1) // 12
+    return np.char.add(np.char.add(years.astype(str), '-'), np.char.zfill(((months - 1) % 12 + 1).astype(str), 2))
+
+
+def _regimes(wave, slope):
+    """按波形符号与斜率符号编码阶段：扩张 0 / 见顶回落 1 / 收缩 2 / 筑底回升 3"""
+    rising = slope >= 0
+    return np.where(wave >= 0, np.where(rising, 0, 1), np.where(rising, 3, 2)).astype(np.int8)
+
+
+def _check_lengths(lengths):
+    """逐字段取第一个无效的周期长度，按 core.cycle_errors 的口径报错"""
+    errors = []
+    for field, values in lengths.items():
+        bad = values[~(np.isfinite(values) & (values > 0))]
+        if bad.size:
+            errors.extend(cycle_errors({field: float(bad.flat[0])}, (field,)))
+    if errors:
+        raise ValueError('；'.join(errors))
+
+
+def superpose(params, horizon=DEFAULT_HORIZON, now=None, month_index=None, weights=None):
+    """
+    计算展望期内三个周期的逐月位置与叠加结果
+
+    params 需包含 inventory / juglar / population（年，标量或同形状数组，形状记为 S）。
+    返回数组字典（H 为展望月数）：
+        month_index        (H,)        月份序号
+        position / wave    (3, *S, H)  各周期位置（0~1）与波形 -sin(2π·位置)
+        regime_code        (3, *S, H)  各周期所处阶段（REGIMES 下标）
+        composite          (*S, H)     综合得分（-1 ~ 1）
+        composite_position (*S, H)     叠加后的等效周期位置（0~1），可直接用于规则表判定
+        coherence          (*S, H)     同步度（0~1，各周期同相时为 1）
+        composite_regime   (*S, H)     综合曲线所处阶段
+
+    任一周期长度（含批量情景中的任一条）不是有限正数时抛出 ValueError，信息与 core.check_cycles 一致。
+    """
+    weights = weights or CYCLE_WEIGHTS
+    months = horizon_months(horizon, now=now, month_index=month_index)
+    lengths = {field: np.asarray(params[field], dtype=np.float64) for field in CYCLES}
+    _check_lengths(lengths)
+    periods = np.stack(np.broadcast_arrays(*(lengths[field] * 12 for field in CYCLES)))
+    periods = periods[..., None]
+    w = np.array([weights.get(field, 0.0) for field in CYCLES], dtype=np.float64)
+    w = (w / w.sum()).reshape((len(CYCLES),) + (1,) * (periods.ndim - 1))
+
+    position = np.mod(months, periods) / periods
+    angle = 2 * np.pi * position
+    sin, cos = np.sin(angle), np.cos(angle)
+    wave = -sin
+    # 波形对时间的导数 -cos(2πp)·2π/周期，只取符号判断走向
+    slope = -cos / periods
+
+    composite = (w * wave).sum(axis=0)
+    quadrature = -(w * cos).sum(axis=0)
+    composite_position = np.mod(np.arctan2(-composite, -quadrature) / (2 * np.pi), 1.0)
+    composite_position[composite_position >= 1.0] = 0.0
+
+    return {
+        'month_index': months,
+        'position': position,
+        'wave': wave,
+        'regime_code': _regimes(wave, slope),
+        'composite': composite,
+        'composite_position': composite_position,
+        'coherence': np.hypot(composite, quadrature),
+        'composite_regime': _regimes(composite, (w * slope).sum(axis=0)),
+    }
+
+
+def signal_path(result, scenarios, mode='composite'):
+    """
+    展望期内逐月的周期相位与六类资产信号
+
+    result 为 superpose 的返回值；scenarios 需包含 rent_yield / population（标量或形状 S 的数组）；
+    mode 为周期定位口径（见 core.CYCLE_MODES），composite 时按等效位置判定，否则按库存周期位置。
+    返回 {'phase_code': (*S, H), <资产键>: {'branch', 'signal_code', 'confidence'}}。
+    """
+    if mode not in CYCLE_MODES:
+        raise ValueError(f"未知的周期定位口径: {mode}")
+    position = result['composite_position'] if mode == 'composite' else result['position'][0]
+    # 情景维度在前、月份维度在后，标量与数组输入都补出月份轴再广播
+    columns = {field: np.asarray(scenarios[field], dtype=np.float64)[..., None] for field in ('rent_yield', 'population')}
+    path = calculate_asset_signals_batch(position, columns)
+    path['phase_code'] = np.broadcast_to(RULES.cycles['phase'].codes({'cycle_position': position}), position.shape)
+    return path
+
+
+def _runs(codes):
+    """一维编码序列的连续区段：(起点, 终点（不含）, 编码) 数组"""
+    codes = np.asarray(codes)
+    starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    ends = np.append(starts[1:], len(codes))
+    return starts, ends, codes[starts]
+
+
+def signal_outlook(path, months):
+    """
+    单一情景的信号展望：每类资产一行（索引为资产键）
+
+    列：signal（当前信号）、next_month / next_signal（下一次信号变化的月份与变化后的信号，
+    展望期内不变时为空）、green / yellow / red（展望期内各信号的月数占比）。
+    """
+    labels = month_labels(months)
+    rows = []
+    for key in ASSET_KEYS:
+        codes = np.asarray(path[key]['signal_code'])
+        starts, _, values = _runs(codes)
+        shares = np.bincount(codes, minlength=len(SIGNAL_COLORS)) / len(codes)
+        rows.append({
+            'signal': SIGNAL_COLORS[codes[0]],
+            'next_month': labels[starts[1]] if len(starts) > 1 else '',
+            'next_signal': SIGNAL_COLORS[values[1]] if len(starts) > 1 else '',
+            **dict(zip(SIGNAL_COLORS, shares.tolist())),
+        })
+    return pd.DataFrame(rows, index=pd.Index(ASSET_KEYS, name='asset'))
+
+
+def composite_frame(result):
+    """单一情景的逐月叠加结果表：month、各周期位置与阶段、composite、composite_position、coherence、regime"""
+    frame = {'month': month_labels(result['month_index'])}
+    for i, field in enumerate(CYCLES):
+        frame[f'{field}_position'] = result['position'][i]
+        frame[f'{field}_regime'] = pd.Categorical.from_codes(result['regime_code'][i], categories=list(REGIMES))
+    frame['composite'] = result['composite']
+    frame['composite_position'] = result['composite_position']
+    frame['coherence'] = result['coherence']
+    frame['regime'] = pd.Categorical.from_codes(result['composite_regime'], categories=list(REGIMES))
+    return pd.DataFrame(frame)
+
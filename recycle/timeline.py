@@ -0,0 +1,295 @@
+"""
+资产配置时序图（轻量渲染）
+所有甘特条合并为一个向量化的 Bar 轨迹，三底时间点用 layout.shapes 表示；标题、坐标轴、图例等
+静态布局按季度窗口缓存为模板，每次只生成数据数组，行数到数百行时图表定义仍然很小。
+输出为纯字典形式的 Plotly 图表定义（不依赖 plotly 包），内容只由输入决定：数据未变化时
+序列化结果逐字节一致，Streamlit 重跑时可按摘要复用已发送到浏览器的消息，只传输变化的图表。
+"""
+
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from .core import SIGNAL_HEX
+
+
+# 信号图例（配色见 core.SIGNAL_HEX，与原甘特图一致）
+LEGEND = (('green', '上涨/配置期'), ('yellow', '横盘/观望期'), ('red', '下跌/出清期'))
+
+# 三底标记：(字段, 名称, 颜色)
+BOTTOM_MARKERS = (
+    ('policy_bottom', '政策底', '#3b82f6'),
+    ('credit_bottom', '信用底', '#f97316'),
+    ('market_bottom', '市场底', '#22c55e'),
+)
+
+# 时间轴覆盖的季度数
+WINDOW = 12
+
+DEFAULT_TITLE = '📊 房地产周期资产配置时序图（2026Q1-2028Q4）'
+
+# 每行甘特条的高度（像素），行数较多时图表随之增高
+ROW_HEIGHT = 26
+
+
+def quarter_labels(now=None, count=WINDOW):
+    """从当前季度起的 count 个季度标签（YYYYQn）"""
+    now = now or datetime.now()
+    quarters = []
+    for i in range(count):
+        q_num = (now.month - 1) // 3 + 1 + i
+        year_offset = (q_num - 1) // 4
+        quarters.append(f"{now.year + year_offset}Q{q_num - year_offset * 4}")
+    return tuple(quarters)
+
+
+def _quarter_index(values, quarters, default):
+    """季度标签 -> 时间轴下标（不在窗口内时取 default），按数组批量查找"""
+    values = np.asarray(values, dtype=object).astype(str)
+    axis = np.asarray(quarters)
+    pos = np.searchsorted(axis, values).clip(0, len(axis) - 1)
+    return np.where(axis[pos] == values, pos, default)
+
+
+def bar_spans(signals, credit_bottom, market_bottom, quarters):
+    """
+    按信号计算每行甘特条的起止下标（与原甘特图规则一致）
+
+    绿：市场底起 5 个季度；黄：信用底起 4 个季度；红：从窗口起点到市场底。
+    credit_bottom / market_bottom 可为标量（单一情景）或与 signals 等长的数组（多地区）。
+    """
+    signals = np.asarray(signals, dtype=object).astype(str)
+    n = len(quarters)
+    credit = np.broadcast_to(_quarter_index(np.atleast_1d(credit_bottom), quarters, 3), signals.shape)
+    market = np.broadcast_to(_quarter_index(np.atleast_1d(market_bottom), quarters, 2), signals.shape)
+    market_end = np.broadcast_to(_quarter_index(np.atleast_1d(market_bottom), quarters, 6), signals.shape)
+
+    start = np.select([signals == 'green', signals == 'yellow'], [market, credit], default=0)
+    end = np.select(
+        [signals == 'green', signals == 'yellow'],
+        [np.minimum(market + 5, n), np.minimum(credit + 4, n)],
+        default=np.minimum(market_end, n),
+    )
+    return start, end
+
+
+@lru_cache(maxsize=32)
+def layout_template(quarters, title=DEFAULT_TITLE):
+    """静态布局模板（按季度窗口与标题缓存，调用方只读不改）"""
+    legend = [
+        {
+            'x': 0.5 + (i - 1) * 0.18, 'y': -0.16, 'xref': 'paper', 'yref': 'paper',
+            'xanchor': 'center', 'yanchor': 'top', 'showarrow': False,
+            'text': f"<span style='color:{SIGNAL_HEX[color]}'>●</span> {label}",
+            'font': {'color': '#94a3b8', 'size': 12},
+        }
+        for i, (color, label) in enumerate(LEGEND)
+    ]
+    return {
+        'title': {'text': title, 'font': {'color': '#f1f5f9', 'size': 18}, 'x': 0.5},
+        'xaxis': {
+            'title': {'text': '时间', 'font': {'color': '#94a3b8'}},
+            'tickmode': 'array',
+            'tickvals': list(range(len(quarters))),
+            'ticktext': list(quarters),
+            'range': [-0.5, len(quarters) - 0.5],
+            'tickfont': {'color': '#94a3b8'},
+            'gridcolor': '#334155',
+            'zerolinecolor': '#334155',
+        },
+        'yaxis': {
+            'title': {'text': ''},
+            'type': 'category',
+            'tickfont': {'color': '#94a3b8'},
+            'gridcolor': '#334155',
+            'zerolinecolor': '#334155',
+        },
+        'paper_bgcolor': '#0f172a',
+        'plot_bgcolor': '#1e293b',
+        'font': {'color': '#e2e8f0'},
+        'margin': {'l': 20, 'r': 20, 't': 60, 'b': 70},
+        'showlegend': False,
+        'bargap': 0.25,
+        'annotations': tuple(legend),
+    }
+
+
+def _bottom_shapes(bottoms, quarters):
+    """三底时间点的竖直虚线与标注"""
+    index = {q: i for i, q in enumerate(quarters)}
+    shapes, annotations = [], []
+    for i, (field, label, color) in enumerate(BOTTOM_MARKERS):
+        x = index.get(bottoms.get(field))
+        if x is None:
+            continue
+        shapes.append({
+            'type': 'line', 'xref': 'x', 'yref': 'paper', 'x0': x, 'x1': x, 'y0': 0, 'y1': 1,
+            'line': {'color': color, 'width': 2, 'dash': 'dash'},
+        })
+        annotations.append({
+            'x': x, 'y': 1 - i * 0.05, 'xref': 'x', 'yref': 'paper', 'showarrow': False,
+            'text': label, 'font': {'color': color, 'size': 12},
+        })
+    return shapes, annotations
+
+
+def gantt_figure(labels, signals, actions, confidences, credit_bottom, market_bottom,
+                 bottoms=None, quarters=None, title=DEFAULT_TITLE, height=None):
+    """
+    构建单轨迹甘特图定义（Plotly figure 字典）
+
+    labels / signals / actions / confidences 为逐行数组；bottoms 为 {policy/credit/market_bottom: 季度}
+    时绘制三底竖线（单一情景），多地区各行三底不同时传 None。
+    """
+    quarters = tuple(quarters or quarter_labels())
+    start, end = bar_spans(signals, credit_bottom, market_bottom, quarters)
+    signals = np.asarray(signals, dtype=object).astype(str)
+    colors = np.vectorize(SIGNAL_HEX.get, otypes=[object])(signals, SIGNAL_HEX['red'])
+    percents = np.char.add(np.round(np.asarray(confidences, dtype=np.float64) * 100).astype(int).astype(str), '%')
+    actions = np.asarray(actions, dtype=object).astype(str)
+
+    trace = {
+        'type': 'bar',
+        'orientation': 'h',
+        'y': np.asarray(labels, dtype=object).astype(str).tolist(),
+        'x': (end - start).tolist(),
+        'base': start.tolist(),
+        'marker': {'color': colors.tolist()},
+        'text': actions.tolist(),
+        'textposition': 'inside',
+        'insidetextanchor': 'middle',
+        'textfont': {'color': 'white', 'size': 10},
+        'customdata': np.column_stack([actions, percents]).tolist(),
+        'hovertemplate': '%{y}<br>状态: %{customdata[0]}<br>置信度: %{customdata[1]}<extra></extra>',
+    }
+
+    template = layout_template(quarters, title)
+    shapes, annotations = _bottom_shapes(bottoms, quarters) if bottoms else ([], [])
+    layout = {
+        **template,
+        'height': height or max(400, ROW_HEIGHT * len(trace['y']) + 140),
+        'shapes': shapes,
+        'annotations': list(template['annotations']) + annotations,
+    }
+    return {'data': [trace], 'layout': layout}
+
+
+def scenario_gantt(cycle_data, signals, asset_labels, now=None):
+    """单一情景：每类资产一行，并标出三底时间点"""
+    keys = list(asset_labels)
+    rows = [signals.get(key, {'signal': 'red', 'action': '', 'confidence': 0.0}) for key in keys]
+    return gantt_figure(
+        [asset_labels[key] for key in keys],
+        [row['signal'] for row in rows],
+        [row['action'] for row in rows],
+        [row['confidence'] for row in rows],
+        cycle_data['credit_bottom'],
+        cycle_data['market_bottom'],
+        bottoms=cycle_data,
+        quarters=quarter_labels(now),
+    )
+
+
+def regions_gantt(result, asset_key, label_column='region', now=None, title=None):
+    """多地区：某类资产每个地区一行（result 为 analyze_regions 的结果或其分页）"""
+    return gantt_figure(
+        result[label_column].to_numpy(),
+        result[f'{asset_key}_signal'].to_numpy(),
+        result[f'{asset_key}_action'].to_numpy(),
+        result[f'{asset_key}_confidence'].to_numpy(),
+        result['credit_bottom'].to_numpy(),
+        result['market_bottom'].to_numpy(),
+        quarters=quarter_labels(now),
+        title=title or DEFAULT_TITLE,
+    )
+
+
+# 多周期叠加展望图：各周期波形颜色与综合曲线阶段底色（扩张 / 见顶回落 / 收缩 / 筑底回升）
+CYCLE_LINE_COLORS = ('#38bdf8', '#a78bfa', '#f472b6')
+
+REGIME_COLORS = ('#10b981', '#f59e0b', '#ef4444', '#3b82f6')
+
+HORIZON_TITLE = '🌊 多周期叠加展望'
+
+# 逐月信号色带：编码 0/1/2 对应 green/yellow/red
+_SIGNAL_HEXCALE = [
+    [0.0, SIGNAL_HEX['green']], [1 / 3, SIGNAL_HEX['green']],
+    [1 / 3, SIGNAL_HEX['yellow']], [2 / 3, SIGNAL_HEX['yellow']],
+    [2 / 3, SIGNAL_HEX['red']], [1.0, SIGNAL_HEX['red']],
+]
+
+
+def _regime_shapes(months, regimes, regime_names):
+    """综合曲线阶段的连续区段：底色矩形与图例标注"""
+    regimes = np.asarray(regimes)
+    starts = np.concatenate(([0], np.flatnonzero(regimes[1:] != regimes[:-1]) + 1))
+    ends = np.append(starts[1:], len(regimes)) - 1
+    shapes = [
+        {
+            'type': 'rect', 'xref': 'x', 'yref': 'y', 'x0': months[start], 'x1': months[end],
+            'y0': -1.05, 'y1': 1.05, 'fillcolor': REGIME_COLORS[code], 'opacity': 0.12, 'line': {'width': 0},
+            'layer': 'below',
+        }
+        for start, end, code in zip(starts.tolist(), ends.tolist(), regimes[starts].tolist())
+    ]
+    legend = [
+        {
+            'x': 0.5 + (i - 1.5) * 0.14, 'y': -0.1, 'xref': 'paper', 'yref': 'paper',
+            'xanchor': 'center', 'yanchor': 'top', 'showarrow': False,
+            'text': f"<span style='color:{REGIME_COLORS[i]}'>■</span> {name}",
+            'font': {'color': '#94a3b8', 'size': 12},
+        }
+        for i, name in enumerate(regime_names)
+    ]
+    return shapes, legend
+
+
+def horizon_figure(months, waves, composite, regimes, regime_names, signal_codes, title=HORIZON_TITLE):
+    """
+    构建多周期叠加展望图定义（Plotly figure 字典）
+
+    上方为各周期波形与综合得分，按综合曲线所处阶段分段铺底色；下方为各类资产逐月信号色带。
+    months 为 'YYYY-MM' 标签；waves 为 {周期名称: 逐月波形}；regimes 为综合曲线逐月阶段编码；
+    signal_codes 为 {资产名称: 逐月信号编码（green/yellow/red 为 0/1/2）}。
+    """
+    months = [f'{month}-01' for month in np.asarray(months).astype(str).tolist()]
+    traces = [
+        {
+            'type': 'scatter', 'mode': 'lines', 'name': name, 'x': months,
+            'y': np.round(np.asarray(wave, dtype=np.float64), 4).tolist(),
+            'line': {'color': CYCLE_LINE_COLORS[i % len(CYCLE_LINE_COLORS)], 'width': 1.2, 'dash': 'dot'},
+            'hovertemplate': f'{name}<br>%{{x|%Y-%m}}: %{{y:.2f}}<extra></extra>',
+        }
+        for i, (name, wave) in enumerate(waves.items())
+    ]
+    traces.append({
+        'type': 'scatter', 'mode': 'lines', 'name': '综合得分', 'x': months,
+        'y': np.round(np.asarray(composite, dtype=np.float64), 4).tolist(),
+        'line': {'color': '#f1f5f9', 'width': 3},
+        'hovertemplate': '综合得分<br>%{x|%Y-%m}: %{y:.2f}<extra></extra>',
+    })
+    traces.append({
+        'type': 'heatmap', 'x': months, 'y': list(signal_codes), 'yaxis': 'y2',
+        'z': np.stack([np.asarray(codes, dtype=np.int8) for codes in signal_codes.values()]).tolist(),
+        'zmin': -0.5, 'zmax': 2.5, 'colorscale': _SIGNAL_HEXCALE, 'showscale': False, 'xgap': 0, 'ygap': 2,
+        'hovertemplate': '%{y}<br>%{x|%Y-%m}<extra></extra>',
+    })
+
+    shapes, legend = _regime_shapes(months, regimes, regime_names)
+    axis = {'tickfont': {'color': '#94a3b8'}, 'gridcolor': '#334155', 'zerolinecolor': '#475569'}
+    layout = {
+        'title': {'text': title, 'font': {'color': '#f1f5f9', 'size': 18}, 'x': 0.5},
+        'xaxis': {**axis, 'type': 'date', 'tickformat': '%Y', 'dtick': 'M12' if len(months) <= 240 else 'M60'},
+        'yaxis': {**axis, 'domain': [0.4, 1.0], 'range': [-1.05, 1.05], 'title': {'text': '周期波形', 'font': {'color': '#94a3b8'}}},
+        'yaxis2': {**axis, 'domain': [0.0, 0.32], 'anchor': 'x', 'type': 'category', 'autorange': 'reversed'},
+        'paper_bgcolor': '#0f172a',
+        'plot_bgcolor': '#1e293b',
+        'font': {'color': '#e2e8f0'},
+        'margin': {'l': 20, 'r': 20, 't': 60, 'b': 80},
+        'legend': {'orientation': 'h', 'x': 0.5, 'xanchor': 'center', 'y': 1.08, 'font': {'color': '#94a3b8'}},
+        'height': 560,
+        'shapes': shapes,
+        'annotations': legend,
+    }
+    return {'data': traces, 'layout': layout}
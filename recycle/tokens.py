@@ -0,0 +1,259 @@
+"""
+Token 计量与预算
+估算提示词 token、记录每次调用的提示 / 回复 token 与耗时（SQLite 台账，跨进程共享），
+并执行单次请求与每日的 token 预算；按提示词模式汇总，对比精简模式相对完整模板的节省。
+
+    python -m recycle.tokens            # 台账汇总与节省报告
+    python -m recycle.tokens --compare  # 用样例情景实测两种模式
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .datasources import DEFAULT_CACHE_DIR
+
+
+DEFAULT_PATH = Path(os.environ.get('RECYCLE_TOKEN_LEDGER', DEFAULT_CACHE_DIR / 'token_ledger.sqlite3'))
+
+# 预算（token 数），未设置时不限制
+REQUEST_BUDGET_ENV = 'RECYCLE_TOKEN_BUDGET_REQUEST'
+DAILY_BUDGET_ENV = 'RECYCLE_TOKEN_BUDGET_DAY'
+
+# 单次预算压缩回复上限后，回复至少要保留的 token 数
+MIN_COMPLETION_TOKENS = 200
+
+# 每条消息的格式开销（角色标记等）
+MESSAGE_OVERHEAD = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    latency REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS token_usage_day ON token_usage (day);
+"""
+
+
+class TokenBudgetError(Exception):
+    """请求超出单次或每日 token 预算"""
+
+
+_encoding = None
+
+
+def _tiktoken():
+    """可选依赖 tiktoken：已安装时按 cl100k_base 精确计数"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """文本 token 数；未安装 tiktoken 时按 中文一字一个、其余四个字符一个 估算"""
+    encoding = _tiktoken()
+    if encoding:
+        return len(encoding.encode(text))
+    cjk = len(re.findall(r'[\u3000-\u9fff\uff00-\uffef]', text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def message_tokens(messages):
+    """对话消息的提示词 token 数"""
+    return sum(count_tokens(m['content']) + MESSAGE_OVERHEAD for m in messages) + 3
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class TokenLedger:
+    """
+    Token 台账与预算
+
+    request_budget: 单次请求 提示词 + 回复上限 的 token 数，超出时压缩回复上限，压缩后不足
+                    MIN_COMPLETION_TOKENS 则拒绝
+    daily_budget:   当日（本地日期）累计 token 数上限，已用量 + 本次预占超出时拒绝
+    """
+
+    def __init__(self, path=DEFAULT_PATH, request_budget=None, daily_budget=None):
+        self.path = Path(path)
+        self.request_budget = request_budget if request_budget is not None else _env_int(REQUEST_BUDGET_ENV)
+        self.daily_budget = daily_budget if daily_budget is not None else _env_int(DAILY_BUDGET_ENV)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def used_today(self, day=None):
+        day = day or date.today().isoformat()
+        with self._lock:
+            (total,) = self._conn.execute(
+                'SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM token_usage WHERE day = ?', (day,)
+            ).fetchone()
+        return total
+
+    def plan(self, messages, max_tokens):
+        """
+        检查预算并返回 (提示词 token 数, 实际使用的回复上限)
+
+        每日预算按已记录用量计，并发请求之间不互相预占，可能略微超出。
+        """
+        prompt_tokens = message_tokens(messages)
+        if self.request_budget is not None and prompt_tokens + max_tokens > self.request_budget:
+            max_tokens = self.request_budget - prompt_tokens
+            if max_tokens < MIN_COMPLETION_TOKENS:
+                raise TokenBudgetError(
+                    f"提示词 {prompt_tokens} tokens，超出单次预算 {self.request_budget}"
+                )
+        if self.daily_budget is not None:
+            used = self.used_today()
+            if used + prompt_tokens + max_tokens > self.daily_budget:
+                raise TokenBudgetError(f"今日 token 预算不足（已用 {used} / {self.daily_budget}）")
+        return prompt_tokens, max_tokens
+
+    def record(self, prompt_tokens, completion_tokens, latency, mode='full', model='', source='app', now=None):
+        now = time.time() if now is None else now
+        day = datetime.fromtimestamp(now).date().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO token_usage (day, ts, source, mode, model, prompt_tokens, completion_tokens, latency) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (day, now, source, mode, model, int(prompt_tokens), int(completion_tokens), float(latency))
+            )
+
+    def frame(self, since=None, source=None):
+        """台账明细 DataFrame（since 为起始时间戳）"""
+        query = 'SELECT * FROM token_usage WHERE ts >= ?'
+        args = [since or 0]
+        if source is not None:
+            query += ' AND source = ?'
+            args.append(source)
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=args)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM token_usage')
+
+
+def usage_by_mode(usage):
+    """按提示词模式汇总：调用次数、平均提示 / 回复 token、平均与 P95 耗时"""
+    if usage.empty:
+        return pd.DataFrame(columns=['calls', 'prompt_tokens', 'completion_tokens', 'total_tokens',
+                                     'latency_mean', 'latency_p95'])
+    grouped = usage.groupby('mode')
+    summary = pd.DataFrame({
+        'calls': grouped.size(),
+        'prompt_tokens': grouped['prompt_tokens'].mean(),
+        'completion_tokens': grouped['completion_tokens'].mean(),
+        'latency_mean': grouped['latency'].mean(),
+        'latency_p95': grouped['latency'].quantile(0.95),
+    })
+    summary.insert(3, 'total_tokens', summary['prompt_tokens'] + summary['completion_tokens'])
+    return summary
+
+
+def savings_report(usage):
+    """
+    精简模式相对完整模板的节省（按单次平均值计）
+
+    返回 {指标: (完整模板, 精简模式, 节省比例)}；任一模式无记录时返回空字典。
+    """
+    summary = usage_by_mode(usage)
+    if not {'full', 'compact'} <= set(summary.index):
+        return {}
+    report = {}
+    for column in ('prompt_tokens', 'completion_tokens', 'total_tokens', 'latency_mean', 'latency_p95'):
+        full, compact = summary.at['full', column], summary.at['compact', column]
+        report[column] = (full, compact, 1 - compact / full if full else 0.0)
+    return report
+
+
+def compare_modes(client, ledger, samples=10, model=None, temperature=None, seed=0):
+    """用随机样例情景分别以两种模式实测调用，结果记入台账（source='compare'），返回台账明细"""
+    import numpy as np
+
+    from .prompts import LLM_MODEL, LLM_TEMPERATURE, PROMPT_MODES, build_messages, max_tokens_for
+    from .report_job import prepare_items
+
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({
+        'm1m2': rng.uniform(-15, 0, samples).round(1),
+        'investment': rng.uniform(-15, 5, samples).round(1),
+        'rent_yield': rng.uniform(1.5, 3.5, samples).round(2),
+        'inventory': rng.choice([3.0, 3.5, 4.0], samples),
+    })
+    start = time.time()
+    for item in prepare_items(table):
+        if item['errors']:
+            continue
+        for mode in PROMPT_MODES:
+            messages = build_messages(item['cycle_data'], item['signals'], item['macro_data'], mode)
+            client.complete_sync(
+                messages, model=model or LLM_MODEL, temperature=LLM_TEMPERATURE if temperature is None else temperature,
+                max_tokens=max_tokens_for(mode), ledger=ledger, mode=mode, source='compare',
+            )
+    return ledger.frame(since=start, source='compare')
+
+
+def format_report(usage):
+    """台账汇总与节省报告的文本形式"""
+    lines = ['按提示词模式汇总（单次平均）：', usage_by_mode(usage).round(3).to_string(), '']
+    report = savings_report(usage)
+    if report:
+        lines.append('精简模式相对完整模板：')
+        names = {
+            'prompt_tokens': '提示词 tokens', 'completion_tokens': '回复 tokens', 'total_tokens': '合计 tokens',
+            'latency_mean': '平均耗时（秒）', 'latency_p95': 'P95 耗时（秒）',
+        }
+        for column, (full, compact, saved) in report.items():
+            lines.append(f'  {names[column]}: {full:.2f} → {compact:.2f}（节省 {saved*100:.1f}%）')
+    else:
+        lines.append('台账中尚无两种模式的调用记录，可运行 --compare 实测。')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token 用量与提示词节省报告')
+    parser.add_argument('--compare', action='store_true', help='用样例情景实测两种提示词模式')
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--days', type=int, default=None, help='只统计最近 N 天')
+    parser.add_argument('--base-url', default=os.environ.get('RECYCLE_LLM_BASE_URL') or None)
+    args = parser.parse_args()
+
+    ledger = TokenLedger()
+    if args.compare:
+        from .llm_client import shared_client
+
+        client = shared_client(os.environ.get('OPENAI_API_KEY', ''), base_url=args.base_url)
+        usage = compare_modes(client, ledger, samples=args.samples)
+    else:
+        usage = ledger.frame(since=time.time() - args.days * 86400 if args.days else None)
+    print(f'今日已用 {ledger.used_today()} tokens' + (f' / 预算 {ledger.daily_budget}' if ledger.daily_budget else ''))
+    print(format_report(usage))
+
+
+if __name__ == '__main__':
+    main()
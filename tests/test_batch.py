@@ -0,0 +1,60 @@
+"""批量引擎：与标量接口逐条一致，无效输入须先过滤"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recycle.batch import REQUIRED_COLUMNS, evaluate_batch, evaluate_scenarios, valid_rows
+from recycle.core import DEFAULT_MACRO, DEFAULT_PARAMS, calculate_asset_signals, calculate_cycles
+
+NOW = datetime(2026, 7, 15)
+
+
+def _random_scenarios(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'inventory': rng.uniform(2.0, 5.0, n).round(1),
+        'population': rng.uniform(25.0, 35.0, n).round(0),
+        'm1m2': rng.uniform(-20.0, 10.0, n).round(1),
+        'investment': rng.uniform(-20.0, 20.0, n).round(1),
+        'mortgage_rate': rng.uniform(2.0, 8.0, n).round(2),
+        'ltv': rng.uniform(0.3, 0.9, n).round(2),
+        'rent_yield': rng.uniform(1.5, 4.0, n).round(1),
+    })
+
+
+def test_batch_matches_scalar_functions():
+    scenarios = _random_scenarios(500)
+    batch = evaluate_batch(scenarios, now=NOW)
+    for i, row in enumerate(scenarios.to_dict('records')):
+        params = {**DEFAULT_PARAMS, 'inventory': row['inventory'], 'population': row['population']}
+        macro_data = {**DEFAULT_MACRO, **{k: row[k] for k in REQUIRED_COLUMNS if k in DEFAULT_MACRO}}
+        cycle_data = calculate_cycles(params, macro_data, as_of=NOW)
+        assert batch[i] == (cycle_data, calculate_asset_signals(cycle_data, macro_data, params))
+
+
+def test_scenarios_frame_keeps_index():
+    scenarios = _random_scenarios(10).set_index(pd.Index(list('abcdefghij')))
+    frame = evaluate_scenarios(scenarios, now=NOW)
+    assert list(frame.index) == list('abcdefghij')
+    assert len(evaluate_batch(scenarios, now=NOW)) == 10
+
+
+def test_valid_rows_flags_uncomputable_inputs():
+    scenarios = _random_scenarios(5)
+    scenarios.loc[1, 'inventory'] = 0
+    scenarios.loc[2, 'rent_yield'] = np.nan
+    scenarios.loc[3, 'population'] = -30
+    assert valid_rows(scenarios).tolist() == [True, False, False, False, True]
+    # 缺少的列不检查，标量广播到整批
+    assert valid_rows({'inventory': [3.0, np.inf], 'ltv': 0.7}).tolist() == [True, False]
+
+
+def test_evaluate_batch_rejects_invalid_rows():
+    scenarios = _random_scenarios(5)
+    scenarios.loc[2, 'ltv'] = np.nan
+    with pytest.raises(ValueError, match='1 行无效输入'):
+        evaluate_batch(scenarios, now=NOW)
+    assert len(evaluate_batch(scenarios[valid_rows(scenarios)], now=NOW)) == 4
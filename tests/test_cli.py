@@ -0,0 +1,46 @@
+"""命令行入口：无法解析或无法计算的行逐行报告，不中断整批"""
+
+import csv
+import io
+
+from recycle import cli
+from recycle.core import DEFAULT_MACRO
+
+
+def _csv_records(text):
+    return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+
+def test_blank_cell_uses_default():
+    records = _csv_records('region,inventory,m1m2,bond_yield,date\nc,3,,2.5,2026-01\n')
+    [result] = cli.run(records)
+    assert result['errors'] == []
+    assert result['macro_data']['m1m2'] == DEFAULT_MACRO['m1m2']
+    assert result['cycle_data'] is not None
+
+
+def test_unparseable_date_is_reported_per_row():
+    records = _csv_records('region,inventory,date\nok,3,2026-01\nbad,3,not-a-date\n')
+    ok, bad = cli.run(records)
+    assert ok['errors'] == [] and ok['cycle_data'] is not None
+    assert bad['cycle_data'] is None and bad['signals'] is None
+    assert any('not-a-date' in error for error in bad['errors'])
+
+
+def test_unparseable_number_and_invalid_cycle_are_reported():
+    records = _csv_records('region,inventory,m1m2\nabc,3,abc\nzero,0,-6\n')
+    unparsed, zero = cli.run(records)
+    assert unparsed['cycle_data'] is None and unparsed['errors']
+    assert zero['cycle_data'] is None
+    assert any('库存周期' in error for error in zero['errors'])
+    # 所有行的 CSV 列一致
+    rows = cli.to_rows([unparsed, zero])
+    assert list(rows[0]) == list(rows[1])
+
+
+def test_strict_exit_status(tmp_path, capsys):
+    source = tmp_path / 'rows.csv'
+    source.write_text('region,inventory,date\nok,3,2026-01\nbad,3,2026-13-40\n', encoding='utf-8')
+    assert cli.main([str(source), '--format', 'csv']) == 0
+    assert cli.main([str(source), '--format', 'csv', '--strict']) == 2
+    assert '数据异常 [bad]' in capsys.readouterr().err
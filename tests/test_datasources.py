@@ -0,0 +1,20 @@
+"""磁盘缓存：多线程同时写同一指标时不因临时文件冲突而失败"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from recycle.datasources import DiskCache, Observation
+
+
+def test_concurrent_puts_to_same_field(tmp_path):
+    cache = DiskCache(tmp_path)
+
+    def put(i):
+        for j in range(50):
+            cache.put(Observation('m1m2', float(i * 100 + j), '2026-06', 'pbc', fetched_at=1.0))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(put, range(8)))
+
+    obs = cache.get('pbc', 'm1m2')
+    assert obs.from_cache and obs.field == 'm1m2'
+    assert not list(tmp_path.glob('**/*.tmp'))
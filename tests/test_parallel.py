@@ -0,0 +1,21 @@
+"""共享进程池：并发请求同一进程数时只创建一个池，不同进程数的池互不关闭"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from recycle import parallel
+
+
+def test_concurrent_get_pool_returns_one_pool_per_size():
+    try:
+        with ThreadPoolExecutor(8) as threads:
+            pools = list(threads.map(parallel.get_pool, [2, 3] * 8))
+        assert len({id(pool) for pool in pools[::2]}) == 1
+        assert len({id(pool) for pool in pools[1::2]}) == 1
+        assert pools[0] is not pools[1]
+        # 请求另一进程数后，原来的池仍可使用
+        assert sorted(result for _, result in parallel.imap_unordered(math.sqrt, [(4,), (9,)], workers=2)) == [2, 3]
+    finally:
+        parallel.shutdown_pool()
+    assert parallel.get_pool(2) is not pools[0]
+    parallel.shutdown_pool()
@@ -0,0 +1,98 @@
+"""增量计算图：未变化的阶段复用，cutoff 截断下游，共享存储中的结果跨会话复用"""
+
+import pytest
+
+from recycle.pipeline import PipelineState, StageGraph
+from recycle.result_store import ResultStore
+
+
+def _graph(calls):
+    graph = StageGraph()
+
+    @graph.stage('base', fields=('a',))
+    def base(inputs):
+        calls.append('base')
+        return inputs['a'] // 10
+
+    @graph.stage('double', fields=('b',), deps=('base',), cutoff=True)
+    def double(inputs, base):
+        calls.append('double')
+        return base * 2 + inputs['b'] * 0
+
+    @graph.stage('report', deps=('double',))
+    def report(inputs, double):
+        calls.append('report')
+        return f'value={double}'
+
+    return graph
+
+
+def _statuses(state):
+    return {run.name: run.status for run in state.last_run}
+
+
+def test_unchanged_stages_are_reused():
+    calls = []
+    graph, state = _graph(calls), PipelineState()
+    assert graph.run(state, {'a': 10, 'b': 1})['report'] == 'value=2'
+    state.begin_rerun()
+    calls.clear()
+    assert graph.run(state, {'a': 10, 'b': 1})['report'] == 'value=2'
+    assert calls == []
+    assert set(_statuses(state).values()) == {'reused'}
+    assert state.stats()['base'] == {'ran': 1, 'reused': 1}
+
+
+def test_changed_field_reruns_stage_and_cutoff_stops_downstream():
+    calls = []
+    graph, state = _graph(calls), PipelineState()
+    graph.run(state, {'a': 10, 'b': 1})
+    calls.clear()
+    state.begin_rerun()
+    # b 变化但 double 结果不变：report 继续复用
+    graph.run(state, {'a': 10, 'b': 2})
+    assert calls == ['double']
+    assert _statuses(state) == {'base': 'reused', 'double': 'ran', 'report': 'reused'}
+    calls.clear()
+    state.begin_rerun()
+    graph.run(state, {'a': 20, 'b': 2})
+    assert calls == ['base', 'double', 'report']
+    assert state.last_run[0].reason == 'a'
+
+
+def test_unregistered_field_is_rejected():
+    graph = StageGraph()
+
+    @graph.stage('leak', fields=('a',))
+    def leak(inputs):
+        return inputs['b']
+
+    with pytest.raises(KeyError):
+        graph.run(PipelineState(), {'a': 1, 'b': 2})
+
+
+def test_sessions_share_results_through_store():
+    calls = []
+    graph, store = _graph(calls), ResultStore()
+    first, second = PipelineState(store, 'first'), PipelineState(store, 'second')
+    graph.run(first, {'a': 10, 'b': 1})
+    calls.clear()
+    outputs = graph.run(second, {'a': 10, 'b': 1})
+    assert calls == [] and outputs['report'] == 'value=2'
+    assert {run.reason for run in second.last_run} == {'共享结果'}
+    assert store.stats()['entries'] == 3
+
+
+def test_reclaimed_results_are_recomputed():
+    calls = []
+    graph, store = _graph(calls), ResultStore()
+    state = PipelineState(store, 'only')
+    graph.run(state, {'a': 10, 'b': 1})
+    store.drop_session('only')
+    store.max_bytes = 0
+    store.sweep()
+    calls.clear()
+    state.begin_rerun()
+    store.max_bytes = 2**20
+    assert graph.run(state, {'a': 10, 'b': 1})['report'] == 'value=2'
+    assert calls == ['base', 'double', 'report']
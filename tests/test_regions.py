@@ -0,0 +1,40 @@
+"""多地区分析：无效地区剔除并报告，分块并行与单进程结果一致"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recycle.regions import analyze_regions
+
+NOW = datetime(2026, 7, 15)
+DEFAULTS = {'inventory': 3.5, 'population': 30}
+
+
+def _table():
+    return pd.DataFrame({
+        'region': ['a', 'b', 'c', 'd', 'e'],
+        'inventory': [3.0, 0.0, 4.0, 3.5, 2.5],
+        'm1m2': [-8.5, -3.0, 2.0, -1.0, 0.5],
+        'investment': [-10.6, -5.0, 3.0, 0.0, 1.0],
+        'mortgage_rate': [3.85, 4.0, 4.2, 3.5, 3.9],
+        'ltv': [0.7, 0.6, np.nan, 0.5, 0.65],
+        'rent_yield': [2.2, 2.5, 3.0, 1.8, 3.5],
+    })
+
+
+@pytest.mark.parametrize('workers, chunk_size', [(1, 250_000), (2, 2)])
+def test_invalid_regions_are_dropped_and_reported(workers, chunk_size):
+    result, dropped = analyze_regions(_table(), DEFAULTS, now=NOW, workers=workers, chunk_size=chunk_size)
+    assert result['region'].tolist() == ['a', 'd', 'e']
+    assert dropped.tolist() == ['b', 'c']
+    valid = _table().iloc[[0, 3, 4]]
+    expected, _ = analyze_regions(valid, DEFAULTS, now=NOW, workers=1)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_all_regions_invalid():
+    table = _table().assign(rent_yield=np.nan)
+    result, dropped = analyze_regions(table, DEFAULTS, now=NOW, workers=1)
+    assert result.empty and len(dropped) == 5
@@ -0,0 +1,48 @@
+"""批量报告：未通过校验的行不调用大模型，逐行报告"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from recycle.report_job import prepare_items, run_report_job
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def run_sync(self, coro):
+        return asyncio.run(coro)
+
+    async def complete(self, messages, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(text='解读', prompt_tokens=10, completion_tokens=5)
+
+
+def _table():
+    return pd.DataFrame({
+        'region': ['ok', 'zero', 'nan', 'range'],
+        'inventory': [3.5, 0.0, 3.5, 3.5],
+        'm1m2': [-8.5, -8.5, np.nan, -50.0],
+    })
+
+
+def test_prepare_items_flags_invalid_rows():
+    items = list(prepare_items(_table()))
+    assert [item['label'] for item in items] == ['ok', 'zero', 'nan', 'range']
+    assert items[0]['errors'] == [] and items[0]['cycle_data'] is not None
+    for item in items[1:]:
+        assert item['errors'] and item['cycle_data'] is None and item['signals'] is None
+
+
+def test_invalid_rows_skip_llm_and_are_reported(tmp_path):
+    client = _FakeClient()
+    output = tmp_path / 'report.md'
+    summary = run_report_job(_table(), output, client, concurrency=2)
+    assert client.calls == 1
+    assert summary['generated'] == 1 and summary['invalid'] == 3
+    assert sum('输入无效' in error for error in summary['errors']) == 3
+    text = output.read_text(encoding='utf-8')
+    assert '## ok' in text and '## zero' not in text
@@ -0,0 +1,98 @@
+"""共享结果存储：引用计数、LRU 淘汰、空闲会话回收与当前会话保护"""
+
+import pytest
+
+from recycle.result_store import ResultStore, estimate_size
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+BLOB = 'x' * 1000
+SIZE = estimate_size(BLOB)
+
+
+def _store(entries, **kwargs):
+    clock = _Clock()
+    return ResultStore(max_bytes=SIZE * entries, idle_seconds=60, clock=clock, **kwargs), clock
+
+
+def _blob(tag):
+    return tag + BLOB[len(tag):]
+
+
+def test_sessions_share_one_entry():
+    store, _ = _store(10)
+    first = store.bind('s1', 'report', 'k', _blob('a'))
+    second = store.bind('s2', 'report', 'k', _blob('a'))
+    assert first is second
+    stats = store.stats()
+    assert stats['entries'] == 1 and stats['referenced'] == 1
+    assert stats['shared_saved'] == SIZE
+
+
+def test_unreferenced_entries_evicted_in_lru_order():
+    store, _ = _store(2)
+    store.put('old', _blob('o'))
+    store.put('new', _blob('n'))
+    store.get('old')
+    store.put('newest', _blob('w'))
+    assert 'new' not in store
+    assert 'old' in store and 'newest' in store
+    assert store.stats()['evictions'] == 1
+
+
+def test_referenced_entries_survive_until_released():
+    store, _ = _store(1)
+    store.bind('s1', 'report', 'k1', _blob('a'))
+    store.put('cache', _blob('b'))
+    assert 'k1' in store and 'cache' not in store
+    store.bind('s1', 'report', 'k2', _blob('c'))
+    # 槽位改指新条目后旧条目无引用，超限时被淘汰
+    assert 'k1' not in store and store.lookup('s1', 'report') == _blob('c')
+
+
+def test_idle_sessions_are_swept():
+    store, clock = _store(10)
+    store.bind('idle', 'report', 'k1', _blob('a'))
+    clock.now = 30
+    store.bind('active', 'report', 'k2', _blob('b'))
+    clock.now = 70
+    assert store.sweep() == 1
+    assert store.lookup('idle', 'report') is None
+    assert store.lookup('active', 'report') == _blob('b')
+
+
+def test_over_cap_reclaims_oldest_session_but_not_protected():
+    store, clock = _store(2)
+    store.bind('s1', 'report', 'k1', _blob('a'))
+    clock.now = 1
+    store.bind('s2', 'report', 'k2', _blob('b'))
+    clock.now = 2
+    # 写入会话本身不被回收：超限时回收最久未活动的 s1
+    store.bind('s3', 'report', 'k3', _blob('c'))
+    assert store.lookup('s1', 'report') is None
+    assert store.lookup('s2', 'report') == _blob('b')
+    assert store.stats()['sessions_evicted'] == 1
+    store.max_bytes = 0
+    store.sweep(protect='s3')
+    assert store.lookup('s3', 'report') == _blob('c')
+    assert store.lookup('s2', 'report') is None
+
+
+def test_lookup_item_reads_key_and_value_together():
+    store, _ = _store(10)
+    assert store.lookup_item('s1', 'report', 'none') == (None, 'none')
+    store.bind('s1', 'report', 'k', _blob('a'))
+    assert store.lookup_item('s1', 'report') == ('k', _blob('a'))
+
+
+def test_bind_unknown_key_without_value_raises():
+    store, _ = _store(10)
+    with pytest.raises(KeyError):
+        store.bind('s1', 'report', 'missing')
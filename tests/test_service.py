@@ -0,0 +1,67 @@
+"""分析 API：格式错误与无法计算的输入返回 400，批量请求逐情景报告"""
+
+import json
+
+import pytest
+
+pytest.importorskip('starlette')
+from starlette.testclient import TestClient
+
+from recycle import service
+
+
+@pytest.fixture
+def client():
+    service.response_cache.clear()
+    return TestClient(service.app)
+
+
+def _post(client, path, body):
+    return client.post(path, content=json.dumps(body))
+
+
+@pytest.mark.parametrize('body', [
+    {'inventory': 0},
+    {'params': {'inventory': -1}},
+    {'juglar': float('inf')},
+    {'m1m2': float('nan')},
+    {'m1m2': 'abc'},
+    [1, 2],
+])
+def test_analyze_rejects_uncomputable_inputs(client, body):
+    response = _post(client, '/v1/analyze', body)
+    assert response.status_code == 400
+    assert response.json()['errors']
+
+
+def test_analyze_out_of_range_is_422(client):
+    response = _post(client, '/v1/analyze', {'m1m2': -30})
+    assert response.status_code == 422
+
+
+def test_analyze_blank_field_uses_default(client):
+    response = _post(client, '/v1/analyze', {'m1m2': ''})
+    assert response.status_code == 200
+
+
+def test_report_rejects_invalid_cycle(client):
+    assert _post(client, '/v1/report', {'juglar': 0}).status_code == 400
+
+
+@pytest.mark.parametrize('body', [{'scenarios': 5}, {'scenarios': 'x'}, {'scenarios': {'a': 1}}, {}, [1]])
+def test_batch_rejects_malformed_scenarios(client, body):
+    assert _post(client, '/v1/analyze/batch', body).status_code == 400
+
+
+def test_batch_reports_errors_per_scenario(client):
+    response = _post(client, '/v1/analyze/batch', {'scenarios': [{'inventory': 0}, {}, 'x']})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload['count'] == 3 and payload['invalid'] == 2
+    bad, good, malformed = payload['results']
+    assert bad['errors'] and malformed['errors']
+    assert good['errors'] == [] and 'signals' in good
+
+
+def test_invalid_json_is_400(client):
+    assert client.post('/v1/analyze', content=b'{').status_code == 400